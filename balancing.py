@@ -0,0 +1,183 @@
+"""
+Monte Carlo balancing runner.
+
+Sweeps a grid of the difficulty values from constants.py and plays
+many seeded games for every point of the grid with a scripted or a
+random policy. The games are spread over a process pool and the
+aggregated win and death rates are streamed into a CSV file, one row
+per grid point, as soon as all games of that point are done.
+
+Example:
+    python balancing.py --param GOBLIN_HP=30,50,70 --param PLAYER_HP=40,80 \\
+        --games 10000 --policy greedy --out results.csv
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import random
+import time
+
+import game as game_module
+from engine import simulate
+from game import Game
+from random_streams import RandomStream
+
+# The values of constants.py that can be tuned
+PARAMETERS = (
+    "GOBLIN_HP", "ORC_HP", "WOLF_HP",
+    "SWORD_HP", "SPEAR_HP", "PLAYER_HP",
+    "FOOD_ITEMS", "NUM_OF_HERBS",
+    "GOBLINS", "ORCS", "WOLVES",
+    "SWORD", "SPEAR",
+)
+RESULTS = ("win", "death", "quit", "unfinished")
+DIRECTIONS = ("north", "south", "east", "west")
+
+
+def random_policy(game: Game, rng: random.Random):
+    """Yields random commands forever"""
+    commands = [
+        "fight", "back", "status",
+        "pick sword", "pick spear", "pick food", "pick herb",
+        "give dwarf food", "give dwarf herb",
+    ] + [f"go {direction}" for direction in DIRECTIONS]
+    while True:
+        yield rng.choice(commands)
+
+
+def greedy_policy(game: Game, rng: random.Random):
+    """Yields the commands of a simple player: fight monsters when armed,
+    pick everything up, trade with the Dwarf and wander randomly otherwise"""
+    while True:
+        room = game.current_room
+        if game.get_monsters_in_room(room):
+            yield "fight" if game.player.weapons else "back"
+            continue
+        # The game picks the first object of a kind, so only
+        # those are worth trying
+        kinds = {}
+        for obj in game.get_weapons_in_room(room) + game.get_items_in_room(room):
+            kinds.setdefault(obj.kind, obj)
+        pickable = [
+            kind for kind, obj in kinds.items()
+            if obj.weight <= game.player.weight_of_items_left
+        ]
+        if pickable:
+            yield "pick " + pickable[0]
+            continue
+        if game.dwarf and game.dwarf.get_room() is room:
+            if game.player.get_herb():
+                yield "give dwarf herb"
+                continue
+            if game.player.get_food():
+                yield "give dwarf food"
+                continue
+        yield "go " + rng.choice(list(room.exits))
+
+
+POLICIES = {"random": random_policy, "greedy": greedy_policy}
+
+
+def apply_parameters(params: dict):
+    """Set the difficulty values used by newly created games.
+    Only used inside the worker processes."""
+    for name, value in params.items():
+        setattr(game_module, name, value)
+    game_module.WEAPON_ITEMS = game_module.SWORD + game_module.SPEAR
+
+
+def play_chunk(task):
+    """Play `count` games of one grid point and return the totals.
+    Runs in a worker process."""
+    point, params, first_game, count, seed, policy, max_turns = task
+    apply_parameters(params)
+    totals = dict.fromkeys(RESULTS, 0)
+    turns = 0
+    root = RandomStream(seed)
+    for i in range(first_game, first_game + count):
+        # Every game has its own streams, whichever worker plays it
+        game = Game(rng=root.stream(point, i))
+        policy_rng = root.stream(point, i, "policy")
+        outcome = simulate(game, POLICIES[policy](game, policy_rng), max_turns=max_turns)
+        totals[outcome.result] += 1
+        turns += outcome.turns
+    return point, count, totals, turns
+
+
+def make_grid(grid: dict):
+    """Returns a list of dictionaries, one for every point of the grid"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def run(grid: dict, games: int, out_path: str, policy="greedy", seed=0,
+        max_turns=200, processes=None, chunk_size=1000):
+    """Play `games` games for every point of the grid and write one
+    CSV row per grid point to `out_path`."""
+    points = make_grid(grid)
+    tasks = [
+        (point, params, first, min(chunk_size, games - first), seed, policy, max_turns)
+        for point, params in enumerate(points)
+        for first in range(0, games, chunk_size)
+    ]
+    remaining = [games] * len(points)
+    totals = [dict.fromkeys(RESULTS, 0) for _ in points]
+    turns = [0] * len(points)
+
+    with open(out_path, "w", newline="") as out, multiprocessing.Pool(processes) as pool:
+        writer = csv.writer(out)
+        writer.writerow(list(grid) + ["games", *RESULTS, "win_rate", "death_rate", "mean_turns"])
+        for point, count, chunk_totals, chunk_turns in pool.imap_unordered(play_chunk, tasks):
+            for result, n in chunk_totals.items():
+                totals[point][result] += n
+            turns[point] += chunk_turns
+            remaining[point] -= count
+            if remaining[point] == 0:
+                # All games of this grid point are done
+                point_totals = totals[point]
+                writer.writerow(
+                    list(points[point].values())
+                    + [games, *(point_totals[result] for result in RESULTS)]
+                    + [
+                        f"{point_totals['win'] / games:.4f}",
+                        f"{point_totals['death'] / games:.4f}",
+                        f"{turns[point] / games:.1f}",
+                    ]
+                )
+                out.flush()
+
+
+def parse_param(text):
+    """Parse NAME=1,2,3 into (NAME, [1, 2, 3])"""
+    name, _, values = text.partition("=")
+    name = name.strip().upper()
+    if name not in PARAMETERS:
+        raise argparse.ArgumentTypeError(f"{name} is not a tunable parameter")
+    return name, [int(value) for value in values.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--param", type=parse_param, action="append", default=[],
+                        help="NAME=v1,v2,... one of " + ", ".join(PARAMETERS))
+    parser.add_argument("--games", type=int, default=1000, help="games per grid point")
+    parser.add_argument("--policy", choices=POLICIES, default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--out", default="balancing.csv")
+    args = parser.parse_args()
+
+    grid = dict(args.param)
+    start = time.perf_counter()
+    run(grid, args.games, args.out, args.policy, args.seed,
+        args.max_turns, args.processes, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    total = args.games * len(make_grid(grid))
+    print(f"{total} games in {elapsed:.1f}s ({total / elapsed:.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
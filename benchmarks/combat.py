@@ -0,0 +1,75 @@
+"""
+Benchmark of the batch combat resolver.
+
+Compares fights per second of the scalar path and of combat.resolve
+on random loadouts. tests/test_combat.py checks that they agree.
+
+Run from the project root:
+    python -m benchmarks.combat [fights]
+"""
+import random
+import sys
+import time
+
+import combat
+from constants import GOBLIN_HP, ORC_HP, WOLF_HP, SPEAR_HP, SWORD_HP
+from objects import Monster, Player, Weapon
+from utils import PlayerWeakerThanMonsterException
+
+FIGHTS = 1_000_000
+SLOTS = 3
+
+
+def random_fights(count, rng):
+    weapons = [
+        [rng.choice([0, SWORD_HP, SPEAR_HP, rng.randint(1, 150)]) for _ in range(SLOTS)]
+        for _ in range(count)
+    ]
+    # Carried weapons come first
+    weapons = [sorted(row, key=lambda hp: hp == 0) for row in weapons]
+    monsters = [rng.choice([GOBLIN_HP, ORC_HP, WOLF_HP, rng.randint(1, 400)]) for _ in range(count)]
+    players = [rng.randint(1, 200) for _ in range(count)]
+    return weapons, monsters, players
+
+
+def fight(weapons, monster_hp, player_hp):
+    """One fight with the objects of the game"""
+    player = Player(player_hp)
+    carried = [Weapon("Weapon", "", None, 0, hp) for hp in weapons if hp > 0]
+    for weapon in carried:
+        player.pick_weapon(weapon)
+    monster = Monster("Monster", "", None, monster_hp)
+    try:
+        monster_died = player.fight(monster)
+        player_died = False
+    except PlayerWeakerThanMonsterException:
+        monster_died, player_died = False, True
+    weapons_after = [w.hp if w in player.weapons else 0 for w in carried]
+    weapons_after += [0] * (len(weapons) - len(weapons_after))
+    return monster_died, player_died, monster.hp, player.hp, weapons_after
+
+
+def main():
+    fights = int(sys.argv[1]) if len(sys.argv) > 1 else FIGHTS
+    rng = random.Random(0)
+    weapons, monsters, players = random_fights(fights, rng)
+    scalar = min(fights, 100_000)
+    start = time.perf_counter()
+    for i in range(scalar):
+        fight(weapons[i], monsters[i], players[i])
+    scalar_rate = scalar / (time.perf_counter() - start)
+
+    if combat.numpy is not None:
+        weapons = combat.numpy.array(weapons)
+        monsters = combat.numpy.array(monsters)
+        players = combat.numpy.array(players)
+    start = time.perf_counter()
+    combat.resolve(weapons, monsters, players)
+    batch_rate = fights / (time.perf_counter() - start)
+    print(f"Player.fight: {scalar_rate:>12,.0f} fights/s")
+    print(f"resolve:      {batch_rate:>12,.0f} fights/s "
+          f"({'NumPy' if combat.numpy is not None else 'pure Python'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Microbenchmark of parsing and dispatching each command.
+
+For every line it reports the time to parse it, the time to find the
+handler of the parsed command, and the time of the whole
+process_command on a game that throws its output away.
+
+Run from the project root:
+    python -m benchmarks.commands
+"""
+import time
+import timeit
+
+from command_parser import Parser
+from game import Game
+from output import NullSink
+
+LINES = [
+    "go east", "g e", "goto 12", "quit now", "help", "pick sword", "pi sw",
+    "drop sword", "back", "give dwarf herb", "gi d he", "fight", "f",
+    "status", "st", "dance",
+]
+NUMBER = 20_000
+
+
+def main():
+    parser = Parser()
+    print(f"{'line':>16} {'parse ns':>9} {'dispatch ns':>12} {'process us':>11}")
+    for line in LINES:
+        parse = timeit.timeit(lambda: parser.parse(line), number=NUMBER) / NUMBER
+        command = parser.parse(line)
+        word = command.get_command_word()
+        dispatch = timeit.timeit(lambda: Game.commands.get(word), number=NUMBER) / NUMBER
+        # A fresh game for every run, so the command always starts from
+        # the same kind of state and never ends the benchmark
+        games = [Game(output=NullSink()) for _ in range(NUMBER // 20)]
+        start = time.perf_counter()
+        for game in games:
+            game.process_command(command)
+        process = (time.perf_counter() - start) / len(games)
+        print(f"{line:>16} {parse * 1e9:>9.0f} {dispatch * 1e9:>12.0f} {process * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark of the creature scheduler.
+
+Places creatures at random on a generated dungeon and measures the
+cost of a world tick, next to the cost of moving every creature on
+every tick.
+
+Run from the project root:
+    python -m benchmarks.creatures [creatures ...]
+"""
+import random
+import sys
+import time
+
+from map import Map
+from map_generator import generate_graph
+from objects import Monster
+from scheduler import CreatureScheduler
+
+SIZES = [10_000, 100_000, 1_000_000]
+TICKS = 200
+INTERVAL, WAKE_DISTANCE, SLEEP_FACTOR = 5, 3, 10
+
+
+def setup(creatures, rng):
+    rooms = max(creatures // 4, 1000)
+    dungeon = Map(generate_graph(rooms, seed=1))
+    monsters = [
+        Monster(f"Monster # {i}", "", dungeon[rng.randint(1, rooms)], 10)
+        for i in range(creatures)
+    ]
+    return dungeon, monsters
+
+
+def scheduled(dungeon, monsters, rng):
+    scheduler = CreatureScheduler(dungeon, INTERVAL, WAKE_DISTANCE, SLEEP_FACTOR, rng=rng)
+    for monster in monsters:
+        scheduler.add(monster)
+    player_room = dungeon[dungeon.start_room]
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        scheduler.tick(player_room)
+    return (time.perf_counter() - start) / TICKS
+
+
+def every_tick(monsters, rng, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for monster in monsters:
+            monster.move(rng)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    rng = random.Random(1)
+    print(f"{'creatures':>10} {'scheduled tick':>16} {'move all tick':>15}")
+    for size in sizes:
+        dungeon, monsters = setup(size, rng)
+        tick = scheduled(dungeon, monsters, rng)
+        naive = every_tick(monsters, rng, 3)
+        print(f"{size:>10} {tick * 1e3:>13.2f} ms {naive * 1e3:>12.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
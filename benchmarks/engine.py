@@ -0,0 +1,43 @@
+"""
+Benchmark for the headless engine.
+
+Plays complete games with random commands and reports how many
+games per second a single process can simulate.
+
+Run from the project root:
+    python -m benchmarks.engine
+"""
+import random
+import time
+
+from engine import simulate
+from game import Game
+
+GAMES = 5_000
+MAX_TURNS = 200
+COMMANDS = [
+    "go north", "go south", "go east", "go west", "back", "fight",
+    "pick sword", "pick spear", "pick food", "pick herb",
+    "give dwarf food", "give dwarf herb", "status",
+]
+
+
+def random_commands(rng):
+    while True:
+        yield rng.choice(COMMANDS)
+
+
+def main():
+    rng = random.Random(0)
+    results = {}
+    start = time.perf_counter()
+    for i in range(GAMES):
+        outcome = simulate(Game(), random_commands(rng), max_turns=MAX_TURNS)
+        results[outcome.result] = results.get(outcome.result, 0) + 1
+    elapsed = time.perf_counter() - start
+    print(f"{GAMES} games in {elapsed:.2f}s ({GAMES / elapsed:.0f} games/s)")
+    print(results)
+
+
+if __name__ == "__main__":
+    main()
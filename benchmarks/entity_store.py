@@ -0,0 +1,108 @@
+"""
+Benchmark of the struct-of-arrays EntityStore against game objects.
+
+Puts the same number of monsters and food items in a generated
+dungeon, once as Monster and Item objects and once in an EntityStore,
+then times placement, a census of the kinds on the map, finding what
+lies in a room, and a world tick moving every monster.
+
+tests/test_entity_store.py checks the moves of EntityStore.tick
+against Creature.move.
+
+Run from the project root:
+    python -m benchmarks.entity_store [entities]
+"""
+import random
+import sys
+import time
+
+import entity_store
+from constants import FOOD_DESCRIPTION, FOOD_KIND, GOBLIN_HP, GOBLIN_KIND, MONSTER_DESCRIPTION
+from entity_store import EntityStore, ITEM, MONSTER
+from map import Map
+from map_generator import generate_graph
+from objects import Item, Monster, ObjectType
+
+ENTITIES = 1_000_000
+WEIGHTS = range(20, 110, 10)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def objects(dungeon, count, rng):
+    numbers = range(2, len(dungeon))
+    times = {}
+
+    def place():
+        monsters = [
+            Monster(f"Goblin # {i+1}", MONSTER_DESCRIPTION, dungeon[rng.choice(numbers)],
+                    GOBLIN_HP, GOBLIN_KIND)
+            for i in range(count)
+        ]
+        items = [
+            Item(f"Food # {i+1}", FOOD_DESCRIPTION, dungeon[rng.choice(numbers)],
+                 rng.choice(WEIGHTS), FOOD_KIND)
+            for i in range(count)
+        ]
+        return monsters, items
+
+    times["place"], (monsters, items) = timed(place)
+
+    def census():
+        counts = {}
+        for obj in monsters + items:
+            if obj.get_room() is not None:
+                counts[obj.kind] = counts.get(obj.kind, 0) + 1
+        return counts
+
+    times["census"], _ = timed(census)
+    # The room index makes this one cheap for objects
+    # Rooms keep an index of their objects up to date all the time
+    times["index"] = 0.0
+    times["in_room"], _ = timed(lambda: list(dungeon[6].objects))
+    times["tick"], _ = timed(lambda: [monster.move(rng) for monster in monsters])
+    return times
+
+
+def store(dungeon, count, rng):
+    numbers = range(2, len(dungeon))
+    store = EntityStore(dungeon)
+    times = {}
+
+    def place():
+        store.place(MONSTER, ObjectType.get("Goblin", MONSTER_DESCRIPTION, GOBLIN_KIND),
+                    count, numbers, rng, hp=GOBLIN_HP)
+        store.place(ITEM, ObjectType.get("Food", FOOD_DESCRIPTION, FOOD_KIND),
+                    count, numbers, rng, weights=WEIGHTS)
+
+    times["place"], _ = timed(place)
+    times["census"], _ = timed(store.census)
+    # The first lookup sorts the entities by room
+    times["index"], _ = timed(lambda: store.in_room(5))
+    times["in_room"], _ = timed(lambda: store.in_room(6))
+    # The exit arrays are built on the first tick
+    store.tick(rng)
+    times["tick"], _ = timed(lambda: store.tick(rng))
+    return times
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ENTITIES
+    rng = random.Random(1)
+    rooms = max(count // 10, 1000)
+    print(f"{count} monsters and {count} items in {rooms} rooms"
+          f" ({'NumPy' if entity_store.numpy is not None else 'no NumPy'})")
+    store_times = store(Map(generate_graph(rooms, seed=1)), count, rng)
+    object_times = objects(Map(generate_graph(rooms, seed=1)), count, rng)
+    print(f"{'operation':<10} {'objects s':>10} {'store s':>10} {'speed-up':>9}")
+    for name in object_times:
+        print(f"{name:<10} {object_times[name]:>10.4f} {store_times[name]:>10.4f} "
+              f"{object_times[name] / store_times[name] if store_times[name] else 0:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Memory held by every entity of a large world.
+
+Creates rooms, items, weapons and monsters the way Game.place_* does
+and reports the bytes traced by tracemalloc per entity of each class.
+
+Run from the project root:
+    python -m benchmarks.memory [entities]
+"""
+import gc
+import sys
+import tracemalloc
+
+from constants import (
+    FOOD_DESCRIPTION, GOBLIN_HP, MONSTER_DESCRIPTION, SWORD_HP, WEAPON_DESCRIPTION,
+)
+from objects import Item, Monster, Weapon
+from room import Room
+
+ENTITIES = 1_000_000
+
+
+def measure(build, count):
+    """Returns the bytes per entity of the objects made by build(i)"""
+    gc.collect()
+    tracemalloc.start()
+    # The list holding them is not counted
+    holder = [None] * count
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        holder[i] = build(i)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del holder
+    return used / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ENTITIES
+    room = Room("Room # 1")
+    cases = {
+        # Objects are measured outside of any room, the room index is
+        # the same for every object model
+        "Room": lambda i: Room(f"Room # {i+1}"),
+        "Item": lambda i: Item(f"Food # {i+1}", FOOD_DESCRIPTION, None, 20, "food"),
+        "Weapon": lambda i: Weapon(f"Sword # {i+1}", WEAPON_DESCRIPTION, None, 20, SWORD_HP, "sword"),
+        "Monster": lambda i: Monster(f"Goblin # {i+1}", MONSTER_DESCRIPTION, None, GOBLIN_HP, "goblin"),
+        "Monster in a room": lambda i: Monster(f"Goblin # {i+1}", MONSTER_DESCRIPTION, room, GOBLIN_HP, "goblin"),
+    }
+    print(f"{count} entities of each class")
+    print(f"{'class':<20} {'bytes/entity':>13}")
+    for name, build in cases.items():
+        print(f"{name:<20} {measure(build, count):>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark of the output sinks.
+
+Plays the same commands with every sink and reports commands per
+second. Only process_command is timed, the games are built first,
+and the best of REPEAT runs is kept.
+"print" writes every piece of text as soon as it is printed,
+to a line buffered file like a terminal, which is what the game did
+before the sinks existed.
+
+Run from the project root:
+    python -m benchmarks.output
+"""
+import os
+import socket
+import threading
+import time
+
+from command_parser import Parser
+from game import Game
+from output import BufferSink, NullSink, OutputSink, SocketSink, StreamSink
+
+GAMES = 300
+REPEAT = 5
+COMMANDS = [
+    "help", "status", "go east", "go west", "go south", "go north", "back",
+    "pick sword", "drop sword", "pick sword", "status",
+] * 5
+
+
+class PrintSink(OutputSink):
+    """Writes every piece of text right away, like print does"""
+
+    def __init__(self, stream) -> None:
+        super().__init__()
+        self.__stream = stream
+
+    def write(self, text: str):
+        self.__stream.write(text)
+
+    def flush(self):
+        pass
+
+
+class SocketWriter:
+    """The write method of an asyncio StreamWriter, on a plain socket"""
+
+    def __init__(self, sock) -> None:
+        self.write = sock.sendall
+
+
+def drain(sock):
+    while sock.recv(1 << 16):
+        pass
+
+
+def run(make_sink):
+    parser = Parser([])
+    commands = [parser.parse(line) for line in COMMANDS]
+    best = 0
+    for _ in range(REPEAT):
+        games = [Game(output=make_sink(), rng=seed) for seed in range(GAMES)]
+        start = time.perf_counter()
+        for game in games:
+            for command in commands:
+                game.process_command(command)
+        best = max(best, GAMES * len(COMMANDS) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    terminal = open(os.devnull, "w", buffering=1)
+    ours, theirs = socket.socketpair()
+    threading.Thread(target=drain, args=(theirs,), daemon=True).start()
+    sinks = {
+        "print": lambda: PrintSink(terminal),
+        "stream": lambda: StreamSink(terminal),
+        "buffer": BufferSink,
+        "null": NullSink,
+        "socket": lambda: SocketSink(SocketWriter(ours)),
+    }
+    print(f"{'sink':>8} {'commands/s':>12}")
+    for name, make_sink in sinks.items():
+        print(f"{name:>8} {run(make_sink):>12,.0f}")
+    ours.close()
+    terminal.close()
+
+
+if __name__ == "__main__":
+    main()
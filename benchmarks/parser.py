@@ -0,0 +1,50 @@
+"""
+Benchmark of the Parser reading scripted commands.
+
+Parses the same lines from an in-memory iterator and from a file on
+disk and reports the lines parsed per second.
+
+Run from the project root:
+    python -m benchmarks.parser [lines]
+"""
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+from command_parser import Parser, read_lines
+
+LINES = 1_000_000
+COMMAND_LINES = [
+    "go north\n", "pick sword\n", "give dwarf herb\n", "fight\n",
+    "status\n", "dance wildly\n", "\n", "goto 12\n",
+]
+
+
+def parse_all(parser):
+    """Returns the number of lines parsed and the seconds it took"""
+    start = time.perf_counter()
+    count = 0
+    for _ in parser.commands():
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINES
+    script = itertools.islice(itertools.cycle(COMMAND_LINES), lines)
+    count, elapsed = parse_all(Parser(script))
+    print(f"iterator: {count} lines in {elapsed:.2f}s ({count / elapsed:,.0f} lines/s)")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+        file.writelines(itertools.islice(itertools.cycle(COMMAND_LINES), lines))
+    try:
+        count, elapsed = parse_all(Parser(read_lines(file.name)))
+        print(f"file:     {count} lines in {elapsed:.2f}s ({count / elapsed:,.0f} lines/s)")
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Memory of a game on a dungeon streamed by regions, for several sizes.
+
+The player walks at random for a number of moves, through the magical
+transporter too, on a generated dungeon with one object for every 20
+rooms. The memory traced after the walk is compared for a compact
+RoomGraph, whose rooms stay once created, and a RegionGraph, which
+keeps only MAX_REGIONS regions. The exit arrays are not counted.
+tests/test_regions.py checks eviction and recovery.
+
+Run from the project root:
+    python -m benchmarks.regions [moves [rooms ...]]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from constants import FOOD_DESCRIPTION, GOBLIN_HP, MONSTER_DESCRIPTION
+from game import Game
+from map_generator import generate_graph
+from output import NullSink
+from regions import streamed
+from world_file import Spawn
+
+ROOMS = [10_000, 100_000, 1_000_000]
+MOVES = 5000
+REGION_SIZE = 256
+MAX_REGIONS = 16
+
+
+def spawns(rooms):
+    return [
+        Spawn("item", "Food", "food", FOOD_DESCRIPTION, rooms // 40),
+        Spawn("monster", "Goblin", "goblin", MONSTER_DESCRIPTION, rooms // 40, GOBLIN_HP),
+    ]
+
+
+def walk(map, rooms, moves):
+    """Returns the traced bytes after the walk and the time per move"""
+    gc.collect()
+    tracemalloc.start()
+    game = Game(map, output=NullSink(), rng=1, spawns=spawns(rooms))
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(moves):
+        room = game.current_room
+        game.go_next_room(room.get_exit(rng.choice(list(room.exits))))
+        game.tick()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, elapsed / moves, game
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else MOVES
+    sizes = [int(rooms) for rooms in sys.argv[2:]] or ROOMS
+    print(f"{moves} moves, regions of {REGION_SIZE} rooms, at most {MAX_REGIONS} loaded")
+    print(f"{'rooms':>10} {'map':<12} {'MiB':>8} {'us/move':>9} {'rooms in memory':>16}")
+    for rooms in sizes:
+        graph = generate_graph(rooms, 1)
+        for name, map in (
+            ("RoomGraph", graph.to_map()),
+            ("RegionGraph", streamed(graph.to_map(), REGION_SIZE, MAX_REGIONS)),
+        ):
+            used, per_move, game = walk(map, rooms, moves)
+            print(f"{rooms:>10} {name:<12} {used / 2**20:>8.1f} {per_move * 1e6:>9.1f} "
+                  f"{game.map.rooms.created_rooms:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark of the compact RoomGraph against the dict-of-dicts Map.
+
+For every size the same dungeon is generated both ways. It reports
+the memory held by the dungeon and the time of random get_exit
+lookups, walking the dungeon like a player would.
+
+Run from the project root:
+    python -m benchmarks.room_graph [rooms ...]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from map_generator import generate_graph, generate_map
+
+SIZES = [10_000, 100_000]
+LOOKUPS = 200_000
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def measure(build, rooms):
+    """Returns the dungeon built by `build` and the bytes it holds"""
+    gc.collect()
+    tracemalloc.start()
+    dungeon = build(rooms, 1)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dungeon, size
+
+
+def walk(dungeon):
+    """Random walk of LOOKUPS get_exit calls, returns seconds per lookup"""
+    rng = random.Random(0)
+    directions = [rng.choice(DIRECTIONS) for _ in range(LOOKUPS)]
+    room = dungeon[dungeon.start_room]
+    start = time.perf_counter()
+    for direction in directions:
+        next_room = room.get_exit(direction)
+        if next_room is not None:
+            room = next_room
+    return (time.perf_counter() - start) / LOOKUPS
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'rooms':>10} {'layout':>8} {'bytes/room':>11} {'ns/lookup':>10}")
+    for rooms in sizes:
+        dungeon, size = measure(generate_map, rooms)
+        print(f"{rooms:>10} {'dict':>8} {size / rooms:>11.1f} {walk(dungeon) * 1e9:>10.0f}")
+        del dungeon
+        graph, size = measure(generate_graph, rooms)
+        dungeon = graph.to_map()
+        print(f"{rooms:>10} {'csr':>8} {size / rooms:>11.1f} {walk(dungeon) * 1e9:>10.0f}")
+        del dungeon, graph
+
+
+if __name__ == "__main__":
+    main()
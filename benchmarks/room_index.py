@@ -0,0 +1,58 @@
+"""
+Benchmark for the per-room object index.
+
+Fills a room the player never visits with more and more items and
+measures how long `go` commands take while the player walks between
+the first two rooms. With the room index the latency should stay
+flat no matter how many objects there are in the dungeon. The
+creatures are kept still and the game is seeded, so every run walks
+the same dungeon.
+
+Run from the project root:
+    python -m benchmarks.room_index
+"""
+import time
+
+from command import Command
+from constants import FOOD_DESCRIPTION
+import game as game_module
+from game import Game
+from objects import Item
+from output import NullSink
+
+ENTITY_COUNTS = [0, 1_000, 10_000, 50_000]
+COMMANDS = 2_000
+
+
+def run(entities):
+    game = Game(output=NullSink(), rng=1)
+    far_room = game.map[13]
+    for i in range(entities):
+        game.items.append(Item(f"Food # {i+1}", FOOD_DESCRIPTION, far_room, 10))
+
+    # Remove monsters from the path so the player can walk around
+    for room in (game.map[1], game.map[2]):
+        for monster in game.get_monsters_in_room(room):
+            game.monsters.remove(monster)
+            monster.change_room(None)
+
+    east = Command("go", "east", None)
+    west = Command("go", "west", None)
+    start = time.perf_counter()
+    for i in range(COMMANDS // 2):
+        game.process_command(east)
+        game.process_command(west)
+    elapsed = time.perf_counter() - start
+    return elapsed / COMMANDS
+
+
+def main():
+    # No creature walks back into the rooms cleared below
+    game_module.CREATURE_MOVE_INTERVAL = 0
+    print(f"{'entities':>10} {'us/command':>12}")
+    for entities in ENTITY_COUNTS:
+        print(f"{entities:>10} {run(entities) * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
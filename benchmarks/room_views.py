@@ -0,0 +1,56 @@
+"""
+Benchmark of the cached room descriptions and object listings.
+
+Fills the first two rooms with many objects and walks between them.
+Every `go` prints the long description and the object listing of the
+room entered. The same walk is timed again with one object dropped
+into and taken out of each room before entering it. That changes the
+room, so the listing has to be built again as it was before caching.
+
+Run from the project root:
+    python -m benchmarks.room_views
+"""
+import time
+
+from command import Command
+from constants import FOOD_DESCRIPTION
+from game import Game
+from objects import Item
+from output import NullSink
+
+ENTITY_COUNTS = [10, 100, 1_000, 10_000]
+COMMANDS = 1_000
+
+
+def run(entities, changed):
+    game = Game(output=NullSink(), rng=1)
+    rooms = game.map[1], game.map[2]
+    for room in rooms:
+        for i in range(entities):
+            game.items.append(Item(f"Food # {i+1}", FOOD_DESCRIPTION, room, 10))
+    visitor = Item("Visitor", FOOD_DESCRIPTION, None, 10)
+
+    east = Command("go", "east", None)
+    west = Command("go", "west", None)
+    start = time.perf_counter()
+    for i in range(COMMANDS // 2):
+        for command, room in ((east, rooms[1]), (west, rooms[0])):
+            if changed:
+                visitor.change_room(room)
+                visitor.change_room(None)
+            game.process_command(command)
+    elapsed = time.perf_counter() - start
+    return elapsed / COMMANDS
+
+
+def main():
+    print(f"{'entities':>10} {'changed us':>12} {'unchanged us':>14} {'speed-up':>9}")
+    for entities in ENTITY_COUNTS:
+        changed = run(entities, True)
+        unchanged = run(entities, False)
+        print(f"{entities:>10} {changed * 1e6:>12.2f} {unchanged * 1e6:>14.2f} "
+              f"{changed / unchanged:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Load test of the game server.
+
+Starts a server in this process, connects many clients over localhost
+and lets each of them send commands one after the other. Reports the
+number of sessions and the p50/p99 command latency as seen by the
+clients.
+
+Run from the project root:
+    python -m benchmarks.server_load [sessions] [commands per session]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from server import PROMPT, Server
+
+SESSIONS = 1_000
+COMMANDS = 20
+COMMAND_LINES = [
+    "go north", "go south", "go east", "go west", "back",
+    "pick sword", "pick food", "status", "help",
+]
+
+
+async def client(port, commands, latencies, rng):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    prompt = PROMPT.encode()
+    await reader.readuntil(prompt)
+    for _ in range(commands):
+        start = time.perf_counter()
+        writer.write((rng.choice(COMMAND_LINES) + "\n").encode())
+        await writer.drain()
+        await reader.readuntil(prompt)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(sessions, commands):
+    server = Server()
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    latencies = []
+    rng = random.Random(0)
+    start = time.perf_counter()
+    async with listener:
+        await asyncio.gather(
+            *(client(port, commands, latencies, rng) for _ in range(sessions))
+        )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"sessions: {sessions}  commands: {len(latencies)} in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} commands/s)")
+    print(f"latency p50: {p50 * 1e3:.2f} ms  p99: {p99 * 1e3:.2f} ms")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else SESSIONS
+    commands = int(sys.argv[2]) if len(sys.argv) > 2 else COMMANDS
+    asyncio.run(run(sessions, commands))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark of snapshot.write and snapshot.read.
+
+Times writing and reading the snapshot of games on generated dungeons
+of several sizes, and reports the size of the snapshot.
+tests/test_snapshot.py checks the round trip.
+
+Run from the project root:
+    python -m benchmarks.snapshot [rooms ...]
+"""
+import io
+import sys
+import time
+
+from game import Game
+from map_generator import generate_graph
+from output import NullSink
+import snapshot
+
+ROOMS = [1000, 100_000, 1_000_000]
+REPEAT = 3
+
+
+def main():
+    sizes = [int(rooms) for rooms in sys.argv[1:]] or ROOMS
+    print(f"{'rooms':>10} {'MiB':>8} {'write ms':>10} {'read ms':>10}")
+    for rooms in sizes:
+        game = Game(generate_graph(rooms, seed=1).to_map(), output=NullSink(), rng=1)
+        write = read = None
+        for _ in range(REPEAT):
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            snapshot.write(game, buffer)
+            elapsed = time.perf_counter() - start
+            write = elapsed if write is None else min(write, elapsed)
+            start = time.perf_counter()
+            snapshot.read(buffer.getvalue())
+            elapsed = time.perf_counter() - start
+            read = elapsed if read is None else min(read, elapsed)
+        size = len(buffer.getvalue())
+        print(f"{rooms:>10} {size / 2**20:>8.1f} {write * 1e3:>10.1f} {read * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite of the hot paths of the game.
+
+Times building a game, parsing, process_command for every verb,
+get_objects_in_room, Player.fight and Player.change_room, over several
+world sizes and entity counts. The results are written to a JSON file
+and can be compared with a baseline written by an earlier run:
+
+    python -m benchmarks.suite --out baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.2
+
+The run fails (exit status 1) when a case is slower than the baseline
+by more than the threshold. Every case is timed `--repeat` times and
+the fastest run is kept, which is the least noisy figure. The short
+cases that can call their function again on the same items do so for
+MIN_RUN_SECONDS in every run, keeping the fastest time through, so one
+hiccup doesn't make a run slow.
+"""
+import argparse
+import functools
+import json
+import platform
+import sys
+import time
+
+from command_parser import Parser
+from constants import SWORD_HP
+from game import Game
+from map import Map
+from map_generator import exit_targets, generate_exits
+from objects import Item, Monster, Player, Weapon
+from output import NullSink
+from room import Room
+from utils import PlayerWeakerThanMonsterException
+
+ROOMS = [16, 1000, 10_000]
+ENTITIES = [10, 100, 1000]
+# One line for every verb, except save and load which time the disk
+VERBS = {
+    "go": "go east", "goto": "goto 12", "quit": "quit", "help": "help",
+    "pick": "pick sword", "drop": "drop sword", "back": "back",
+    "give": "give dwarf herb", "fight": "fight", "status": "status",
+}
+# How long the cases that repeat their items go through them, see timed
+MIN_RUN_SECONDS = 0.1
+LINES = ["go east", "g e", "goto 12", "pick sword", "pi sw", "give dwarf herb",
+         "gi d he", "fight", "status", "dance"]
+
+
+def best_of(repeat, run):
+    """Calls run() `repeat` times. run returns (seconds, operations);
+    returns the fastest seconds per operation."""
+    best = None
+    for _ in range(repeat):
+        seconds, operations = run()
+        per_operation = seconds / operations
+        if best is None or per_operation < best:
+            best = per_operation
+    return best
+
+
+def timed(function, items, min_seconds=0):
+    """Calls function on every item and returns (seconds, len(items)).
+    The items are gone through again until min_seconds have passed,
+    and the seconds are the ones of the fastest time through."""
+    best = None
+    total = 0
+    while best is None or total < min_seconds:
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        seconds = time.perf_counter() - start
+        total += seconds
+        if best is None or seconds < best:
+            best = seconds
+    return best, len(items)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_exits(rooms, seed):
+    return generate_exits(rooms, seed)
+
+
+def new_map(rooms, seed):
+    """The default dungeon for 16 rooms, a generated one otherwise.
+    Same as map_generator.generate_map, but the exits of the few seeds
+    used are only generated once."""
+    if rooms == 16:
+        return None
+    width, exits, transporter_room = cached_exits(rooms, seed % 5)
+    dungeon = {number: Room(f"Room # {number}") for number in range(1, rooms + 1)}
+    for number, room in dungeon.items():
+        for direction, next_number in exit_targets(number, width, exits):
+            room.set_exit(direction, dungeon[next_number])
+    return Map(dungeon, 1, rooms, transporter_room)
+
+
+def game_init(rooms, repeat):
+    def run():
+        maps = [new_map(rooms, seed) for seed in range(5)]
+        return timed(lambda map: Game(map, output=NullSink(), rng=1), maps)
+    return best_of(repeat, run)
+
+
+def parse(repeat):
+    parser = Parser([])
+    lines = LINES * 1000
+    return best_of(repeat, lambda: timed(parser.parse, lines, MIN_RUN_SECONDS))
+
+
+def process_command(verb, rooms, repeat):
+    command = Parser([]).parse(VERBS[verb])
+
+    def run():
+        # A fresh game every time, so every command starts from the same
+        # kind of state. The player carries a sword for drop and fight
+        games = []
+        for seed in range(20):
+            game = Game(new_map(rooms, seed), output=NullSink(), rng=seed)
+            game.player.pick_weapon(game.weapons[0])
+            games.append(game)
+        return timed(lambda game: game.process_command(command), games)
+    return best_of(repeat, run)
+
+
+def crowded_room(entities):
+    """A room with `entities` objects of every kind, in turn"""
+    room = Room("Crowded room")
+    for i in range(entities):
+        kind = i % 3
+        if kind == 0:
+            Item(f"Food # {i}", "", room, 10)
+        elif kind == 1:
+            Weapon(f"Sword # {i}", "", room, 10, SWORD_HP)
+        else:
+            Monster(f"Goblin # {i}", "", room, 10)
+    return room
+
+
+def get_objects_in_room(entities, repeat):
+    game = Game(output=NullSink(), rng=1)
+    rooms = [crowded_room(entities)] * 200
+    return best_of(repeat, lambda: timed(game.get_objects_in_room, rooms, MIN_RUN_SECONDS))
+
+
+def fight(weapons, repeat):
+    def one_fight(player):
+        try:
+            player.fight(Monster("Monster", "", None, SWORD_HP * weapons))
+        except PlayerWeakerThanMonsterException:
+            pass
+
+    def run():
+        players = []
+        for _ in range(1000):
+            player = Player(100, weight_of_items_left=10 * weapons)
+            for i in range(weapons):
+                player.pick_weapon(Weapon(f"Sword # {i}", "", None, 10, SWORD_HP))
+            players.append(player)
+        return timed(one_fight, players)
+    return best_of(repeat, run)
+
+
+def change_room(entities, repeat):
+    first, second = crowded_room(entities), crowded_room(entities)
+    player = Player(100)
+    rooms = [first, second] * 5000
+    return best_of(repeat, lambda: timed(player.change_room, rooms, MIN_RUN_SECONDS))
+
+
+def cases(rooms, entities):
+    """Yields the name and the function of every case"""
+    for size in rooms:
+        yield f"game_init/rooms={size}", lambda repeat, size=size: game_init(size, repeat)
+    yield "parse", parse
+    for verb in VERBS:
+        for size in rooms:
+            yield (f"process_command/{verb}/rooms={size}",
+                   lambda repeat, verb=verb, size=size: process_command(verb, size, repeat))
+    for count in entities:
+        yield (f"get_objects_in_room/entities={count}",
+               lambda repeat, count=count: get_objects_in_room(count, repeat))
+        yield (f"change_room/entities={count}",
+               lambda repeat, count=count: change_room(count, repeat))
+    for count in (1, 3, 10):
+        yield f"fight/weapons={count}", lambda repeat, count=count: fight(count, repeat)
+
+
+def compare(results, baseline, threshold):
+    """Prints the change of every case and returns the regressed ones"""
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = seconds / before - 1
+        if change > threshold:
+            regressions.append(name)
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<40} {before * 1e6:>12.2f} {seconds * 1e6:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default="benchmark_results.json",
+                        help="where to write the results")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown over the baseline that fails the run, 0.2 is 20%%")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run the cases containing this")
+    parser.add_argument("--rooms", type=int, nargs="+", default=ROOMS)
+    parser.add_argument("--entities", type=int, nargs="+", default=ENTITIES)
+    args = parser.parse_args()
+
+    results = {}
+    for name, case in cases(args.rooms, args.entities):
+        if args.filter in name:
+            results[name] = case(args.repeat)
+            print(f"{name:<40} {results[name] * 1e6:>12.2f} us")
+
+    with open(args.out, "w") as out:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "unit": "seconds per operation",
+            "results": results,
+        }, out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        print(f"\n{'case':<40} {'baseline us':>12} {'now us':>12} {'change':>8}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than "
+                  f"{args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
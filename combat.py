@@ -0,0 +1,147 @@
+"""
+Batch combat resolver.
+
+Resolves many fights of a player against a monster at once, with the
+same rules as Player.fight and attack:
+
+- the weapons are used in order; a weapon weaker than the monster
+  breaks and takes its hp off the monster
+- the first weapon at least as strong as the monster kills it, loses
+  the monster's hp and breaks if that leaves it with none
+- if no weapon is left afterwards the player fights bare-handed, even
+  if the monster is already dead, and dies if the monster is stronger
+  (Player.fight raises PlayerWeakerThanMonsterException)
+
+Every fight is a row: the hp of the weapons the player carries (0 for
+an empty slot), the monster's hp and the player's hp. With NumPy all
+rows are resolved with a few array operations. Without it the rows
+are resolved one by one with the same arithmetic.
+
+>>> result = resolve([[100, 150], [100, 0]], [120, 150], [40, 40])
+>>> result.monster_died, result.player_died
+(array([ True, False]), array([False,  True]))
+"""
+from itertools import accumulate
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+class CombatResult:
+    """The outcome of a batch of fights, one entry per row.
+
+    monster_died: the monster was killed
+    player_died: the player lost a bare-handed fight
+    monster_hp: the monster's hp afterwards
+    player_hp: the player's hp afterwards
+    weapon_hp: the hp of the weapons afterwards, 0 if broken
+    """
+
+    def __init__(self, monster_died, player_died, monster_hp, player_hp, weapon_hp):
+        self.monster_died = monster_died
+        self.player_died = player_died
+        self.monster_hp = monster_hp
+        self.player_hp = player_hp
+        self.weapon_hp = weapon_hp
+
+
+def resolve(weapon_hp, monster_hp, player_hp) -> CombatResult:
+    """Resolve a batch of fights.
+
+    Parameters
+    ----------
+    weapon_hp: 2D array or list of lists of int
+        For every fight, the hp of the player's weapons in the order
+        they are used. 0 is an empty slot
+    monster_hp: 1D array or list of int
+        The monster's hp for every fight
+    player_hp: 1D array, list or a single int
+        The player's hp for every fight
+
+    Returns a CombatResult of NumPy arrays, or of lists without NumPy.
+    """
+    if numpy is None:
+        return _resolve_rows(weapon_hp, monster_hp, player_hp)
+    return _resolve_arrays(weapon_hp, monster_hp, player_hp)
+
+
+def _resolve_arrays(weapon_hp, monster_hp, player_hp) -> CombatResult:
+    weapons = numpy.asarray(weapon_hp, dtype=numpy.int64)
+    monster = numpy.asarray(monster_hp, dtype=numpy.int64)
+    player = numpy.broadcast_to(numpy.asarray(player_hp, dtype=numpy.int64), monster.shape)
+    if weapons.ndim != 2 or weapons.shape[1] == 0:
+        # No weapons at all, fight with an empty slot
+        weapons = numpy.zeros((len(monster), 1), dtype=numpy.int64)
+    rows, slots = weapons.shape
+    carried = weapons > 0
+
+    # The damage dealt by the weapons up to and including each slot
+    damage = numpy.cumsum(weapons, axis=1)
+    # The first weapon reaching the monster's hp kills it
+    reaches = damage >= monster[:, None]
+    killed = reaches.any(axis=1)
+    killer = numpy.where(killed, reaches.argmax(axis=1), slots)
+    index = numpy.arange(rows)
+    killer_slot = numpy.minimum(killer, slots - 1)
+    damage_before = numpy.where(
+        killer > 0, damage[index, numpy.maximum(killer - 1, 0)], 0
+    )
+    damage_before = numpy.where(killed, damage_before, damage[:, -1])
+
+    # Monster hp before the bare-handed fight. A monster killed by a
+    # weapon keeps the hp it had when that weapon struck
+    monster_after = monster - damage_before
+
+    # Weapons before the killer break, the killer loses the monster's
+    # hp, the ones after it are untouched
+    slot = numpy.arange(slots)[None, :]
+    weapons_after = numpy.where(slot < killer[:, None], 0, weapons)
+    killer_left = weapons[index, killer_slot] - monster_after
+    weapons_after[index, killer_slot] = numpy.where(
+        killed, numpy.maximum(killer_left, 0), weapons_after[index, killer_slot]
+    )
+    weapons_after = numpy.where(carried, weapons_after, 0)
+
+    # Bare hands when no weapon is left
+    bare_handed = ~(weapons_after > 0).any(axis=1)
+    player_died = bare_handed & (monster_after > player)
+    player_won = bare_handed & ~player_died
+    player_after = numpy.where(player_won, player - monster_after, player)
+    monster_died = (killed | player_won) & ~player_died
+    monster_after = numpy.where(player_died, monster_after - player, monster_after)
+    return CombatResult(monster_died, player_died, monster_after, player_after, weapons_after)
+
+
+def _resolve_rows(weapon_hp, monster_hp, player_hp) -> CombatResult:
+    if isinstance(player_hp, int):
+        player_hp = [player_hp] * len(monster_hp)
+    result = CombatResult([], [], [], [], [])
+    for weapons, monster, player in zip(weapon_hp, monster_hp, player_hp):
+        weapons = list(weapons)
+        damage = list(accumulate(weapons))
+        killer = next((i for i, dealt in enumerate(damage) if dealt >= monster), None)
+        if killer is None:
+            monster -= damage[-1] if damage else 0
+            weapons = [0] * len(weapons)
+        else:
+            monster -= damage[killer - 1] if killer else 0
+            weapons[killer] = max(weapons[killer] - monster, 0)
+            weapons[:killer] = [0] * killer
+        monster_died = killer is not None
+        player_died = False
+        if not any(hp > 0 for hp in weapons):
+            if monster > player:
+                player_died = True
+                monster_died = False
+                monster -= player
+            else:
+                player -= monster
+                monster_died = True
+        result.monster_died.append(monster_died)
+        result.player_died.append(player_died)
+        result.monster_hp.append(monster)
+        result.player_hp.append(player)
+        result.weapon_hp.append(weapons)
+    return result
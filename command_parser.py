@@ -11,21 +11,56 @@ class Parser():
      The parser has a set of known command words. It checks user input against
      the known commands, and if the input is not one of the known commands, it
      returns a command object that is marked as an unknown command.
+
+     Instead of the terminal the lines can come from any iterable, e.g. an
+     open file, a pipe or a generator. They are read one at a time, so long
+     scripts are played back without loading them into memory.
     """
-    def __init__(self):
-        """ Create a parser to read from the terminal window """
+    def __init__(self, lines=None, echo=False, output=None):
+        """ Create a parser to read from the terminal window, or from `lines`
+
+        Parameters
+        ----------
+        lines: iterable of strings
+            Where to read the commands from. None means the terminal.
+        echo: bool
+            Print every line read from `lines` after the prompt, as if
+            it was typed in.
+        output: OutputSink
+            Where the echoed lines are written. Defaults to the terminal.
+        """
         self.__commands = CommandWords()
+        self.__lines = iter(lines) if lines is not None else None
+        self.__echo = echo
+        self.__output = output
 
     def get_command(self):
-        """ Returns The next command from the user """
-        
+        """ Returns The next command from the user.
+        Returns None when there are no more lines to read. """
+        if self.__lines is None:
+            try:
+                input_line = input( "> " )
+            except EOFError:
+                return None
+        else:
+            input_line = next(self.__lines, None)
+            if input_line is None:
+                return None
+            if self.__echo:
+                echo = "> " + input_line.rstrip("\n")
+                if self.__output is None:
+                    print(echo)
+                else:
+                    self.__output.write(echo + "\n")
+        return self.parse(input_line)
+
+    def parse(self, input_line):
+        """ Returns the command in a line of text """
         # Initialise word1, word2 and word3 to <None>
         word1 = None        # None is a special Python value that says the variable contains nothing
         word2 = None
         word3 = None
 
-        input_line = input( "> " )
-
         # Find up to three words on the line and set word1, word2 and word3 appropriately
         tokens = input_line.strip().split()
         if len(tokens) > 0:
@@ -37,12 +72,28 @@ class Parser():
 
         # Now check whether this word is known. If so, create a command
         # with it. If not, create a <None> command (for unknown command).
-        if(self.__commands.is_command(word1)):
+        # Unambiguous abbreviations like "f" for "fight" are expanded.
+        command_word = self.__commands.resolve(word1)
+        if command_word is not None:
             # word1 is a string; word2 & word3 may be string or None
-            return Command(word1, word2, word3)
+            word2, word3 = self.__commands.resolve_arguments(command_word, word2, word3)
+            return Command(command_word, word2, word3)
         else:
             return Command(None, None, None); 
 
-    def show_commands(self):
+    def commands(self):
+        """ Yields the commands of all the remaining lines """
+        command = self.get_command()
+        while command is not None:
+            yield command
+            command = self.get_command()
+
+    def show_commands(self, output=None):
         """ Print out a list of valid command words. """
-        self.__commands.show_all()
+        self.__commands.show_all(output)
+
+
+def read_lines(path):
+    """ Yields the lines of a file one at a time, closing it at the end """
+    with open(path) as file:
+        yield from file
@@ -1,36 +1,150 @@
+from constants import DIRECTIONS
+
+
+class PrefixTrie:
+    """
+    A trie of words which also recognises unambiguous abbreviations.
+    "f" finds "fight" if no other word starts with "f". A word that
+    is typed in full always wins, so "go" is "go" even though "goto"
+    starts with it as well. Looking a word up costs O(length of word).
+    """
+
+    # Marks a node shared by more than one word
+    AMBIGUOUS = object()
+
+    def __init__(self, words=()):
+        # Every node is [children, word ending here, only word below]
+        self.__root = [{}, None, None]
+        # Words typed in full skip the walk down the trie
+        self.__words = set()
+        for word in words:
+            self.insert(word)
+
+    def insert(self, word, abbreviate=True):
+        """Add a word. With abbreviate False it is only found when typed
+        in full, and doesn't make the abbreviations of others ambiguous"""
+        self.__words.add(word)
+        if not abbreviate:
+            return
+        node = self.__root
+        for letter in word:
+            node[2] = word if node[2] in (None, word) else self.AMBIGUOUS
+            node = node[0].setdefault(letter, [{}, None, None])
+        node[2] = word if node[2] in (None, word) else self.AMBIGUOUS
+        node[1] = word
+
+    def resolve(self, prefix):
+        """Returns the word `prefix` stands for, or None if there is
+        none or more than one"""
+        if prefix in self.__words:
+            return prefix
+        if not prefix:
+            return None
+        node = self.__root
+        for letter in prefix:
+            node = node[0].get(letter)
+            if node is None:
+                return None
+        if node[1] is not None:
+            return node[1]
+        if node[2] is self.AMBIGUOUS:
+            return None
+        return node[2]
+
+
 class CommandWords:
     """
     This class holds a set of all command words known to the game.
     It is used to recognise commands as they are typed in.
+
+    The command words are shared by all parsers. They are added with
+    CommandWords.register, below for the commands of the game, and
+    Game.register_command gives them what they do.
     """
 
+    ITEMS = ["food", "herb"]
+    WEAPONS = ["sword", "spear"]
+
+    __valid_commands = []
+    __trie = PrefixTrie()
+    # Words the second and third word of a command can be abbreviated to
+    __arguments = {}
+
     def __init__(self):
         """Constructor - initialise the command words"""
-        self.__valid_commands = [
-            "go",
-            "quit",
-            "help",
-            "pick",
-            "drop",
-            "back",
-            "give",
-            "fight",
-            "status",
-        ]
+        pass
+
+    @classmethod
+    def register(cls, command, second_words=None, third_words=None, abbreviate=True):
+        """Add a command word.
+
+        Parameters
+        ----------
+        command: string
+            The command word
+        second_words, third_words: iterable of strings
+            Known second and third words, so that they can be abbreviated
+            as well, e.g. "pi sw" for "pick sword". The words of a command
+            that is already known are kept when these are None.
+        abbreviate: bool
+            Whether the command word itself can be abbreviated
+        """
+        if command not in cls.__valid_commands:
+            cls.__valid_commands.append(command)
+            cls.__trie.insert(command, abbreviate)
+        second_trie, third_trie = cls.__arguments.get(command, (None, None))
+        if second_words is not None or second_trie is None:
+            second_trie = PrefixTrie(second_words or ())
+        if third_words is not None or third_trie is None:
+            third_trie = PrefixTrie(third_words or ())
+        cls.__arguments[command] = (second_trie, third_trie)
 
     def is_command(self, a_string):
         """Check whether a given String is a valid command word.
 
         Returns true if it is, false if it isn't.
         """
-        return a_string in self.__valid_commands
-
-    def show_all(self):
-        """Print all valid commands to the screen"""
-        for command in self.__valid_commands:
-            print(command + ", ", end="")
-            # 'end' is a keyword argument that determines the character printed at the end of the string
-            # This defaults to the newline character but here we are setting it to the blank string
-            # This means each command follows the previous one on the same line
-        print()
-        # Now we print nothing - this is just to print a newline character
+        return self.resolve(a_string) is not None
+
+    def resolve(self, a_string):
+        """Returns the command word a string stands for, e.g. "fight"
+        for "f". Returns None if there is none or it is ambiguous."""
+        return self.__trie.resolve(a_string)
+
+    def resolve_arguments(self, command, second_word, third_word):
+        """Expand abbreviations of the second and third word of a
+        command. Words that aren't known are kept as they are."""
+        second_words, third_words = self.__arguments[command]
+        if second_word is not None:
+            second_word = second_words.resolve(second_word) or second_word
+        if third_word is not None:
+            third_word = third_words.resolve(third_word) or third_word
+        return second_word, third_word
+
+    def show_all(self, output=None):
+        """Print all valid commands to the screen, or write them to an
+        output sink"""
+        # Each command is followed by a comma, all on the same line
+        line = "".join([command + ", " for command in self.__valid_commands])
+        if output is None:
+            print(line)
+        else:
+            output.write(line + "\n")
+
+
+# The commands of the game. The order is the one shown by 'help'
+CommandWords.register("go", DIRECTIONS)
+CommandWords.register("goto")
+CommandWords.register("quit")
+CommandWords.register("help")
+CommandWords.register("pick", CommandWords.ITEMS + CommandWords.WEAPONS)
+CommandWords.register("drop", CommandWords.ITEMS + CommandWords.WEAPONS)
+CommandWords.register("back")
+CommandWords.register("give", ["dwarf"], CommandWords.ITEMS)
+CommandWords.register("fight")
+CommandWords.register("status")
+# Commands about the session are typed in full, so that "st" is
+# still "status"
+CommandWords.register("save", abbreviate=False)
+CommandWords.register("load", abbreviate=False)
+CommandWords.register("stats", ["on", "off", "reset", "export"], abbreviate=False)
@@ -0,0 +1 @@
+"""Lets the tests in tests/ import the modules of the project root"""
@@ -5,6 +5,9 @@ the difficulty of the game.
 """
 START_ROOM = 1
 EXIT_ROOM = 15
+TRANSPORTER_ROOM = 3
+
+DIRECTIONS = ["north", "south", "east", "west"]
 
 FOOD_ITEMS = 2
 NUM_OF_HERBS = 2
@@ -19,6 +22,13 @@ SWORD = 2
 SPEAR = 1
 WEAPON_ITEMS = SWORD + SPEAR
 
+# Creatures move every CREATURE_MOVE_INTERVAL turns (0 to keep them still).
+# The ones further than CREATURE_WAKE_DISTANCE rooms from the player sleep
+# for CREATURE_SLEEP_FACTOR intervals at a time
+CREATURE_MOVE_INTERVAL = 5
+CREATURE_WAKE_DISTANCE = 3
+CREATURE_SLEEP_FACTOR = 10
+
 # Powers and Hit Points
 GOBLIN_HP = 50
 ORC_HP = 100
@@ -33,3 +43,9 @@ HERBS_DESCRIPTION = "A Herb Item can be traded for different things from Dwarves
 MONSTER_DESCRIPTION = "A Monster will not let you go on the other side of the room. You need to defeat a Monster to get loots or save Dwarf. A Monster can be either a Goblin or an Orc or a Wolf."
 WEAPON_DESCRIPTION = "A Weapon will help you fight against a Monster. A Weapon can either be a Sword or a Spear. Both weapons have different power."
 DWARF_DESCRIPTION = "A Dwarf is the resident of Dungeon. It needs food to eat and herbs to use in research. In return it will help you escape."
+
+# Kinds of the objects, see DungeonObject.kind
+FOOD_KIND, HERB_KIND = "food", "herb"
+SWORD_KIND, SPEAR_KIND = "sword", "spear"
+GOBLIN_KIND, ORC_KIND, WOLF_KIND = "goblin", "orc", "wolf"
+DWARF_KIND = "dwarf"
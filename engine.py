@@ -0,0 +1,94 @@
+"""
+Headless engine to play a Game without a terminal.
+
+The engine feeds a sequence of commands to a Game and returns an
+Outcome describing how the game ended. Nothing is read from stdin,
+the game's output goes to a NullSink unless another sink is given and
+the interpreter is never exited, so many games can be simulated in
+the same process.
+
+>>> from engine import simulate
+>>> from game import Game
+>>> outcome = simulate(Game(), ["pick sword", "go east", "fight", "quit"])
+>>> outcome.result
+'quit'
+"""
+from typing import Iterable, Union
+
+from command import Command
+from command_parser import Parser
+from game import Game
+from output import NullSink, OutputSink
+
+
+class Outcome:
+    """The result of a simulated game.
+
+    result is "win", "death" or "quit", or "unfinished" if the
+    commands ran out before the game ended.
+    """
+
+    def __init__(self, result, turns, hp, inventory, weapons, key, room):
+        self.result = result
+        self.turns = turns
+        self.hp = hp
+        self.inventory = inventory
+        self.weapons = weapons
+        self.key = key
+        self.room = room
+
+    def __repr__(self) -> str:
+        return (
+            f"Outcome(result={self.result!r}, turns={self.turns}, hp={self.hp}, "
+            f"inventory={self.inventory}, weapons={self.weapons}, key={self.key})"
+        )
+
+
+_parser = Parser()
+
+
+def simulate(
+    game: Game,
+    commands: Iterable[Union[str, Command]],
+    max_turns: int = None,
+    output: OutputSink = None,
+) -> Outcome:
+    """Play the game with the given commands until it ends, the commands
+    run out or max_turns commands were processed.
+
+    Parameters
+    ----------
+    game: Game
+        A freshly created game
+    commands: iterable of str or Command
+        Lines like "go east" or already parsed commands
+    max_turns: int
+        Stop after this many commands. None means no limit
+    output: OutputSink
+        Where the game's text goes. It is thrown away by default
+    """
+    game.output = output or NullSink()
+    turns = 0
+    for command in commands:
+        if max_turns is not None and turns >= max_turns:
+            break
+        if isinstance(command, str):
+            command = _parser.parse(command)
+        turns += 1
+        if game.process_command(command):
+            break
+    return outcome_of(game, turns)
+
+
+def outcome_of(game: Game, turns: int) -> Outcome:
+    """Collect the Outcome of a game after `turns` commands"""
+    player = game.player
+    return Outcome(
+        game.outcome or "unfinished",
+        turns,
+        player.hp,
+        [item.get_name() for item in player.inventory],
+        [weapon.get_name() for weapon in player.weapons],
+        game.key,
+        game.current_room.get_short_description(),
+    )
@@ -0,0 +1,260 @@
+"""
+Struct-of-arrays store for the items, weapons and monsters of very
+large dungeons: a prototype measured by benchmarks/entity_store.py.
+
+The game doesn't use it. Its objects stay DungeonObjects lying in the
+index of their Room, which the listing, the fights, the scheduler and
+the snapshots all rely on. The store shows what the same data costs
+kept as arrays, and how fast the bulk operations become.
+
+Instead of one Python object per entity, an EntityStore keeps every
+field in its own typed array, indexed by entity id:
+
+    classes[id]   ITEM, WEAPON, MONSTER or DWARF
+    types[id]     index of its ObjectType (title, description, kind)
+    kinds[id]     index of its kind in store.kind_names
+    numbers[id]   the number in its name, "Goblin # 3" is 3
+    rooms[id]     number of the room it lies in, 0 when it is in none
+    hps[id]       hit points (monsters and weapons)
+    weights[id]   weight (items and weapons)
+
+Placement, room queries, a census of the dungeon and a world tick
+moving every creature are then a handful of array operations. With
+NumPy they are vectorised, without it the same operations run as
+plain loops.
+
+>>> store = EntityStore(map)
+>>> goblins = store.place(MONSTER, ObjectType.get("Goblin", MONSTER_DESCRIPTION),
+...                       100_000, room_numbers, rng, hp=GOBLIN_HP)
+>>> store.census()
+"""
+import random
+import sys
+from array import array
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+from map import Map
+from objects import ObjectType
+from room_graph import RoomGraph
+
+# Classes of the entities
+ITEM, WEAPON, MONSTER, DWARF = range(4)
+CREATURES = (MONSTER, DWARF)
+
+# Column name -> typecode
+COLUMNS = {
+    "classes": "B", "types": "H", "kinds": "B", "numbers": "i",
+    "rooms": "i", "hps": "i", "weights": "i",
+}
+
+
+class EntityStore:
+    """Items, weapons and monsters kept in typed arrays"""
+
+    def __init__(self, map: Map) -> None:
+        """
+        Parameters
+        ----------
+        map: Map
+            The dungeon. Rooms are referred to by their numbers in it
+        """
+        self.map = map
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array(typecode))
+        # ObjectType -> index in object_types, and the kinds by index
+        self.object_types = []
+        self.__type_index = {}
+        self.kind_names = []
+        self.__kind_index = {}
+        self.__exits = None
+        # See __allowed_exits
+        self.__allowed = None
+        # Entity ids sorted by room, built when a room is looked up and
+        # dropped when any entity changes room
+        self.__by_room = None
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def __type_of(self, object_type: ObjectType) -> int:
+        index = self.__type_index.get(object_type)
+        if index is None:
+            index = self.__type_index[object_type] = len(self.object_types)
+            self.object_types.append(object_type)
+        return index
+
+    def kind_code(self, kind: str) -> int:
+        """Returns the index of a kind in kind_names, adding it if needed"""
+        code = self.__kind_index.get(kind)
+        if code is None:
+            code = self.__kind_index[kind] = len(self.kind_names)
+            self.kind_names.append(sys.intern(kind))
+        return code
+
+    """
+     * Adding entities
+    """
+
+    def add(self, cls: int, object_type: ObjectType, number: int, room: int = 0,
+            hp: int = 0, weight: int = 0) -> int:
+        """Add one entity and return its id"""
+        self.classes.append(cls)
+        self.types.append(self.__type_of(object_type))
+        self.kinds.append(self.kind_code(object_type.kind))
+        self.numbers.append(number)
+        self.rooms.append(room)
+        self.hps.append(hp)
+        self.weights.append(weight)
+        self.__by_room = None
+        return len(self.classes) - 1
+
+    def place(self, cls: int, object_type: ObjectType, count: int, room_numbers,
+              rng=random, hp: int = 0, weights=(0,), first_number: int = 1) -> range:
+        """Add `count` entities of one type in random rooms, numbered
+        from first_number, like Game.place_* does one by one.
+
+        Parameters
+        ----------
+        room_numbers: sequence of int
+            The rooms they can be put in
+        rng:
+            Random generator. With NumPy it seeds a NumPy generator
+        weights: sequence of int
+            The weights to choose from
+        Returns the range of their ids.
+        """
+        first = len(self.classes)
+        type_index = self.__type_of(object_type)
+        kind = self.kind_code(object_type.kind)
+        self.classes.extend(array("B", [cls]) * count)
+        self.types.extend(array("H", [type_index]) * count)
+        self.kinds.extend(array("B", [kind]) * count)
+        self.numbers.extend(array("i", range(first_number, first_number + count)))
+        self.hps.extend(array("i", [hp]) * count)
+        if numpy is not None:
+            generator = numpy.random.default_rng(rng.getrandbits(64))
+            rooms = generator.choice(numpy.asarray(room_numbers, dtype=numpy.int32), count)
+            self.rooms.frombytes(rooms.astype(numpy.int32).tobytes())
+            chosen = generator.choice(numpy.asarray(weights, dtype=numpy.int32), count)
+            self.weights.frombytes(chosen.astype(numpy.int32).tobytes())
+        else:
+            self.rooms.extend([rng.choice(room_numbers) for _ in range(count)])
+            self.weights.extend([rng.choice(weights) for _ in range(count)])
+        self.__by_room = None
+        return range(first, first + count)
+
+    """
+     * Queries
+    """
+
+    def __column(self, name):
+        """A NumPy view of a column. It must be dropped before the
+        column grows."""
+        column = getattr(self, name)
+        if not column:
+            # frombuffer can't view an empty buffer
+            return numpy.zeros(0, column.typecode)
+        return numpy.frombuffer(column, dtype=column.typecode)
+
+    def in_room(self, number: int) -> list:
+        """Returns the ids of the entities lying in a room"""
+        if numpy is not None:
+            if self.__by_room is None:
+                rooms = self.__column("rooms")
+                order = numpy.argsort(rooms, kind="stable")
+                self.__by_room = (order, rooms[order])
+            order, sorted_rooms = self.__by_room
+            # With the same dtype, so the column isn't converted
+            bounds = numpy.array([number, number + 1], dtype=sorted_rooms.dtype)
+            start, end = numpy.searchsorted(sorted_rooms, bounds)
+            return order[start:end].tolist()
+        return [i for i, room in enumerate(self.rooms) if room == number]
+
+    def census(self, cls: int = None) -> dict:
+        """Returns kind -> number of entities of that kind on the map,
+        of one class or of all"""
+        if numpy is not None:
+            on_map = self.__column("rooms") > 0
+            if cls is not None:
+                on_map &= self.__column("classes") == cls
+            counts = numpy.bincount(self.__column("kinds")[on_map], minlength=len(self.kind_names))
+            return {kind: int(count) for kind, count in zip(self.kind_names, counts) if count}
+        counts = {}
+        for i, room in enumerate(self.rooms):
+            if room and (cls is None or self.classes[i] == cls):
+                kind = self.kind_names[self.kinds[i]]
+                counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    """
+     * Bulk updates
+    """
+
+    def __exit_arrays(self):
+        """The exits of the map as CSR arrays, see room_graph"""
+        if self.__exits is None or self.__exits[0] != self.map.version:
+            rooms = self.map.rooms
+            graph = rooms if isinstance(rooms, RoomGraph) else RoomGraph.from_map(self.map)
+            offsets, targets = graph.arrays()[:2]
+            self.__exits = (self.map.version, offsets, targets)
+        return self.__exits[1:]
+
+    def tick(self, rng=random, avoid=()) -> int:
+        """Move every creature on the map through a random exit, like
+        Creature.move: the exits leading to a room in `avoid` (room
+        numbers) are left out first, then one of the others is chosen.
+        A creature with no exit left stays put. Without NumPy the
+        choices are the same as Creature.move's with the same
+        generator. Returns how many moved."""
+        offsets, targets = self.__exit_arrays()
+        avoid = set(avoid)
+        if numpy is None:
+            moved = 0
+            for i, room in enumerate(self.rooms):
+                if room and self.classes[i] in CREATURES:
+                    possible = [
+                        target for target in targets[offsets[room]:offsets[room + 1]]
+                        if target not in avoid
+                    ]
+                    if possible:
+                        self.rooms[i] = rng.choice(possible)
+                        moved += 1
+            self.__by_room = None
+            return moved
+
+        rooms = self.__column("rooms")
+        classes = self.__column("classes")
+        creatures = numpy.flatnonzero((rooms > 0) & ((classes == MONSTER) | (classes == DWARF)))
+        here = rooms[creatures]
+        before, allowed_targets = self.__allowed_exits(offsets, targets, avoid)
+        offsets = numpy.frombuffer(offsets, dtype=offsets.typecode)
+        # The allowed exits of a room are allowed_targets[first:first + degree]
+        first = before[offsets[here]]
+        degree = before[offsets[here + 1]] - first
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        can_move = degree > 0
+        choice = first + (generator.random(len(here)) * degree).astype(numpy.int64)
+        destination = numpy.where(can_move, allowed_targets[numpy.where(can_move, choice, 0)], here)
+        rooms[creatures] = destination
+        self.__by_room = None
+        return int(numpy.count_nonzero(can_move))
+
+    def __allowed_exits(self, offsets, targets, avoid):
+        """For the exits not leading into `avoid`: how many come before
+        every position of `targets`, and their targets. Kept until the
+        exits or `avoid` change."""
+        key = (self.map.version, frozenset(avoid))
+        if self.__allowed is None or self.__allowed[0] != key:
+            targets = numpy.frombuffer(targets, dtype=targets.typecode)
+            allowed = ~numpy.isin(targets, list(avoid))
+            before = numpy.concatenate(([0], numpy.cumsum(allowed)))
+            # One more entry, so that creatures which can't move still
+            # index something
+            allowed_targets = numpy.append(targets[allowed], 0)
+            self.__allowed = (key, before, allowed_targets)
+        return self.__allowed[1:]
+
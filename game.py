@@ -1,12 +1,16 @@
-from itertools import chain
-from random import choice
+from time import perf_counter_ns
 from room import Room
 from command import Command
 from command_parser import Parser
 from objects import *
-from map import Map
+from map import Map, RoomNumbers
+from router import Router
+from random_streams import RandomStream
+from scheduler import CreatureScheduler
+import snapshot
+from output import OutputSink, StreamSink
+from instrumentation import Stats
 from constants import *
-import sys
 
 """
  *  This class is the main class of the "World of Zuul" application. 
@@ -30,43 +34,130 @@ class Game:
     executes the commands that the parser returns.
     """
 
-    item_types = ["food", "herb"]
-    weapon_types = ["sword", "spear"]
-    monster_types = ["goblin", "orc", "wolf"]
-    items: List[Item] = []
-    monsters: List[Monster] = []
-    weapons: List[Weapon] = []
+    item_types = [FOOD_KIND, HERB_KIND]
+    weapon_types = [SWORD_KIND, SPEAR_KIND]
+    monster_types = [GOBLIN_KIND, ORC_KIND, WOLF_KIND]
+    # Everything the player can pick or drop
+    pickable_types = frozenset(item_types + weapon_types)
+    # Command word -> function(game, command), see register_command
+    commands = {}
+    # Commands about the session rather than the game: they don't take
+    # a turn and aren't written to the journal. Saving and loading are
+    # among them, replaying them would touch the files again
+    admin_commands = set()
     magical_transporter_room: Room = None
     last_room: Room = None
     # Key to get to Room # 15
     key = False
 
-    def __init__(self):
-        """Create the game and initialise its internal map."""
+    def __init__(
+        self,
+        map: Map = None,
+        parser: Parser = None,
+        populate: bool = True,
+        output: OutputSink = None,
+        rng: RandomStream = None,
+        spawns: list = None,
+        remote: bool = False,
+    ):
+        """Create the game and initialise its internal map.
+
+        Parameters
+        ----------
+        map: Map
+            An already linked map, e.g. from map_generator. The default
+            dungeon is used if it is not given.
+        parser: Parser
+            Where the commands come from. Defaults to the terminal.
+        populate: bool
+            Place the items, weapons, monsters and the Dwarf. Only
+            turned off when the objects are restored from a snapshot,
+            which then binds the map to the game itself (see Map.bind).
+        output: OutputSink
+            Where the text of the game goes. Defaults to the terminal.
+        rng: RandomStream or int
+            The random generator of the game, or its seed. The same
+            seed and commands always give the same game.
+        spawns: list
+            The world_file.Spawns to place instead of the objects of
+            the constants, e.g. from a world file.
+        remote: bool
+            The game is played over the network (see server.py). The
+            admin commands, which read and write the host's files, are
+            left out of its commands.
+        """
+        self.output = output or StreamSink()
+        if remote:
+            # A command table of its own, without the admin commands
+            self.commands = {
+                word: handler for word, handler in self.commands.items()
+                if word not in self.admin_commands
+            }
+        self.rng = rng if isinstance(rng, RandomStream) else RandomStream(rng)
+        # Every game has its own objects, so several games
+        # can be played in the same process
+        self.items: List[Item] = []
+        self.monsters: List[Monster] = []
+        self.weapons: List[Weapon] = []
+        # How the game ended: "win", "death" or "quit".
+        # None while the game is still going on
+        self.outcome = None
+        self.dwarf = None
+        # Turns played so far. The creatures move between turns
+        self.turn = 0
         # Rooms must be created first; then place items etc.
         self.player = Player(PLAYER_HP)
-        self.create_rooms()
-        self.place_items()
-        self.place_weapons()
-        self.place_monsters()
-        self.place_dwarf()
-        self.__parser = Parser()
-
-    def create_rooms(self):
+        self.create_rooms(map)
+        # Creatures stay out of the exit and the transporter room
+        self.scheduler = CreatureScheduler(
+            self.map,
+            CREATURE_MOVE_INTERVAL,
+            CREATURE_WAKE_DISTANCE,
+            CREATURE_SLEEP_FACTOR,
+            avoid=[self.exit_room, self.magical_transporter_room],
+            rng=self.rng,
+        )
+        if populate:
+            self.map.bind(self)
+            if spawns is not None:
+                self.place_spawns(spawns)
+            else:
+                self.place_items()
+                self.place_weapons()
+                self.place_monsters()
+                self.place_dwarf()
+            self.map.entered(self)
+        self.__parser = parser or Parser()
+        self.__router = None
+        # A journal.Journal recording every command, if any
+        self.journal = None
+        # An instrumentation.Stats, only while statistics are on
+        self.stats = None
+
+    def create_rooms(self, map: Map = None):
         """Create all the rooms and link their exits together."""
         # create the map
-        self.map = Map()
-        self.map.link_exits()
+        if map is None:
+            map = Map()
+            map.link_exits()
+        self.map = map
 
-        # Set magic transporter room to Room # 3
-        self.magical_transporter_room = self.map[3]
+        # Set magic transporter room (Room # 3 in the default dungeon)
+        self.magical_transporter_room = self.map[self.map.transporter_room]
 
-        # Set exit room to Room # 15
-        self.exit_room = self.map[15]
+        # Set exit room (Room # 15 in the default dungeon)
+        self.exit_room = self.map[self.map.exit_room]
 
         # We can use key value pairs in Map which should return Room object
         # Current room is start_room
-        self.__current_room = self.map[START_ROOM]
+        self.__current_room = self.map[self.map.start_room]
+        self.player.change_room(self.__current_room)
+
+        # Numbers of the rooms where objects can be placed or the
+        # player can be transported to. Not a list, so that a game
+        # starts as fast on a huge map as on a small one
+        special_rooms = (self.map.start_room, self.map.exit_room, self.map.transporter_room)
+        self.__random_room_numbers = RoomNumbers(len(self.map), special_rooms)
 
     def place_items(self):
         """Randomly place items on the map"""
@@ -74,14 +165,22 @@ class Game:
         for i in range(FOOD_ITEMS):
             room = self.get_random_room()  # random Room
             item = Item(
-                f"Food # {i+1}", FOOD_DESCRIPTION, room, choice(range(20, 110, 10))
+                f"Food # {i+1}",
+                FOOD_DESCRIPTION,
+                room,
+                self.rng.choice(range(20, 110, 10)),
+                FOOD_KIND,
             )
             self.items.append(item)
 
         for i in range(NUM_OF_HERBS):
             room = self.get_random_room()  # random Room
             item = Item(
-                f"Herb # {i+1}", HERBS_DESCRIPTION, room, choice(range(20, 110, 10))
+                f"Herb # {i+1}",
+                HERBS_DESCRIPTION,
+                room,
+                self.rng.choice(range(20, 110, 10)),
+                HERB_KIND,
             )
             self.items.append(item)
 
@@ -90,13 +189,14 @@ class Game:
         for i in range(SWORD):
             room = self.get_random_room()  # random Room
             if i == 0:
-                room = self.map[1]  # Start Room
+                room = self.map[self.map.start_room]  # Start Room
             weapon = Weapon(
                 f"Sword # {i+1}",
                 WEAPON_DESCRIPTION,
                 room,
-                choice(range(20, 110, 10)),
+                self.rng.choice(range(20, 110, 10)),
                 SWORD_HP,
+                SWORD_KIND,
             )
             self.weapons.append(weapon)
 
@@ -106,100 +206,191 @@ class Game:
                 f"Spear # {i+1}",
                 WEAPON_DESCRIPTION,
                 room,
-                choice(range(20, 110, 10)),
+                self.rng.choice(range(20, 110, 10)),
                 SPEAR_HP,
+                SPEAR_KIND,
             )
             self.weapons.append(weapon)
 
     def place_dwarf(self):
         """Randomly place dwarf on the map"""
         room = self.get_random_room()  # random Room
-        self.dwarf = Dwarf(f"Dwarf", DWARF_DESCRIPTION, room)
+        self.dwarf = Dwarf(f"Dwarf", DWARF_DESCRIPTION, room, DWARF_KIND)
+        self.schedule(self.dwarf)
 
     def place_monsters(self):
         """Randomly place monsters on the map"""
 
         for i in range(GOBLINS):
             room = self.get_random_room()  # random Room
-            monster = Monster(f"Goblin # {i+1}", MONSTER_DESCRIPTION, room, GOBLIN_HP)
+            monster = Monster(
+                f"Goblin # {i+1}", MONSTER_DESCRIPTION, room, GOBLIN_HP, GOBLIN_KIND
+            )
             self.monsters.append(monster)
+            self.schedule(monster)
 
         for i in range(ORCS):
             room = self.get_random_room()  # random Room
-            monster = Monster(f"Orc # {i+1}", MONSTER_DESCRIPTION, room, ORC_HP)
+            monster = Monster(
+                f"Orc # {i+1}", MONSTER_DESCRIPTION, room, ORC_HP, ORC_KIND
+            )
             self.monsters.append(monster)
+            self.schedule(monster)
 
         for i in range(WOLVES):
             room = self.get_random_room()  # random Room
-            monster = Monster(f"Wolf # {i+1}", MONSTER_DESCRIPTION, room, WOLF_HP)
+            monster = Monster(
+                f"Wolf # {i+1}", MONSTER_DESCRIPTION, room, WOLF_HP, WOLF_KIND
+            )
             self.monsters.append(monster)
+            self.schedule(monster)
+
+    def place_spawns(self, spawns: list):
+        """Place the objects of world_file.Spawns on the map. The
+        default spawns give the same game as place_items etc."""
+        for spawn in spawns:
+            for i in range(spawn.count):
+                room = self.get_random_room()  # random Room
+                if i < len(spawn.at):
+                    room = self.map[spawn.at[i]]
+                name = spawn.name(i)
+                if spawn.object_class == "item":
+                    weight = self.rng.choice(spawn.weights)
+                    self.items.append(Item(name, spawn.description, room, weight, spawn.kind))
+                elif spawn.object_class == "weapon":
+                    weight = self.rng.choice(spawn.weights)
+                    self.weapons.append(
+                        Weapon(name, spawn.description, room, weight, spawn.hp, spawn.kind)
+                    )
+                elif spawn.object_class == "monster":
+                    monster = Monster(name, spawn.description, room, spawn.hp, spawn.kind)
+                    self.monsters.append(monster)
+                    self.schedule(monster)
+                else:
+                    self.dwarf = Dwarf(name, spawn.description, room, spawn.kind)
+                    self.schedule(self.dwarf)
 
-    def print_objects_in_current_room(self):
-        objects = self.get_objects_in_room(self.__current_room)
-        print("This room has following objects:\n")
-        print("Items:", ", ".join([str(item) for item in objects["Items"]]))
-        print("Weapons:", ", ".join([str(weapon) for weapon in objects["Weapons"]]))
-        print("Monsters:", ", ".join([str(monster) for monster in objects["Monsters"]]))
+    def schedule(self, creature: Creature):
+        """Let a creature move around the map, unless the creatures
+        are kept still (CREATURE_MOVE_INTERVAL is 0)"""
+        if CREATURE_MOVE_INTERVAL > 0:
+            self.scheduler.add(creature)
+
+    def tick(self):
+        """Let a turn pass: the creatures that are due move"""
+        self.turn += 1
+        with self.map.passing():
+            self.scheduler.tick(self.__current_room)
 
-        if self.dwarf and (self.dwarf.get_room() == self.__current_room):
-            print("The Dwarf")
+    def print_objects_in_current_room(self):
+        # The listing is only built again when the room has changed
+        self.print(self.__current_room.cached("listing", self.list_objects), end="")
+
+    def list_objects(self, room: Room) -> str:
+        """Returns the text listing the objects lying in a room"""
+        objects = self.get_objects_in_room(room)
+        lines = [
+            "This room has following objects:\n",
+            "Items: " + ", ".join([str(item) for item in objects["Items"]]),
+            "Weapons: " + ", ".join([str(weapon) for weapon in objects["Weapons"]]),
+            "Monsters: " + ", ".join([str(monster) for monster in objects["Monsters"]]),
+        ]
+        if any(isinstance(obj, Dwarf) for obj in room.objects):
+            lines.append("The Dwarf")
+        return "\n".join(lines) + "\n"
 
     def print_welcome(self):
         """Print out the opening message for the player"""
-        print()
-        print("Welcome to the World of Zuul!")
-        print("World of Zuul is a new, incredibly boring adventure game.")
-        print("Type 'help' if you need help.")
-        print()
-        print(self.__current_room.get_long_description())
+        self.print()
+        self.print("Welcome to the World of Zuul!")
+        self.print("World of Zuul is a new, incredibly boring adventure game.")
+        self.print("Type 'help' if you need help.")
+        self.print()
+        self.print(self.__current_room.get_long_description())
+        self.output.flush()
 
     def process_command(self, command: Command):
         """Given a command, process (that is: execute) the command.
         Returns true If the command ends the game, false otherwise.
         """
-        want_to_quit = False
+        if (
+            self.journal is None
+            or command.is_unknown()
+            or command.get_command_word() in self.admin_commands
+        ):
+            finished = self.execute_command(command)
+        else:
+            # Write the command to the journal, with the random state
+            # it started from, so the game can be replayed later
+            rng_state = self.rng.getstate()
+            finished = self.execute_command(command)
+            self.journal.append(self, command, rng_state)
+        # All the output of the command is written at once
+        self.output.flush()
+        return finished
+
+    @classmethod
+    def register_command(cls, command_word, handler, admin=False):
+        """Set what a command does. Its words are known to the parser
+        through CommandWords.register.
+
+        Parameters
+        ----------
+        command_word: string
+            The command word, e.g. "go"
+        handler: function
+            Called with the game and the Command when the command is given
+        admin: bool
+            The command is about the session, see admin_commands
+        """
+        cls.commands[command_word] = handler
+        if admin:
+            cls.admin_commands.add(command_word)
 
+    def print(self, *values, sep=" ", end="\n"):
+        """Like the built-in print, but writes to the game's output"""
+        self.output.write(sep.join([str(value) for value in values]) + end)
+
+    def execute_command(self, command: Command):
+        """Execute a command, see process_command"""
         if command.is_unknown():
-            print("I don't know what you mean...")
+            self.print("I don't know what you mean...")
             return False
 
         command_word = command.get_command_word()
-        if command_word == "help":
-            self.print_help()
-        elif command_word == "go":
-            self.go_room(command)
-        elif command_word == "quit":
-            want_to_quit = self.quit(command)
-        elif command_word == "give":
-            self.give_item(command)
-        elif command_word == "pick":
-            self.pick_item(command)
-        elif command_word == "drop":
-            self.drop_item(command)
-        elif command_word == "back":
-            self.go_back()
-        elif command_word == "fight":
-            self.fight()
-        elif command_word == "status":
-            self.status()
-
-        return want_to_quit
+        handler = self.commands.get(command_word)
+        if handler is None:
+            # A word this game leaves out, see remote
+            self.print("I don't know what you mean...")
+            return False
+        elif self.stats is None:
+            handler(self, command)
+        else:
+            start = perf_counter_ns()
+            handler(self, command)
+            self.stats.record_command(command_word, perf_counter_ns() - start)
+        if self.outcome is None and command_word not in self.admin_commands:
+            self.tick()
+
+        # Quitting, winning or dying ends the game
+        return self.outcome is not None
 
     # implementations of user commands:
 
     def print_help(self):
         """Print out some help information."""
-        print("|\tYou are alone. You wander")
-        print("|\taround at the Dungeon trying to find an exit.")
-        print("|\tIn order to win, you need to get the key from ")
-        print("|\tthe Dwarf and get to the exit room safely.")
-        print("|\tThe Dwarf is blind, he needs some food to eat")
-        print("|\tand herbs to cure his eyes.")
-        print("|\tIf you happen to fight with a monster who is")
-        print("|\tstronger than you. You'll lose.")
-        print()
-        print("Your command words are:")
-        self.__parser.show_commands()
+        self.print("|\tYou are alone. You wander")
+        self.print("|\taround at the Dungeon trying to find an exit.")
+        self.print("|\tIn order to win, you need to get the key from ")
+        self.print("|\tthe Dwarf and get to the exit room safely.")
+        self.print("|\tThe Dwarf is blind, he needs some food to eat")
+        self.print("|\tand herbs to cure his eyes.")
+        self.print("|\tIf you happen to fight with a monster who is")
+        self.print("|\tstronger than you. You'll lose.")
+        self.print()
+        self.print("Your command words are:")
+        # Each command is followed by a comma, all on the same line
+        self.print("".join([word + ", " for word in self.commands]))
 
     """
      * Try to in to one direction. If there is an exit, enter the new
@@ -212,11 +403,14 @@ class Game:
         """
         if command.has_second_word() == False:
             # if there is no second word, we don't know where to go...
-            print("Go where?")
+            self.print("Go where?")
             return
 
-        direction = command.get_second_word()
+        self.go(command.get_second_word())
 
+    def go(self, direction) -> bool:
+        """Try to go in one direction.
+        Returns True if the player left the current room."""
         # Try to leave current room.
         next_room = self.__current_room.get_exit(direction)
 
@@ -224,62 +418,120 @@ class Game:
         if next_room == self.exit_room:
             if self.key:
                 # You win
-                print("\nFinally! You have found the exit. You win!")
-                print("Thank you for playing. Good bye.\n")
-                sys.exit()
+                self.print("\nFinally! You have found the exit. You win!")
+                self.print("Thank you for playing. Good bye.\n")
+                self.outcome = "win"
+                return True
             else:
-                print("|\tYou need a Key to exit out of the Dungeon.")
-                print("|\tCome back again.")
+                self.print("|\tYou need a Key to exit out of the Dungeon.")
+                self.print("|\tCome back again.")
 
         monsters = self.get_monsters_in_room()
         if monsters:
-            print("\nOops! You can't go anywhere, there is a monster in your room.")
-            print("You must defeat the monster to pass through.")
-            print("Or use 'back' command to go back to the room you came from.\n")
-        else:
-            self.go_next_room(next_room)
+            self.print("\nOops! You can't go anywhere, there is a monster in your room.")
+            self.print("You must defeat the monster to pass through.")
+            self.print("Or use 'back' command to go back to the room you came from.\n")
+            return False
+        self.go_next_room(next_room)
+        return next_room is not None
+
+    def goto_room(self, command: Command):
+        """Walk the shortest route to the room with the given number"""
+        if command.has_second_word() == False:
+            self.print("Goto which room?")
+            return
+        try:
+            number = int(command.get_second_word().lstrip("#"))
+        except ValueError:
+            self.print("Give the number of the room, e.g. 'goto 12'")
+            return
+        if number not in self.map:
+            self.print(f"There is no Room # {number}")
+            return
+        self.goto(number)
+
+    def goto(self, number: int) -> bool:
+        """Walk the shortest route from the current room to the room
+        with the given number, one room at a time, like repeated 'go'
+        commands: a turn passes after every room but the last, whose
+        turn is the one of the command. The magical transporter room is
+        never entered. Stops early when a monster blocks the way or the
+        game ends.
+
+        Returns True if the player got to the room.
+        """
+        route = self.router.route(self.map.number_of(self.__current_room), number)
+        if route is None:
+            self.print(f"There is no way to Room # {number}.")
+            return False
+        for hop, direction in enumerate(route):
+            if hop:
+                self.tick()
+            if not self.go(direction) or self.outcome is not None:
+                return False
+        return True
+
+    @property
+    def router(self) -> Router:
+        """The Router of the map, created on first use"""
+        if self.__router is None:
+            self.__router = Router(self.map, avoid=[self.map.transporter_room])
+        return self.__router
 
     def go_next_room(self, next_room):
         if (
             next_room == None
         ):  # None is a special Python value that says the variable contains nothing
-            print("There is no door!")
+            self.print("There is no door!")
         else:
             if next_room == self.magical_transporter_room:
                 next_room = self.get_random_room()
                 # Remove track of last room, because player was transported
                 self.last_room = None
                 # Tell the player that he was transported through magic
-                print("------------------------------")
-                print("You entered into the Magical Room.")
-                print("Now you are being transported to a random room....")
+                self.print("------------------------------")
+                self.print("You entered into the Magical Room.")
+                self.print("Now you are being transported to a random room....")
             else:
                 self.last_room = self.__current_room
             self.__current_room = next_room
             # Update the rooms of player and items
             self.player.change_room(next_room)
+            self.map.entered(self)
 
-            print()
-            print(self.__current_room.get_long_description())
+            self.print()
+            self.print(self.__current_room.get_long_description())
             self.print_objects_in_current_room()
 
     def get_objects_in_room(self, room: Room) -> dict:
-        """It will return all the objects in the current room"""
+        """It will return all the objects in the current room.
+        Every room keeps an index of the objects lying in it, so this
+        only looks at the room's own contents, and only when they
+        changed since the last call. The lists must not be modified."""
+        return room.cached("objects", self.sort_objects)
+
+    def sort_objects(self, room: Room) -> dict:
+        """Sorts the objects of a room into monsters, weapons and items"""
         objects = {"Monsters": [], "Weapons": [], "Items": []}
-        for item in self.items:
-            if item.get_room() is room:
-                objects["Items"].append(item)
-
-        for monster in self.monsters:
-            if monster.get_room() is room:
-                objects["Monsters"].append(monster)
-
-        for weapon in self.weapons:
-            if weapon.get_room() is room:
-                objects["Weapons"].append(weapon)
+        if self.stats is not None:
+            self.stats.count("room_scans")
+            self.stats.count("objects_examined", len(room.objects))
+        for obj in room.objects:
+            # Weapon is a subclass of Item, so check it first
+            if isinstance(obj, Weapon):
+                objects["Weapons"].append(obj)
+            elif isinstance(obj, Item):
+                objects["Items"].append(obj)
+            elif isinstance(obj, Monster):
+                objects["Monsters"].append(obj)
 
         return objects
 
+    def quit_game(self, command: Command):
+        """End the game if the player really wants to quit"""
+        if self.quit(command):
+            self.outcome = "quit"
+
     def quit(self, command: Command):
         """ "Quit" was entered. Check the rest of the command to see whether we really quit the game.
 
@@ -291,19 +543,24 @@ class Game:
         Returns true, if this command quits the game, false otherwise.
         """
         if command.has_second_word():
-            print("Quit what?")
+            self.print("Quit what?")
             return False
         else:
             return True  # signal that we want to quit
 
+    @property
+    def current_room(self) -> Room:
+        return self.__current_room
+
+    @current_room.setter
+    def current_room(self, room: Room):
+        self.__current_room = room
+        self.player.change_room(room)
+
     def get_random_room(self):
-        """Returns a random room from the Map"""
-        rooms = [
-            v
-            for k, v in self.map.rooms.items()
-            if k not in [START_ROOM, EXIT_ROOM, self.magical_transporter_room]
-        ]
-        return choice(rooms)
+        """Returns a random room from the Map, other than the start,
+        exit and magical transporter rooms"""
+        return self.map[self.rng.choice(self.__random_room_numbers)]
 
     def play(self):
         """Main play routine.  Loops until end of play"""
@@ -312,18 +569,23 @@ class Game:
         while finished == False:
             # Display all objects in current room
             command = self.__parser.get_command()
+            if command is None:
+                # No more input
+                break
             finished = self.process_command(command)
-        print("Thank you for playing.  Good bye.")
+        if self.outcome == "quit":
+            self.print("Thank you for playing.  Good bye.")
+        self.output.flush()
 
     def give_item(self, command: Command):
         if command.has_second_word() == False:
             # if there is no second word, we don't know give to whom...
-            print("Give to whom?")
+            self.print("Give to whom?")
             return
 
         if command.has_third_word() == False:
             # if there is no third word, we don't know what to give...
-            print("Give what?")
+            self.print("Give what?")
             return
 
         creature_name: str = command.get_second_word()
@@ -336,26 +598,26 @@ class Game:
                 # There are monsters in this room as well
                 # You can't save the creature unless you defeat
                 # the monsters
-                print(f"Defeat the monsters in this room to trade with {self.dwarf}")
+                self.print(f"Defeat the monsters in this room to trade with {self.dwarf}")
             else:
                 # Give item to Dwarf
-                if creature_name == "dwarf":
+                if creature_name == DWARF_KIND:
                     self.give_item_to_dwarf(item)
                 else:
-                    print(f"{creature_name} is not in the room.")
+                    self.print(f"{creature_name} is not in the room.")
         else:
-            print("There is no Dwarf in this room.")
+            self.print("There is no Dwarf in this room.")
 
     def pick_item(self, command: Command):
         """A player can pick items from a room upto a certain weight.
         Item can either be food, herb"""
         if command.has_second_word() == False:
             # if there is no second word, we don't know what to pick...
-            print("pick what?")
+            self.print("pick what?")
             return
         item_name = command.get_second_word()  # herb, food
-        if item_name not in self.item_types + self.weapon_types:
-            print("Item doesn't exist")
+        if item_name not in self.pickable_types:
+            self.print("Item doesn't exist")
             return
 
         if item_name in self.weapon_types:
@@ -365,54 +627,52 @@ class Game:
         # Valid item
         items = self.get_items_in_room()
         for item in items:
-            if item.get_name().lower().split()[0] == item_name:
+            if item.kind == item_name:
                 # Item exists in current room
                 monsters = self.get_monsters_in_room()
                 if monsters:
-                    print("You have to defeat the monster to pick the item.")
+                    self.print("You have to defeat the monster to pick the item.")
                     return
                 else:
                     if item.weight > self.player.weight_of_items_left:
-                        print(f"|\tYou cannot pick {item}.")
-                        print(
+                        self.print(f"|\tYou cannot pick {item}.")
+                        self.print(
                             f"|\tYou can only pick an item under {self.player.weight_of_items_left} pounds."
                         )
-                        print()
+                        self.print()
                         return
                     # Pick item
                     self.player.pick_item(item)
                     # Remove item from map
                     self.items.remove(item)
-                    print(f"{item} picked")
+                    self.print(f"{item} picked")
 
     def drop_item(self, command: Command):
         """A player can drop items from his inventory to save some space
         for other items. Item can either be food or herb"""
         if command.has_second_word() == False:
             # if there is no second word, we don't know what to drop...
-            print("drop what?")
+            self.print("drop what?")
             return
         item_name = command.get_second_word()  # herb, food
-        if item_name not in self.item_types + self.weapon_types:
-            print("Item doesn't exist")
+        if item_name not in self.pickable_types:
+            self.print("Item doesn't exist")
             return
 
-        for item in chain(self.player.inventory, self.player.weapons):
-            if item.get_name().lower().split()[0] == item_name:
-                if item_name in self.item_types:
-                    self.player.drop_item(item)
-                    print(f"{item} was dropped.")
-                    # Add the weapon back to the map
-                    self.items.append(item)
-                elif item_name in self.weapon_types:
-                    self.player.drop_weapon(item)
-                    print(f"{item} was dropped.")
-                    # Add the weapon back to the map
-                    self.weapons.append(item)
-                else:
-                    print("Invalid item.")
-                # Break so that only one item can be dropped at a time
-                break
+        # Only one item is dropped at a time
+        item = self.player.get(item_name)
+        if item is None:
+            return
+        if item_name in self.item_types:
+            self.player.drop_item(item)
+            self.print(f"{item} was dropped.")
+            # Add the item back to the map
+            self.items.append(item)
+        else:
+            self.player.drop_weapon(item)
+            self.print(f"{item} was dropped.")
+            # Add the weapon back to the map
+            self.weapons.append(item)
 
     def pick_weapon(self, weapon_name):
         """A player can pick weapons from a room upto a certain weight.
@@ -420,33 +680,33 @@ class Game:
         # Valid weapon
         weapons = self.get_weapons_in_room()
         for weapon in weapons:
-            if weapon.get_name().lower().split()[0] == weapon_name:
+            if weapon.kind == weapon_name:
                 # Weapon exists in current room
                 monsters = self.get_monsters_in_room()
                 if monsters:
-                    print("You have to defeat the monster to pick the weapon.")
+                    self.print("You have to defeat the monster to pick the weapon.")
                     return
                 else:
                     if weapon.weight > self.player.weight_of_items_left:
-                        print(
+                        self.print(
                             f"|\tYou cannot pick {weapon}. It's weight is {weapon.weight} pounds."
                         )
-                        print(
+                        self.print(
                             f"|\tYou can only pick an weapon under {self.player.weight_of_items_left} pounds."
                         )
-                        print()
+                        self.print()
                         return
                     # Pick weapon
                     self.player.pick_weapon(weapon)
                     # Remove weapon from map
                     self.weapons.remove(weapon)
-                    print(f"{weapon} picked")
+                    self.print(f"{weapon} picked")
 
     def go_back(self):
         if self.last_room:
             self.go_next_room(self.last_room)
         else:
-            print("You can't go back because you were transported here.")
+            self.print("You can't go back because you were transported here.")
 
     def get_monsters_in_room(self, room=None):
         if not room:
@@ -473,70 +733,170 @@ class Game:
         if monsters:
             # There are monsters in current room
             dead_monsters = []
+            stats = self.stats
             for monster in monsters:
-                print()
-                print(f"Let's fight with the {monster}")
-                print("Bam Bam Bam!")
+                self.print()
+                self.print(f"Let's fight with the {monster}")
+                self.print("Bam Bam Bam!")
+                if stats is not None:
+                    stats.count("fights")
+                    monster_hp, weapons = monster.hp, len(self.player.weapons)
                 try:
                     monster_died = self.player.fight(monster)
                 except PlayerWeakerThanMonsterException as e:
                     # Print error description, user died against monster
-                    print(e)
-                    # Exit the program, game ended
-                    sys.exit()
+                    self.print(e)
+                    if stats is not None:
+                        stats.count("player_deaths")
+                    # Game ended
+                    self.outcome = "death"
+                    return
+                if stats is not None:
+                    stats.count("damage_dealt", monster_hp - max(monster.hp, 0))
+                    stats.count("weapons_broken", weapons - len(self.player.weapons))
+                    stats.count("monsters_killed", monster_died)
                 if monster_died:
                     dead_monsters.append(monster)
-                    print(f"You just defeated {monster}. Yay!")
-                    print()
+                    self.print(f"You just defeated {monster}. Yay!")
+                    self.print()
 
             # Remove dead monster from the map/game
             for dead_monster in dead_monsters:
                 self.monsters.remove(dead_monster)
+                dead_monster.change_room(None)
         else:
             # There is no monster in current room
-            print("There is no monster in the room!")
+            self.print("There is no monster in the room!")
 
     def give_item_to_dwarf(self, item):
         """Dwarf need either herbs or food"""
-        if item == "herb":
+        if item == HERB_KIND:
             herb = self.player.get_herb()
             if herb:
-                print("Giving herb to Dwarf")
+                self.print("Giving herb to Dwarf")
                 self.player.remove_herb(herb)
                 # In return Dwarf gives you the key
                 self.key = True
+                self.dwarf.change_room(None)
                 self.dwarf = None
-                print("Cool! Now you have the key of the exit.")
-                print("Dwarf goes away....")
+                self.print("Cool! Now you have the key of the exit.")
+                self.print("Dwarf goes away....")
             else:
-                print(f"You don't have herb to give to {self.dwarf}.")
-        elif item == "food":
+                self.print(f"You don't have herb to give to {self.dwarf}.")
+        elif item == FOOD_KIND:
             food = self.player.get_food()
             if food:
-                print("Giving food to Dwarf")
+                self.print("Giving food to Dwarf")
                 self.player.remove_food(food)
                 # In return Dwarf gives you the key
                 self.key = True
+                self.dwarf.change_room(None)
                 self.dwarf = None
-                print("Cool! Now you have the key of the exit.")
-                print("Dwarf goes away....")
+                self.print("Cool! Now you have the key of the exit.")
+                self.print("Dwarf goes away....")
             else:
-                print(f"You don't have food to give to {self.dwarf}.")
+                self.print(f"You don't have food to give to {self.dwarf}.")
+        else:
+            self.print("Invalid item. Item can be either food or herb")
+
+    def save_game(self, command: Command):
+        """Save the game to the file named by the second word"""
+        if command.has_second_word() == False:
+            self.print("Save to which file?")
+            return
+        try:
+            snapshot.save(self, command.get_second_word())
+        except OSError as e:
+            self.print(f"Could not save the game: {e}")
+            return
+        self.print("Game saved.")
+
+    def load_game(self, command: Command):
+        """Replace the game with the one saved in the file named by the
+        second word"""
+        if command.has_second_word() == False:
+            self.print("Load which file?")
+            return
+        try:
+            game = snapshot.load(command.get_second_word(), self.__parser)
+        except (OSError, snapshot.SnapshotError) as e:
+            self.print(f"Could not load the game: {e}")
+            return
+        # Take over the whole state of the loaded game, but keep
+        # writing to the same output, journal and statistics, and
+        # drawing from the same random generator
+        game.output = self.output
+        game.journal = self.journal
+        game.stats = self.stats
+        game.rng = game.scheduler.rng = self.rng
+        self.__dict__.update(game.__dict__)
+        # A map streamed by regions must evict from this game's lists
+        self.map.bind(self)
+        if self.journal is not None:
+            # The load isn't replayed, so recovery must start from here
+            self.journal.checkpoint(self)
+        self.print("Game loaded.")
+        self.print(self.__current_room.get_long_description())
+
+    def show_stats(self, command: Command):
+        """Statistics of the session: "stats on", "stats off",
+        "stats reset", "stats export <file>" or just "stats" to see them"""
+        action = command.get_second_word()
+        if action == "on":
+            if self.stats is None:
+                self.stats = Stats()
+            self.print("Statistics are on.")
+        elif action == "off":
+            self.stats = None
+            self.print("Statistics are off.")
+        elif self.stats is None:
+            self.print("Statistics are off. Type 'stats on' to collect them.")
+        elif action == "reset":
+            self.stats.reset()
+            self.print("Statistics reset.")
+        elif action == "export":
+            if command.has_third_word() == False:
+                self.print("Export to which file?")
+                return
+            try:
+                with open(command.get_third_word(), "a") as file:
+                    self.stats.export(file, turn=self.turn)
+            except OSError as e:
+                self.print(f"Could not export the statistics: {e}")
+                return
+            self.print("Statistics exported.")
         else:
-            print("Invalid item. Item can be either food or herb")
+            for line in self.stats.report():
+                self.print(line)
 
     def status(self):
         """This function will print the status of the player"""
-        print(
+        self.print(
             f"You can pick items upto weight {self.player.weight_of_items_left} pounds"
         )
-        print(f"- Health: {self.player.hp}")
-        print("- Inventory:")
+        self.print(f"- Health: {self.player.hp}")
+        self.print("- Inventory:")
         for item in self.player.inventory:
-            print(item)
-        print("- Weapons:")
+            self.print(item)
+        self.print("- Weapons:")
         for weapon in self.player.weapons:
-            print(weapon, end=" HP: ")
-            print(weapon.hp)
+            self.print(weapon, end=" HP: ")
+            self.print(weapon.hp)
         if self.key:
-            print("- The Key")
+            self.print("- The Key")
+
+
+# What the command words of CommandWords do
+Game.register_command("go", Game.go_room)
+Game.register_command("goto", Game.goto_room)
+Game.register_command("quit", Game.quit_game)
+Game.register_command("help", lambda game, command: game.print_help())
+Game.register_command("pick", Game.pick_item)
+Game.register_command("drop", Game.drop_item)
+Game.register_command("back", lambda game, command: game.go_back())
+Game.register_command("give", Game.give_item)
+Game.register_command("fight", lambda game, command: game.fight())
+Game.register_command("status", lambda game, command: game.status())
+Game.register_command("save", Game.save_game, admin=True)
+Game.register_command("load", Game.load_game, admin=True)
+Game.register_command("stats", Game.show_stats, admin=True)
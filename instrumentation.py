@@ -0,0 +1,133 @@
+"""
+Opt-in statistics of a running game.
+
+Nothing is recorded unless the game has a Stats object:
+
+    game.stats = Stats()
+
+Then every command's latency goes into a histogram of its verb, and
+counters keep track of room scans, objects examined and fights. A game
+without Stats only pays for one `is None` check per command and per
+room scan.
+
+The `stats` command shows the figures in the game. `Stats.export`
+appends a snapshot to a JSON lines file for offline analysis.
+print_peak_memory reports the peak memory of the command line tools.
+"""
+import json
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Names of the counters, in the order they are shown
+COUNTERS = (
+    "room_scans", "objects_examined",
+    "fights", "monsters_killed", "weapons_broken", "player_deaths", "damage_dealt",
+)
+
+
+class Histogram:
+    """Latencies in buckets of powers of two nanoseconds"""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, nanoseconds: int):
+        self.buckets[min(nanoseconds.bit_length(), 63)] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction: float) -> int:
+        """Returns the upper bound of the bucket holding the given
+        fraction of the latencies, in nanoseconds"""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ns": self.total // self.count if self.count else 0,
+            "p50_ns": self.percentile(0.5),
+            "p99_ns": self.percentile(0.99),
+            "max_ns": self.max,
+            # Only the buckets in use, by their upper bound
+            "buckets": {1 << bucket: count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Stats:
+    """Latency histograms per verb and counters of one game"""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        self.started = time.time()
+        self.latencies = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def record_command(self, verb: str, nanoseconds: int):
+        histogram = self.latencies.get(verb)
+        if histogram is None:
+            histogram = self.latencies[verb] = Histogram()
+        histogram.add(nanoseconds)
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+
+    def snapshot(self) -> dict:
+        """Returns everything recorded as plain data"""
+        return {
+            "time": time.time(),
+            "started": self.started,
+            "commands": {verb: histogram.snapshot() for verb, histogram in self.latencies.items()},
+            "counters": dict(self.counters),
+        }
+
+    def export(self, file, **extra):
+        """Append a snapshot to a JSON lines file object, with any
+        extra fields, e.g. the turn"""
+        snapshot = self.snapshot()
+        snapshot.update(extra)
+        file.write(json.dumps(snapshot) + "\n")
+
+    def report(self) -> list:
+        """Returns the lines of a readable summary"""
+        lines = [f"{'command':<10} {'count':>7} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for verb, histogram in sorted(self.latencies.items()):
+            figures = histogram.snapshot()
+            lines.append(
+                f"{verb:<10} {figures['count']:>7} "
+                + " ".join(f"{figures[key] / 1000:>9.1f}" for key in ("mean_ns", "p50_ns", "p99_ns", "max_ns"))
+            )
+        lines.extend(f"{name}: {self.counters[name]}" for name in COUNTERS)
+        return lines
+
+
+def print_peak_memory():
+    """Print the peak memory of the process: the traced peak if
+    tracemalloc is tracing, which is then stopped, otherwise the peak
+    resident memory where the platform reports it"""
+    if tracemalloc.is_tracing():
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak traced memory: {peak / 2**20:.1f} MiB")
+    elif resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"peak resident memory: {peak / 2**10:.1f} MiB")
@@ -0,0 +1,215 @@
+"""
+Append-only journal of the commands of a game, with checkpoints.
+
+Every command the game accepts is appended to the journal together
+with the state of the game's random generator it started from, when
+the command used it. Every `checkpoint_every` commands a snapshot of the
+whole game is written next to the journal. A game is recovered from
+the newest checkpoint by replaying only the commands written after it,
+so recovery time doesn't depend on the length of the session.
+
+Records are collected in memory and written `batch_size` at a time.
+`fsync_every` sets how many written batches go by before the file is
+forced to disk (0 never forces it).
+
+    game = Game()
+    game.journal = Journal("session.journal", game)
+    game.play()
+
+    game, journal = Journal.recover("session.journal")
+
+Journal record (little endian): turn (u32), length of the command
+line (u16), length of the random state (u16), the command line, and
+the random state (see encode_rng_state) or nothing.
+"""
+import glob
+import io
+import os
+import struct
+from array import array
+
+import snapshot
+from command import Command
+from command_parser import Parser
+from output import NullSink
+
+RECORD = struct.Struct("<IHH")
+CHECKPOINT = struct.Struct("<IQH")
+
+_parser = Parser()
+
+
+def encode_rng_state(state) -> bytes:
+    """Pack the state returned by random.getstate()"""
+    version, internal, gauss_next = state
+    return struct.pack(
+        "<BBd", version, gauss_next is not None, gauss_next or 0.0
+    ) + array("I", internal).tobytes()
+
+
+def decode_rng_state(data: bytes):
+    """Unpack the bytes written by encode_rng_state"""
+    version, has_gauss, gauss_next = struct.unpack_from("<BBd", data)
+    internal = array("I")
+    internal.frombytes(data[struct.calcsize("<BBd"):])
+    return version, tuple(internal), gauss_next if has_gauss else None
+
+
+def command_line(command: Command) -> str:
+    """Returns the line of text a command was parsed from"""
+    words = (
+        command.get_command_word(), command.get_second_word(), command.get_third_word()
+    )
+    return " ".join(word for word in words if word is not None)
+
+
+class Journal:
+    """Records the commands of one game"""
+
+    def __init__(self, path: str, game=None, batch_size: int = 64,
+                 fsync_every: int = 1, checkpoint_every: int = 1000,
+                 keep_checkpoints: int = 2, turn: int = 0):
+        """Open a journal for appending.
+
+        Parameters
+        ----------
+        path: str
+            The journal file. Checkpoints are written to path.<turn>.ckpt
+        game: Game
+            When given, a checkpoint of its current state is written
+            first, so there is always something to recover from
+        batch_size: int
+            Records kept in memory before they are written
+        fsync_every: int
+            Batches written before the file is forced to disk, 0 never
+        checkpoint_every: int
+            Commands between checkpoints
+        keep_checkpoints: int
+            How many of the newest checkpoints are kept
+        turn: int
+            The number of commands already in the journal
+        """
+        self.path = path
+        self.turn = turn
+        self.__batch_size = batch_size
+        self.__fsync_every = fsync_every
+        self.__checkpoint_every = checkpoint_every
+        self.__keep_checkpoints = keep_checkpoints
+        self.__pending = []
+        self.__batches = 0
+        self.__file = open(path, "ab")
+        if game is not None:
+            self.checkpoint(game)
+
+    def append(self, game, command: Command, rng_state):
+        """Record a command the game just processed. rng_state is the
+        state of the random generator before the command."""
+        self.turn += 1
+        line = command_line(command).encode()
+        # Only keep the state if the command used the generator
+        state = b"" if game.rng.getstate() == rng_state else encode_rng_state(rng_state)
+        self.__pending.append(RECORD.pack(self.turn, len(line), len(state)) + line + state)
+
+        if len(self.__pending) >= self.__batch_size or game.outcome is not None:
+            self.flush()
+        if self.turn % self.__checkpoint_every == 0:
+            self.checkpoint(game)
+
+    def flush(self, sync: bool = False):
+        """Write the pending records"""
+        if self.__pending:
+            self.__file.write(b"".join(self.__pending))
+            self.__pending.clear()
+            self.__batches += 1
+        self.__file.flush()
+        if sync or (self.__fsync_every and self.__batches % self.__fsync_every == 0):
+            os.fsync(self.__file.fileno())
+
+    def checkpoint(self, game):
+        """Write a snapshot of the game, valid from the current turn"""
+        self.flush(sync=True)
+        state = encode_rng_state(game.rng.getstate())
+        buffer = io.BytesIO()
+        buffer.write(CHECKPOINT.pack(self.turn, self.__file.tell(), len(state)))
+        buffer.write(state)
+        snapshot.write(game, buffer)
+
+        # Write to a temporary file first, so a crash can't leave a
+        # half written checkpoint behind
+        path = f"{self.path}.{self.turn}.ckpt"
+        with open(path + ".tmp", "wb") as file:
+            file.write(buffer.getvalue())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+        for old in checkpoints(self.path)[self.__keep_checkpoints:]:
+            os.remove(old[1])
+
+    def close(self):
+        self.flush(sync=True)
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def recover(cls, path: str, parser=None, **options):
+        """Rebuild a game from its newest checkpoint and the commands
+        after it. Returns the game and the journal, open to carry on
+        recording. A record cut short by a crash is dropped."""
+        for turn, checkpoint_path in checkpoints(path):
+            try:
+                with open(checkpoint_path, "rb") as file:
+                    data = file.read()
+                turn, offset, state_length = CHECKPOINT.unpack_from(data)
+                start = CHECKPOINT.size
+                state = decode_rng_state(data[start:start + state_length])
+                game = snapshot.read(data[start + state_length:], parser)
+                break
+            except (struct.error, snapshot.SnapshotError):
+                # Damaged checkpoint, try an older one
+                continue
+        else:
+            raise FileNotFoundError(f"No checkpoint of {path} to recover from")
+
+        game.rng.setstate(state)
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+        position = 0
+        # Replay quietly, then give the game its output back
+        output, game.output = game.output, NullSink()
+        while position + RECORD.size <= len(data):
+            record_turn, line_length, state_length = RECORD.unpack_from(data, position)
+            record_end = position + RECORD.size + line_length + state_length
+            if record_end > len(data):
+                break
+            line = data[position + RECORD.size:position + RECORD.size + line_length]
+            if state_length:
+                game.rng.setstate(decode_rng_state(data[record_end - state_length:record_end]))
+            game.execute_command(_parser.parse(line.decode()))
+            turn = record_turn
+            position = record_end
+        game.output = output
+        end = offset + position
+
+        # Drop anything after the last complete record
+        with open(path, "r+b") as file:
+            file.truncate(end)
+        journal = cls(path, turn=turn, **options)
+        game.journal = journal
+        return game, journal
+
+
+def checkpoints(path: str):
+    """Returns the (turn, path) of the checkpoints of a journal, newest first"""
+    found = []
+    for checkpoint_path in glob.glob(glob.escape(path) + ".*.ckpt"):
+        turn = checkpoint_path[len(path) + 1:-len(".ckpt")]
+        if turn.isdigit():
+            found.append((int(turn), checkpoint_path))
+    return sorted(found, reverse=True)
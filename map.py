@@ -1,9 +1,75 @@
+from contextlib import nullcontext
+
 from room import Room
+from constants import START_ROOM, EXIT_ROOM, TRANSPORTER_ROOM
+
+
+class RoomNumbers:
+    """The room numbers 1 to `rooms` without a few excluded ones, as
+    a sequence which is not stored: random.choice works on it in O(1)
+    however large the dungeon is"""
+
+    def __init__(self, rooms: int, excluded=()) -> None:
+        self.__rooms = rooms
+        self.__excluded = sorted({number for number in excluded if 1 <= number <= rooms})
+
+    def __len__(self) -> int:
+        return self.__rooms - len(self.__excluded)
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        number = index + 1
+        # Skip the excluded numbers up to the one found
+        for excluded in self.__excluded:
+            if excluded > number:
+                break
+            number += 1
+        return number
 
 
 class Map:
-    def __init__(self) -> None:
-        self.__map = {
+    def __init__(
+        self,
+        rooms: dict = None,
+        start_room: int = START_ROOM,
+        exit_room: int = EXIT_ROOM,
+        transporter_room: int = TRANSPORTER_ROOM,
+    ) -> None:
+        """Create the map of the dungeon. Without `rooms` the default
+        dungeon of 15 rooms is created, which still needs link_exits.
+
+        Parameters
+        ----------
+        rooms: dict
+            Room numbers (1 to the number of rooms) mapped to Rooms
+        start_room, exit_room, transporter_room: int
+            The numbers of the special rooms
+        """
+        self.start_room = start_room
+        self.exit_room = exit_room
+        self.transporter_room = transporter_room
+        # Increased every time an exit changes, see exits_changed
+        self.__version = 0
+        # Room -> room number, built on first use
+        self.__numbers = None
+        if rooms is None:
+            rooms = self.__default_rooms()
+        self.__map = rooms
+        # Rooms streamed in and out of memory follow the player, see
+        # regions.RegionGraph.bind, visit and passing
+        self.__bind = getattr(rooms, "bind", None)
+        self.__visit = getattr(rooms, "visit", None)
+        self.__passing = getattr(rooms, "passing", None)
+        if isinstance(rooms, dict):
+            for room in rooms.values():
+                room.attach(self)
+
+    def __default_rooms(self):
+        """The 15 rooms of the default dungeon"""
+        return {
             1: Room("Room # 1"),
             2: Room("Room # 2"),
             3: Room("Room # 3"),
@@ -86,6 +152,51 @@ class Map:
         # Room 15
         self.__map[15].set_exit("west", self.__map[14])
 
+    def bind(self, game):
+        """Called by the game before it places objects in the rooms"""
+        if self.__bind is not None:
+            self.__bind(game)
+
+    def entered(self, game):
+        """Called by the game when the player has entered a room"""
+        if self.__visit is not None:
+            self.__visit(game)
+
+    def passing(self):
+        """Returns the context the game lets a turn pass in"""
+        if self.__passing is not None:
+            return self.__passing()
+        return nullcontext()
+
+    def exits_changed(self):
+        """Called by the rooms when one of their exits changes"""
+        self.__version += 1
+
+    @property
+    def version(self) -> int:
+        """Changes whenever an exit of any room changes, so anything
+        computed from the exits can tell when it is out of date"""
+        return self.__version
+
+    def number_of(self, room: Room) -> int:
+        """Returns the number of a room of this map"""
+        number = getattr(room, "number", None)
+        if number is not None:
+            return number
+        if self.__numbers is None:
+            self.__numbers = {r: n for n, r in self.__map.items()}
+        return self.__numbers[room]
+
+    def neighbours(self, number: int) -> list:
+        """Returns the (direction, room number) pairs of a room's exits"""
+        if not isinstance(self.__map, dict):
+            # A RoomGraph knows the numbers without creating the rooms
+            return self.__map.neighbours(number)
+        return [
+            (direction, self.number_of(room))
+            for direction, room in self.__map[number].exits.items()
+        ]
+
     """
      * Defining dunder methods so we can do different operations 
      * on the Map object
@@ -101,6 +212,10 @@ class Map:
         Exits: south east"""
         return self.__map[item]
 
+    def __contains__(self, number):
+        """Returns True if the map has a room with this number"""
+        return number in self.__map
+
     def __iter__(self):
         """Returns an iterator of the dictionary"""
         return iter(self.__map)
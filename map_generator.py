@@ -0,0 +1,202 @@
+"""
+Procedural generator for dungeons of any size.
+
+The rooms are laid out on a square grid and numbered row by row, so
+the exits are the usual north, south, east and west. A random spanning
+tree is carved first, which makes every room reachable, then extra
+exits are added between neighbouring rooms with probability
+`exit_density`. The magical transporter is put in a dead end of the
+spanning tree, so no room can only be reached through it.
+
+Example:
+    python map_generator.py --rooms 1000000 --seed 1
+"""
+import argparse
+import math
+import random
+import time
+import tracemalloc
+
+from instrumentation import print_peak_memory
+from map import Map
+from room import Room
+from room_graph import RoomGraph
+
+# (direction, opposite direction, row step, column step)
+DIRECTIONS = (
+    ("north", "south", -1, 0),
+    ("south", "north", 1, 0),
+    ("east", "west", 0, 1),
+    ("west", "east", 0, -1),
+)
+
+
+def generate_exits(rooms: int, seed=None, exit_density: float = 0.1):
+    """Generate the exits of a connected dungeon.
+
+    Parameters
+    ----------
+    rooms: int
+        The number of rooms, at least 4
+    seed:
+        Seed of the random generator. The same seed gives the same map
+    exit_density: float
+        Probability of an extra exit between two neighbouring rooms
+        which are not already connected
+
+    Returns the width of the grid, a bytearray with one bit per
+    direction of DIRECTIONS for every room number, and the number of
+    the transporter room.
+    """
+    if rooms < 4:
+        raise ValueError("A dungeon needs at least 4 rooms")
+    rng = random.Random(seed)
+    width = math.ceil(math.sqrt(rooms))
+    exits = bytearray(rooms + 1)
+
+    def neighbours(number):
+        """Yields the existing neighbours of a room with their direction bits"""
+        row, column = divmod(number - 1, width)
+        for index, (_, _, row_step, column_step) in enumerate(DIRECTIONS):
+            next_row, next_column = row + row_step, column + column_step
+            if 0 <= next_column < width and next_row >= 0:
+                next_number = next_row * width + next_column + 1
+                if next_number <= rooms:
+                    yield index, next_number
+
+    def link(number, index, next_number):
+        exits[number] |= 1 << index
+        # The opposite direction is the other one of the pair
+        exits[next_number] |= 1 << (index ^ 1)
+
+    # Carve a spanning tree with an iterative randomised depth first search
+    visited = bytearray(rooms + 1)
+    visited[1] = 1
+    stack = [1]
+    while stack:
+        number = stack[-1]
+        options = [n for n in neighbours(number) if not visited[n[1]]]
+        if not options:
+            stack.pop()
+            continue
+        index, next_number = rng.choice(options)
+        link(number, index, next_number)
+        visited[next_number] = 1
+        stack.append(next_number)
+
+    # Dead ends of the tree can't cut the dungeon in two. A dead end
+    # has a single exit, i.e. a single bit set
+    dead_ends = [
+        number for number in range(2, rooms) if exits[number] in (1, 2, 4, 8)
+    ]
+    if not dead_ends:
+        # The only leaves are the start and the exit room, so the tree
+        # is a path and every other room would cut it. Room 1 has two
+        # neighbours, south and east: hang it from the one which isn't
+        # next on the path, which leaves that one a dead end
+        next_numbers = {1: 1 + width, 2: 2}  # by index in DIRECTIONS
+        old = 1 if exits[1] & (1 << 1) else 2
+        exits[1] &= ~(1 << old)
+        exits[next_numbers[old]] &= ~(1 << (old ^ 1))
+        link(1, 3 - old, next_numbers[3 - old])
+        dead_ends = [next_numbers[old]]
+    transporter_room = rng.choice(dead_ends)
+
+    # Add extra exits, keeping the transporter room a dead end
+    if exit_density > 0:
+        for number in range(1, rooms + 1):
+            if number == transporter_room:
+                continue
+            for index, next_number in neighbours(number):
+                # Only look south and east, so every pair is seen once
+                if index not in (1, 2) or next_number == transporter_room:
+                    continue
+                if not exits[number] & (1 << index) and rng.random() < exit_density:
+                    link(number, index, next_number)
+
+    if not all_reachable(rooms, width, exits, transporter_room):
+        raise RuntimeError("The transporter room cuts the dungeon in two")
+    return width, exits, transporter_room
+
+
+def all_reachable(rooms: int, width: int, exits, avoid: int) -> bool:
+    """Whether every room can be reached from room 1 without going
+    through the room `avoid`"""
+    seen = bytearray(rooms + 1)
+    seen[1] = seen[avoid] = 1
+    stack = [1]
+    count = 2
+    while stack:
+        for _, next_number in exit_targets(stack.pop(), width, exits):
+            if not seen[next_number]:
+                seen[next_number] = 1
+                count += 1
+                stack.append(next_number)
+    return count == rooms
+
+
+def exit_targets(number, width, exits):
+    """Yields the directions and room numbers of the exits of a room"""
+    mask = exits[number]
+    for index, (direction, _, row_step, column_step) in enumerate(DIRECTIONS):
+        if mask & (1 << index):
+            yield direction, number + row_step * width + column_step
+
+
+def generate_map(rooms: int, seed=None, exit_density: float = 0.1) -> Map:
+    """Generate a connected dungeon, see generate_exits.
+
+    Returns a linked Map. Room # 1 is the start room and the last room
+    is the exit room.
+    """
+    width, exits, transporter_room = generate_exits(rooms, seed, exit_density)
+    dungeon = {number: Room(f"Room # {number}") for number in range(1, rooms + 1)}
+    for number, room in dungeon.items():
+        for direction, next_number in exit_targets(number, width, exits):
+            room.set_exit(direction, dungeon[next_number])
+    return Map(dungeon, 1, rooms, transporter_room)
+
+
+def generate_graph(rooms: int, seed=None, exit_density: float = 0.1) -> RoomGraph:
+    """Generate the same dungeon as generate_map, but stored in a
+    compact RoomGraph. No Room is created until it is needed."""
+    width, exits, transporter_room = generate_exits(rooms, seed, exit_density)
+    graph = RoomGraph.build(
+        rooms,
+        (exit_targets(number, width, exits) for number in range(1, rooms + 1)),
+        [direction for direction, _, _, _ in DIRECTIONS],
+    )
+    graph.start_room, graph.exit_room, graph.transporter_room = 1, rooms, transporter_room
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a dungeon and report its cost")
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--exit-density", type=float, default=0.1)
+    parser.add_argument("--compact", action="store_true",
+                        help="store the dungeon in a compact RoomGraph")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure the peak with tracemalloc (exact, but much slower)")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if args.compact:
+        graph = generate_graph(args.rooms, args.seed, args.exit_density)
+        exits = graph.exit_count
+        dungeon = graph.to_map()
+    else:
+        dungeon = generate_map(args.rooms, args.seed, args.exit_density)
+        exits = sum(len(dungeon[number].exits) for number in dungeon)
+    elapsed = time.perf_counter() - start
+
+    print(f"rooms: {len(dungeon)}  exits: {exits}  transporter: Room # {dungeon.transporter_room}")
+    print(f"build time: {elapsed:.2f}s")
+    print_peak_memory()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+A binary world file which is memory-mapped rather than read.
+
+The exits are stored as the arrays of a RoomGraph (see room_graph) and
+used in place: opening the file only reads its header, and a room is
+only created, as a RoomView, when the game looks it up. Opening takes
+the same time for a dungeon of a million rooms as for one of fifteen,
+and the pages are read-only and shared, so several game processes on
+the same file share one copy of it in the page cache.
+
+Layout (all integers little endian):
+
+    header    magic b"ZMAP", version (u16), flags (u16, 1: rooms have names)
+              rooms, start, exit and transporter room (4 x u32)
+              offset and size in bytes of every section (7 x 2 x u64)
+    sections  directions   JSON list of the direction names
+              offsets      i32 per room number, 0 to rooms + 1
+              targets      i32 per exit
+              codes        u8 per exit, index into the directions
+              name ends    u32 per room number: where its name ends in
+                           the names section, 0 to rooms
+              names        UTF-8 names of the rooms, one after the other
+              spawns       JSON list of the spawn records, see world_file
+
+Every section starts on a multiple of 8 bytes.
+
+    map, spawns = mapped_world.open_world("big.zmap")
+    game = Game(map, spawns=spawns)
+
+Example:
+    python mapped_world.py convert big.jsonl big.zmap
+    python mapped_world.py open big.zmap
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+from instrumentation import print_peak_memory
+from map import Map
+from room_graph import RoomGraph
+import world_file
+
+MAGIC = b"ZMAP"
+VERSION = 1
+HAS_NAMES = 1
+SECTIONS = ("directions", "offsets", "targets", "codes", "name_ends", "names", "spawns")
+HEADER = struct.Struct("<4sHHIIII" + "QQ" * len(SECTIONS))
+
+
+class MappedWorldError(Exception):
+    """Raised when a file is not a world file this version can open"""
+    pass
+
+
+class MappedNames:
+    """The names of the rooms, decoded from the file when asked for"""
+
+    def __init__(self, ends, names) -> None:
+        """
+        Parameters
+        ----------
+        ends: memoryview
+            Where the name of every room number ends in `names`
+        names: memoryview
+            The UTF-8 names one after the other
+        """
+        self.__ends = ends
+        self.__names = names
+
+    def __len__(self) -> int:
+        return len(self.__ends)
+
+    def __getitem__(self, number):
+        if isinstance(number, slice):
+            return [self[n] for n in range(*number.indices(len(self)))]
+        if number == 0:
+            return None
+        return bytes(self.__names[self.__ends[number - 1]:self.__ends[number]]).decode()
+
+
+"""
+ * Writing
+"""
+
+
+def _pad(out):
+    out.write(bytes(-out.tell() % 8))
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def save(path: str, map: Map, spawns: list = None):
+    """Write the world file of a map with rooms numbered 1 to
+    len(map), and its spawns (the default ones when not given)"""
+    if spawns is None:
+        spawns = world_file.default_spawns()
+    graph = map.rooms if isinstance(map.rooms, RoomGraph) else RoomGraph.from_map(map)
+    offsets, targets, codes, directions, names = graph.arrays()
+    rooms = len(graph)
+    if names is not None and all(names[n] == f"Room # {n}" for n in range(1, rooms + 1)):
+        names = None
+
+    with open(path, "wb") as out:
+        out.write(bytes(HEADER.size))
+        sections = []
+
+        def section(data):
+            _pad(out)
+            sections.append((out.tell(), len(data)))
+            out.write(data)
+
+        section(json.dumps(list(directions)).encode())
+        section(_little_endian(array("i", offsets)))
+        section(_little_endian(array("i", targets)))
+        section(_little_endian(array("B", codes)))
+        if names is None:
+            section(b"")
+            section(b"")
+        else:
+            encoded = [names[n].encode() for n in range(1, rooms + 1)]
+            ends = array("I", [0])
+            for name in encoded:
+                ends.append(ends[-1] + len(name))
+            section(_little_endian(ends))
+            section(b"".join(encoded))
+        section(json.dumps([spawn.record() for spawn in spawns]).encode())
+
+        out.seek(0)
+        out.write(HEADER.pack(
+            MAGIC, VERSION, HAS_NAMES if names is not None else 0,
+            rooms, map.start_room, map.exit_room, map.transporter_room,
+            *[value for pair in sections for value in pair],
+        ))
+
+
+"""
+ * Opening
+"""
+
+
+def open_world(path: str):
+    """Map a world file into memory. Returns the Map and the list of
+    Spawns. Nothing but the header is read until rooms are looked up."""
+    with open(path, "rb") as file:
+        # The mapping stays valid after the file is closed
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < HEADER.size:
+        raise MappedWorldError("The file is too short to be a world file")
+    magic, version, flags, rooms, start, exit, transporter, *positions = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise MappedWorldError("The file is not a world file")
+    if version != VERSION:
+        raise MappedWorldError(f"Unsupported world file version {version}")
+    view = memoryview(data)
+    sections = {}
+    for i, name in enumerate(SECTIONS):
+        offset, size = positions[2 * i], positions[2 * i + 1]
+        if offset + size > len(data):
+            raise MappedWorldError(f"The {name} section is past the end of the file")
+        sections[name] = view[offset:offset + size]
+
+    def numbers(name, typecode):
+        if sys.byteorder == "big":
+            # The file is little endian, so it has to be copied
+            values = array(typecode, sections[name])
+            values.byteswap()
+            return values
+        return sections[name].cast(typecode)
+
+    offsets = numbers("offsets", "i")
+    if len(offsets) != rooms + 2:
+        raise MappedWorldError(f"Expected the exits of {rooms} rooms")
+    names = None
+    if flags & HAS_NAMES:
+        names = MappedNames(numbers("name_ends", "I"), sections["names"])
+    graph = RoomGraph(
+        offsets,
+        numbers("targets", "i"),
+        sections["codes"],
+        json.loads(bytes(sections["directions"])),
+        names,
+    )
+    spawns = [
+        world_file.spawn_of(record, rooms)
+        for record in json.loads(bytes(sections["spawns"]))
+    ]
+    return Map(graph, start, exit, transporter), spawns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert or open a memory-mapped world file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert a JSON lines world file")
+    convert.add_argument("source")
+    convert.add_argument("path")
+    open_file = commands.add_parser("open", help="open a world file and start a game on it")
+    open_file.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        map, spawns = world_file.load(args.source, compact=True)
+        save(args.path, map, spawns)
+        print(f"rooms: {len(map)}  convert time: {time.perf_counter() - start:.2f}s")
+        return
+
+    from game import Game
+    from output import NullSink
+    start = time.perf_counter()
+    map, spawns = open_world(args.path)
+    opened = time.perf_counter() - start
+    game = Game(map, output=NullSink(), spawns=spawns)
+    started = time.perf_counter() - start
+    print(f"rooms: {len(map)}  rooms created: {game.map.rooms.created_rooms}")
+    print(f"open time: {opened * 1e3:.2f}ms  game start: {started * 1e3:.2f}ms")
+    print_peak_memory()
+
+
+if __name__ == "__main__":
+    main()
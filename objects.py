@@ -1,9 +1,44 @@
-from random import choice
+import random
+import sys
 from typing import List
+from constants import DWARF_KIND, FOOD_KIND, HERB_KIND
 from room import Room
 from utils import PlayerWeakerThanMonsterException
 
 
+# (title, description, kind) -> ObjectType, see ObjectType.get
+_object_types = {}
+
+
+class ObjectType:
+    """
+    What all the objects of one type have in common: the title of
+    their names ("Goblin" for Goblin # 3), description and kind.
+    There is a single ObjectType for every combination (a flyweight),
+    so a million goblins share one description and one kind.
+    """
+
+    __slots__ = ("title", "description", "kind")
+
+    def __init__(self, title: str, description: str, kind: str) -> None:
+        self.title = title
+        self.description = description
+        # Interned, so comparing kinds is cheap
+        self.kind = sys.intern(kind)
+
+    @classmethod
+    def get(cls, title: str, description: str, kind: str = None):
+        """Returns the shared ObjectType. Without a kind, the kind is
+        the first word of the title, e.g. "sword" for Sword"""
+        key = (title, description, kind)
+        object_type = _object_types.get(key)
+        if object_type is None:
+            object_type = _object_types[key] = cls(
+                title, description, kind or title.lower().partition(" ")[0]
+            )
+        return object_type
+
+
 class DungeonObject:
     """
     A DungeonObject is either an Animate Object or Inanimate Object
@@ -12,29 +47,69 @@ class DungeonObject:
         Name
         Description
         Room
+        Kind, e.g. "sword", used to match it with the words typed
+    The description and kind are kept in a shared ObjectType, and a
+    name like "Goblin # 3" is kept as its number only.
     """
 
-    def __init__(self, name: str, description: str, room: Room) -> None:
-        self.__name = name
-        self.__description = description
-        self.__room = room
+    __slots__ = ("__type", "__number", "__room")
+
+    def __init__(self, name: str, description: str, room: Room, kind: str = None) -> None:
+        """
+        Parameters
+        ----------
+        kind: string
+            One of the kinds of constants.py. Taken from the first word
+            of the name when it is not given, e.g. "sword" for Sword # 2
+        """
+        title, separator, number = name.rpartition(" # ")
+        # A leading zero wouldn't survive the round trip through int
+        if separator and number.isdigit() and number[0] != "0":
+            self.__number = int(number)
+        else:
+            # Not a numbered name, keep it whole
+            title, self.__number = name, None
+        object_type = _object_types.get((title, description, kind))
+        if object_type is None:
+            object_type = ObjectType.get(title, description, kind)
+        self.__type = object_type
+        self.__room = None
+        self.change_room(room)
 
     def change_room(self, room: Room):
+        """Move the object to another room. The rooms keep an index of
+        the objects lying in them, so it is updated here as well.
+        Passing None takes the object off the map (picked or dead)."""
+        if self.__room is not None:
+            self.__room.remove_object(self)
         self.__room = room
+        if room is not None:
+            room.add_object(self)
 
     def get_room(self):
         return self.__room
 
     def get_name(self):
-        return self.__name
+        # Names are made when they are needed
+        if self.__number is None:
+            return self.__type.title
+        return f"{self.__type.title} # {self.__number}"
+
+    @property
+    def kind(self) -> str:
+        return self.__type.kind
+
+    @property
+    def object_type(self) -> ObjectType:
+        return self.__type
 
     def __str__(self) -> str:
         """Return the string representation of the DungeonObject"""
-        return self.__name
+        return self.get_name()
 
     def get_description(self) -> str:
         """Return the description of the DungeonObject"""
-        return self.__description
+        return self.__type.description
 
 
 class Creature(DungeonObject):
@@ -42,17 +117,30 @@ class Creature(DungeonObject):
     A Creature or Animate Object can move through the rooms occasionally.
     """
 
-    def __init__(self, name: str, description: str, room: Room) -> None:
-        super().__init__(name, description, room)
+    __slots__ = ()
 
-    def move(self):
+    def __init__(self, name: str, description: str, room: Room, kind: str = None) -> None:
+        super().__init__(name, description, room, kind)
+
+    def move(self, rng=random, avoid=()):
         """A Creature will move randomly in any direction from its
-        current position after some interval"""
-        exits: dict = self.__room.exits
+        current position after some interval
+
+        Parameters
+        ----------
+        rng:
+            The random generator to use
+        avoid: collection of Room
+            Rooms the creature must not walk into
+        """
+        exits: dict = self.get_room().exits
         # Get all exits of the room in which the object is.
-        possible_rooms = list(exits.values())
+        possible_rooms = [room for room in exits.values() if room not in avoid]
+        if not possible_rooms:
+            # Nowhere to go
+            return
         # Select a random room from the exits
-        random_room = choice(possible_rooms)
+        random_room = rng.choice(possible_rooms)
         # Change the current room of the object to new room
         self.change_room(random_room)
 
@@ -63,8 +151,17 @@ class Item(DungeonObject):
     The player can pick and drop an item.
     """
 
-    def __init__(self, name: str, description: str, room: Room, weight: int) -> None:
-        super().__init__(name, description, room)
+    __slots__ = ("__weight",)
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        room: Room,
+        weight: int,
+        kind: str = None,
+    ) -> None:
+        super().__init__(name, description, room, kind)
         self.__weight = weight
 
     @property
@@ -80,10 +177,12 @@ class Weapon(Item):
     A Weapon can be used to fight against monsters.
     It can be either a sword, spear."""
 
+    __slots__ = ("__hp",)
+
     def __init__(
-        self, name: str, description: str, room: Room, weight: int, hp: int
+        self, name: str, description: str, room: Room, weight: int, hp: int, kind: str = None
     ) -> None:
-        super().__init__(name, description, room, weight)
+        super().__init__(name, description, room, weight, kind)
         self.__hp = hp
 
     def decrease_hp(self, value):
@@ -105,8 +204,10 @@ class Dwarf(Creature):
     the 'key' to the exit.
     """
 
-    def __init__(self, name: str, description: str, room: Room) -> None:
-        super().__init__(name, description, room)
+    __slots__ = ()
+
+    def __init__(self, name: str, description: str, room: Room, kind: str = DWARF_KIND) -> None:
+        super().__init__(name, description, room, kind)
 
 
 
@@ -120,14 +221,19 @@ class Monster(Creature):
     information or the 'key' to the exit.
     """
 
-    def __init__(self, name: str, description: str, room: Room, hp: int) -> None:
+    __slots__ = ("__hp",)
+
+    def __init__(
+        self, name: str, description: str, room: Room, hp: int, kind: str = None
+    ) -> None:
         """
         Name
         Description
         Room
         HP (Hit Points)
+        Kind
         """
-        super().__init__(name, description, room)
+        super().__init__(name, description, room, kind)
         self.__hp = hp
 
     def deplete_hp(self, value):
@@ -149,12 +255,22 @@ class Player:
         HP, Inventory, Room
     """
 
-    def __init__(self, hp) -> None:
+    __slots__ = (
+        "__room", "__inventory", "__weapons", "__by_kind",
+        "__hp", "__capacity", "__carried_weight",
+    )
+
+    def __init__(self, hp, weight_of_items_left=200) -> None:
         self.__room: Room = None
-        self.__inventory: List[Item] = []
-        self.__weapons: List[Weapon] = []
+        # Carried objects in the order they were picked. They are
+        # dictionaries used as ordered sets, so removing one is O(1)
+        self.__inventory = {}
+        self.__weapons = {}
+        # Kind ("food", "sword" ...) -> the carried objects of that kind
+        self.__by_kind = {}
         self.__hp = hp
-        self.__weight_of_items_left = 200
+        self.__capacity = weight_of_items_left
+        self.__carried_weight = 0
 
     def increase_hp(self, value: int):
         self.__hp += value
@@ -162,55 +278,74 @@ class Player:
     def decrease_hp(self, value: int):
         self.__hp -= value
 
+    def __carry(self, obj: Item, carried: dict):
+        carried[obj] = None
+        self.__by_kind.setdefault(obj.kind, {})[obj] = None
+        self.__carried_weight += obj.weight
+        # A carried object is not lying in any room. It goes
+        # wherever the player goes without being moved
+        obj.change_room(None)
+
+    def __uncarry(self, obj: Item, carried: dict):
+        del carried[obj]
+        del self.__by_kind[obj.kind][obj]
+        self.__carried_weight -= obj.weight
+
     def pick_item(self, item: Item):
-        self.__weight_of_items_left -= item.weight
-        self.__inventory.append(item)
+        self.__carry(item, self.__inventory)
 
     def drop_item(self, item: Item):
-        self.__weight_of_items_left += item.weight
-        self.__inventory.remove(item)
+        self.__uncarry(item, self.__inventory)
+        # Put the item back in the room the player is in
+        item.change_room(self.__room)
 
     def pick_weapon(self, weapon: Weapon):
-        self.__weight_of_items_left -= weapon.weight
-        self.__weapons.append(weapon)
+        self.__carry(weapon, self.__weapons)
 
     def drop_weapon(self, weapon: Weapon):
-        self.__weight_of_items_left += weapon.weight
-        self.__weapons.remove(weapon)
+        self.__uncarry(weapon, self.__weapons)
+        weapon.change_room(self.__room)
+
+    def remove_weapon(self, weapon: Weapon):
+        """Remove a broken weapon. Unlike drop_weapon it is not
+        put back on the map."""
+        self.__uncarry(weapon, self.__weapons)
 
     def change_room(self, room: Room):
-        for item in self.__inventory:
-            item.change_room(room)
-        for weapon in self.__weapons:
-            weapon.change_room(room)
+        # Carried items have no room of their own, so only
+        # the player needs to be moved
         self.__room = room
 
+    def get_room(self):
+        return self.__room
+
+    def get(self, kind: str):
+        """Returns the first carried object of a kind, e.g. "herb"
+        or "sword", or None"""
+        carried = self.__by_kind.get(kind)
+        return next(iter(carried), None) if carried else None
+
     def get_herb(self):
-        for item in self.__inventory:
-            if item.get_name().lower().split()[0] == "herb":
-                # item is HERB
-                return item
+        return self.get(HERB_KIND)
 
     def get_food(self) -> Item:
-        for item in self.__inventory:
-            if item.get_name().lower().split()[0] == "food":
-                # item is food
-                return item
+        return self.get(FOOD_KIND)
 
     def remove_food(self, food):
-        self.__weight_of_items_left += food.weight
-        self.__inventory.remove(food)
+        self.__uncarry(food, self.__inventory)
 
     def remove_herb(self, herb):
-        self.__inventory.remove(herb)
+        self.__uncarry(herb, self.__inventory)
 
     @property
     def inventory(self):
-        return self.__inventory
+        """The carried items, oldest first"""
+        return self.__inventory.keys()
 
     @property
     def weapons(self):
-        return self.__weapons
+        """The carried weapons, oldest first"""
+        return self.__weapons.keys()
 
     @property
     def hp(self):
@@ -218,7 +353,11 @@ class Player:
 
     @property
     def weight_of_items_left(self) -> int:
-        return self.__weight_of_items_left
+        return self.__capacity - self.__carried_weight
+
+    @property
+    def carried_weight(self) -> int:
+        return self.__carried_weight
 
     def fight(self, monster: Monster):
         """Fight with monster using weapons
@@ -242,7 +381,7 @@ class Player:
         for broken_weapon in broken_weapons:
             # Remove broken weapon from player's arsenal
             # Remove weapon weight from player
-            self.drop_weapon(broken_weapon)
+            self.remove_weapon(broken_weapon)
 
         # If the player doesn't have a weapon
         # He will fight with his own hands and he may die
@@ -0,0 +1,92 @@
+"""
+Output sinks for the text of a Game.
+
+The game writes its text to a sink instead of calling print. A sink
+collects everything written during a command and the game flushes it
+once at the end, so a command costs a single write however many lines
+it prints.
+
+    StreamSink  writes to a file, sys.stdout by default
+    BufferSink  keeps the text in memory
+    NullSink    throws the text away
+    SocketSink  writes to an asyncio StreamWriter
+"""
+import sys
+
+
+class OutputSink:
+    """Collects the text written during a command"""
+
+    def __init__(self) -> None:
+        self._parts = []
+
+    def write(self, text: str):
+        self._parts.append(text)
+
+    def flush(self):
+        """Send the collected text on"""
+        self._parts.clear()
+
+
+class StreamSink(OutputSink):
+    """Writes to a text file. Without a file sys.stdout is looked up
+    on every flush, so redirecting stdout still works."""
+
+    def __init__(self, stream=None) -> None:
+        super().__init__()
+        self.__stream = stream
+
+    def flush(self):
+        if self._parts:
+            stream = self.__stream or sys.stdout
+            stream.write("".join(self._parts))
+            stream.flush()
+            self._parts.clear()
+
+
+class BufferSink(OutputSink):
+    """Keeps all the text in memory"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__flushed = []
+
+    def flush(self):
+        if self._parts:
+            self.__flushed.append("".join(self._parts))
+            self._parts.clear()
+
+    def getvalue(self) -> str:
+        """Returns all the text flushed so far"""
+        return "".join(self.__flushed)
+
+    def take(self) -> str:
+        """Returns the text flushed so far and forgets it"""
+        text = self.getvalue()
+        self.__flushed.clear()
+        return text
+
+
+class NullSink(OutputSink):
+    """Throws everything away"""
+
+    def write(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+
+class SocketSink(OutputSink):
+    """Writes to an asyncio StreamWriter. Waiting for the client to read
+    (writer.drain) is left to the caller."""
+
+    def __init__(self, writer, encoding: str = "utf-8") -> None:
+        super().__init__()
+        self.__writer = writer
+        self.__encoding = encoding
+
+    def flush(self):
+        if self._parts:
+            self.__writer.write("".join(self._parts).encode(self.__encoding))
+            self._parts.clear()
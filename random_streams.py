@@ -0,0 +1,65 @@
+"""
+Seeded random generators that can be split into independent streams.
+
+A RandomStream is a random.Random with a 64 bit seed. `stream(*key)`
+derives a child stream from the seed and a key of integers and
+strings, without touching the parent's state, so any worker can
+create the stream of game number i directly:
+
+    root = RandomStream(42)
+    game = Game(rng=root.stream(point, i))
+
+`split()` hands out the children 0, 1, 2 ... in turn. The same seed
+always gives the same streams, on any machine and in any process.
+"""
+import os
+import random
+import zlib
+
+MASK = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix(value: int) -> int:
+    """The SplitMix64 finaliser: scrambles a 64 bit integer"""
+    value = (value + GOLDEN_GAMMA) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def derive_seed(seed: int, key) -> int:
+    """Returns the seed of the child of `seed` named by `key`"""
+    for part in key:
+        if isinstance(part, str):
+            # hash() of a string changes between processes
+            part = zlib.crc32(part.encode()) | 1 << 32
+        seed = mix(seed ^ mix(part & MASK))
+    return seed
+
+
+class RandomStream(random.Random):
+    """A random generator that knows its seed and can be split"""
+
+    def __init__(self, seed: int = None) -> None:
+        """
+        Parameters
+        ----------
+        seed: int
+            Any integer. A random one is chosen if it is not given
+        """
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        self.seed_value = seed & MASK
+        self.__children = 0
+        super().__init__(self.seed_value)
+
+    def stream(self, *key) -> "RandomStream":
+        """Returns the child stream named by `key`, integers and strings"""
+        return RandomStream(derive_seed(self.seed_value, key))
+
+    def split(self) -> "RandomStream":
+        """Returns a new child stream, different from the ones before"""
+        self.__children += 1
+        return self.stream(self.__children - 1)
+
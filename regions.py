@@ -0,0 +1,341 @@
+"""
+Stream a large dungeon in and out of memory a region at a time.
+
+A RegionGraph is a RoomGraph whose rooms are grouped in regions of
+`region_size` consecutive room numbers. A region is loaded when the
+player comes near it, i.e. enters one of its rooms or a room next to
+it, and its rooms are created as they are looked up. Whenever a region
+is loaded, by the player or by anything else looking a room up (placing
+objects, the magical transporter, a creature looking at its exits ...),
+the least recently used regions over `max_regions` are evicted: their
+rooms are dropped and the objects lying in them (with their hit points,
+weights and the creatures' schedule) are written to a store. They are
+put back exactly as they were, in the same order, when the region is
+loaded again. Creatures in evicted regions don't move.
+
+The regions of the player's room and of the room it came from are
+never evicted, and neither are the regions around a room while its
+exits are looked up, so the budget can be exceeded by those for a
+while. Objects are only put back and evicted once a game is bound, see
+bind; Game does it before placing its objects.
+
+Memory then grows with the explored area rather than the size of the
+dungeon: the exits stay in the arrays of the graph (memory-mapped from
+a mapped_world file, for instance) and at most `max_regions` regions
+of rooms are resident.
+
+    map, spawns = mapped_world.open_world("big.zmap")
+    game = Game(regions.streamed(map, max_regions=16), spawns=spawns)
+
+The start, exit and transporter rooms are never evicted, the game
+keeps them all the time.
+
+A snapshot of the game keeps it streamed: the loaded regions and the
+records of the store are written as they are (see saved_state) and a
+RegionGraph is rebuilt from them on reading, with its store in a dict.
+A journaled game is then recovered exactly as it was played.
+"""
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from map import Map
+from objects import Dwarf, Item, Monster, Weapon
+from room_graph import RoomGraph, RoomView
+from snapshot import DWARF, ITEM, MONSTER, WEAPON
+
+
+class RegionGraph(RoomGraph):
+    """A RoomGraph which keeps only a few regions of rooms in memory"""
+
+    def __init__(self, graph: RoomGraph, region_size: int = 256,
+                 max_regions: int = 16, store=None) -> None:
+        """
+        Parameters
+        ----------
+        graph: RoomGraph
+            The exits of the dungeon. Its arrays are shared, not copied
+        region_size: int
+            The number of rooms in a region
+        max_regions: int
+            The memory budget: how many regions can stay loaded
+        store:
+            Where the objects of evicted regions are written, a mutable
+            mapping of strings to bytes, e.g. a dbm database. Defaults
+            to a dict
+        """
+        super().__init__(*graph.arrays())
+        self.start_room = graph.start_room
+        self.exit_room = graph.exit_room
+        self.transporter_room = graph.transporter_room
+        self.region_size = region_size
+        self.max_regions = max(max_regions, 1)
+        # Region -> {room number: RoomView}, least recently visited first
+        self.__regions = OrderedDict()
+        # Views of the special rooms, which are never evicted
+        self.__pinned = {}
+        self.__store = {} if store is None else store
+        # Descriptions are shared by many objects, so the store only
+        # keeps their index in this table
+        self.__descriptions = []
+        self.__description_indexes = {}
+        self.__game = None
+        # Regions which can't be evicted while a room's exits are looked
+        # up, see holding
+        self.__held = None
+        self.loads = 0
+        self.evictions = 0
+
+    def region_of(self, number: int) -> int:
+        return (number - 1) // self.region_size
+
+    @property
+    def created_rooms(self) -> int:
+        """The number of rooms in memory"""
+        return len(self.__pinned) + sum(len(views) for views in self.__regions.values())
+
+    @property
+    def loaded_regions(self) -> int:
+        return len(self.__regions)
+
+    @property
+    def saved_regions(self) -> int:
+        """The number of evicted regions with objects in the store"""
+        return len(self.__store)
+
+    def __getitem__(self, number: int) -> RoomView:
+        view = self.__pinned.get(number)
+        if view is not None:
+            return view
+        if not isinstance(number, int) or not 1 <= number <= len(self):
+            raise KeyError(number)
+        if number in (self.start_room, self.exit_room, self.transporter_room):
+            # Kept out of the regions, so they don't load one
+            view = self.__pinned[number] = RegionView(self, number)
+            return view
+        region = (number - 1) // self.region_size
+        if self.__held is not None:
+            self.__held.add(region)
+        views = self.__regions.get(region)
+        if views is None:
+            views = self.__load(region)
+        view = views.get(number)
+        if view is None:
+            view = views[number] = RegionView(self, number)
+        return view
+
+    def bind(self, game: "Game"):
+        """Bind the game whose lists and scheduler hold the objects of
+        the rooms. Called by the game, through Map.bind, before it
+        places them. The objects of regions loaded until then are put
+        back now."""
+        if game is self.__game:
+            return
+        self.__game = game
+        for region in list(self.__regions):
+            self.__restore_region(region)
+
+    def visit(self, game: "Game"):
+        """Load the regions around the player's room and evict the
+        least recently used ones over the budget. Called by the game,
+        through Map.entered, when the player enters a room."""
+        self.bind(game)
+        number = game.current_room.number
+        near = {self.region_of(number)}
+        near.update(self.region_of(next_number) for _, next_number in self.neighbours(number))
+        if game.last_room is not None:
+            near.add(self.region_of(game.last_room.number))
+        for region in near:
+            if region in self.__regions:
+                self.__regions.move_to_end(region)
+            else:
+                self.__load(region, near)
+        self.__trim(near)
+
+    @contextmanager
+    def holding(self, number: int):
+        """While in this context the region of room `number`, and the
+        regions of the rooms looked up meanwhile, are not evicted"""
+        outer = self.__held is None
+        if outer:
+            self.__held = set()
+        self.__held.add(self.region_of(number))
+        try:
+            yield
+        finally:
+            if outer:
+                # The excess is evicted by the next load, once the
+                # caller is done with the rooms
+                self.__held = None
+
+    @contextmanager
+    def passing(self):
+        """While a turn passes no region is evicted: the scheduler has
+        taken the creatures that are due off their schedule, and one
+        evicted before its move would be stored without it. The excess
+        is evicted at the end of the turn."""
+        outer = self.__held is None
+        if outer:
+            self.__held = set(self.__regions)
+        try:
+            yield
+        finally:
+            if outer:
+                self.__held = None
+                self.__trim(())
+
+    def saved_state(self):
+        """Returns what a snapshot needs to rebuild the graph as it is,
+        see restore_state: the loaded regions, least recently used
+        first, with the numbers of their rooms in memory in the order
+        they were created; the table of descriptions; and the regions
+        in the store with their records"""
+        return (
+            [(region, list(views)) for region, views in self.__regions.items()],
+            list(self.__descriptions),
+            [(int(key), self.__store[key]) for key in self.__store.keys()],
+        )
+
+    def restore_state(self, regions: list, descriptions: list, records: list):
+        """Load the regions and fill the store as returned by
+        saved_state, before a game is bound. Nothing is read from the
+        store or evicted meanwhile, so the game then carries on exactly
+        as the one that was saved."""
+        for region, numbers in regions:
+            views = self.__regions[region] = {}
+            for number in numbers:
+                views[number] = RegionView(self, number)
+        self.__descriptions[:] = descriptions
+        self.__description_indexes = {
+            description: index for index, description in enumerate(descriptions)
+        }
+        for region, data in records:
+            self.__store[str(region)] = data
+
+    def __load(self, region: int, keep=()) -> dict:
+        views = self.__regions[region] = {}
+        self.loads += 1
+        if self.__game is not None:
+            self.__restore_region(region)
+        self.__trim({region, *keep})
+        return views
+
+    def __trim(self, keep):
+        """Evict the least recently used regions over the budget,
+        except the ones of `keep`, the held ones and the player's"""
+        game = self.__game
+        excess = len(self.__regions) - self.max_regions
+        if excess <= 0 or game is None:
+            return
+        keep = set(keep)
+        if self.__held:
+            keep.update(self.__held)
+        keep.add(self.region_of(game.current_room.number))
+        if game.last_room is not None:
+            keep.add(self.region_of(game.last_room.number))
+        cold = [region for region in self.__regions if region not in keep][:excess]
+        for region in cold:
+            self.__evict(region)
+
+    def __restore_region(self, region: int):
+        key = str(region)
+        data = self.__store.get(key)
+        if data is not None:
+            del self.__store[key]
+            self.__restore(json.loads(data))
+
+    def __restore(self, records: list):
+        """Put back the objects written by __evict"""
+        game = self.__game
+        for number, kind_code, name, description, weight, hp, kind, wait, sleeping in records:
+            room = self[number]
+            description = self.__descriptions[description]
+            if kind_code == WEAPON:
+                obj = Weapon(name, description, room, weight, hp, kind)
+                game.weapons.append(obj)
+            elif kind_code == ITEM:
+                obj = Item(name, description, room, weight, kind)
+                game.items.append(obj)
+            elif kind_code == MONSTER:
+                obj = Monster(name, description, room, hp, kind)
+                game.monsters.append(obj)
+            else:
+                obj = Dwarf(name, description, room, kind)
+                game.dwarf = obj
+            if wait >= 0:
+                game.scheduler.add(obj, game.scheduler.now + wait, bool(sleeping))
+
+    def __evict(self, region: int):
+        """Drop the rooms of a region and write their objects to the store"""
+        views = self.__regions.pop(region)
+        self.evictions += 1
+        game = self.__game
+        scheduler = game.scheduler
+        records = []
+        gone = set()
+        for number, view in views.items():
+            for obj in list(view.objects):
+                if isinstance(obj, Weapon):
+                    kind_code = WEAPON
+                elif isinstance(obj, Item):
+                    kind_code = ITEM
+                elif isinstance(obj, Monster):
+                    kind_code = MONSTER
+                else:
+                    kind_code = DWARF
+                description = obj.get_description()
+                index = self.__description_indexes.get(description)
+                if index is None:
+                    index = self.__description_indexes[description] = len(self.__descriptions)
+                    self.__descriptions.append(description)
+                # Creatures keep the number of turns until their next move
+                state = scheduler.state(obj)
+                wait, sleeping = (state[0] - scheduler.now, state[1]) if state else (-1, False)
+                scheduler.remove(obj)
+                records.append([
+                    number, kind_code, obj.get_name(), index, getattr(obj, "weight", 0),
+                    getattr(obj, "hp", 0), obj.kind, wait, int(sleeping),
+                ])
+                gone.add(obj)
+                # Off the map, so a creature the scheduler is about to
+                # move in this tick is skipped as gone
+                obj.change_room(None)
+        if not records:
+            return
+        self.__store[str(region)] = json.dumps(records, separators=(",", ":")).encode()
+        # Rebuilt once rather than removing the objects one by one
+        game.items[:] = [obj for obj in game.items if obj not in gone]
+        game.weapons[:] = [obj for obj in game.weapons if obj not in gone]
+        game.monsters[:] = [obj for obj in game.monsters if obj not in gone]
+        if game.dwarf in gone:
+            game.dwarf = None
+
+
+class RegionView(RoomView):
+    """A RoomView of a RegionGraph"""
+
+    __slots__ = ("__regions",)
+
+    def __init__(self, graph: RegionGraph, number: int):
+        super().__init__(graph, number)
+        self.__regions = graph
+
+    @property
+    def exits(self):
+        # Looking up a neighbour can load its region, which must not
+        # evict this room or the neighbours looked up before it
+        with self.__regions.holding(self.number):
+            return super().exits
+
+
+def streamed(map: Map, region_size: int = 256, max_regions: int = 16, store=None) -> Map:
+    """Returns a Map of the same dungeon whose rooms are streamed in
+    and out by regions, see RegionGraph. `map` must not have objects
+    in it yet."""
+    rooms = map.rooms
+    graph = rooms if isinstance(rooms, RoomGraph) else RoomGraph.from_map(map)
+    regions = RegionGraph(graph, region_size, max_regions, store)
+    regions.start_room = map.start_room
+    regions.exit_room = map.exit_room
+    regions.transporter_room = map.transporter_room
+    return Map(regions, map.start_room, map.exit_room, map.transporter_room)
@@ -17,6 +17,8 @@ class Room:
     stores a reference to the neighboring room.
     """
 
+    __slots__ = ("__description", "__exits", "__objects", "__map", "__version", "__cache")
+
     def __init__(self, description):
         """Create a room described "description". Initially, it has
         no exits. "description" is something like "a kitchen" or
@@ -29,6 +31,17 @@ class Room:
         """
         self.__description = description
         self.__exits = {}
+        # Objects lying in this room, kept in insertion order.
+        # A dict is used as an ordered set so removal is O(1).
+        # Most rooms are empty, so it is only created when needed
+        self.__objects = None
+        # The Map this room belongs to, told when the exits change
+        self.__map = None
+        # Bumped whenever the exits or the objects change
+        self.__version = 0
+        # Name -> (version, value) of the values computed by cached(),
+        # created on first use as well
+        self.__cache = None
 
     def set_exit(self, direction, neighbour):
         """Define an exit from this room.
@@ -41,6 +54,13 @@ class Room:
             The room to which the exit leads
         """
         self.__exits[direction] = neighbour
+        self.__version += 1
+        if self.__map is not None:
+            self.__map.exits_changed()
+
+    def attach(self, map):
+        """Tell the room which Map it belongs to"""
+        self.__map = map
 
     def get_short_description(self):
         """Returns The short description of the room
@@ -55,7 +75,10 @@ class Room:
 
         Returns A long description of this room
         """
-        return "You are in the " + self.__description + ".\n" + self.get_exit_string()
+        return self.cached(
+            "long_description",
+            lambda room: f"You are in the {room.__description}.\n{room.get_exit_string()}",
+        )
 
     def get_exit_string(self):
         """Return a string describing the room's exits, for example
@@ -63,10 +86,7 @@ class Room:
 
         Returns Details of the room's exits.
         """
-        return_string = "Exits:"
-        for room_exit in self.__exits.keys():
-            return_string += " " + room_exit
-        return return_string
+        return self.cached("exits", lambda room: " ".join(["Exits:", *room.__exits]))
 
     """
      * Return the room that is reached if we go from this room in direction
@@ -91,6 +111,55 @@ class Room:
         else:
             return None  # None is a special Python value that says the variable contains nothing
 
+    def add_object(self, obj):
+        """Put a DungeonObject in this room. Called by DungeonObject.change_room"""
+        if self.__objects is None:
+            self.__objects = {}
+        self.__objects[obj] = None
+        self.__version += 1
+
+    def remove_object(self, obj):
+        """Take a DungeonObject out of this room. Called by DungeonObject.change_room"""
+        if self.__objects is not None and self.__objects.pop(obj, False) is None:
+            self.__version += 1
+
+    def cached(self, name, build):
+        """Returns build(room), only calling it again when the room has
+        changed since the last call with the same name. The value must
+        only depend on the room's description, exits and objects.
+
+        Parameters
+        ----------
+        name: string
+            Name of the value, e.g. "exits"
+        build: function
+            Computes the value from the room
+        """
+        if self.__cache is None:
+            self.__cache = {}
+        entry = self.__cache.get(name)
+        if entry is not None and entry[0] == self.__version:
+            return entry[1]
+        value = build(self)
+        self.__cache[name] = (self.__version, value)
+        return value
+
+    @property
+    def version(self) -> int:
+        """Changes whenever the exits or the objects of the room change"""
+        return self.__version
+
     @property
     def exits(self):
         return self.__exits
+
+    @property
+    def objects(self):
+        """All the objects currently lying in this room"""
+        if self.__objects is None:
+            return _NO_OBJECTS
+        return self.__objects.keys()
+
+
+# The objects of a room nothing was ever put in
+_NO_OBJECTS = {}.keys()
@@ -0,0 +1,235 @@
+"""
+A compact, array-backed store for the exits of a dungeon.
+
+A Map normally keeps a Room object with its own exits dictionary for
+every room. For very large dungeons that is a lot of small objects.
+A RoomGraph keeps the exits of all rooms in three flat arrays instead
+(compressed sparse rows):
+
+    offsets[number] .. offsets[number + 1]  the exits of a room
+    targets[i]                              the room the exit leads to
+    codes[i]                                index of its direction
+
+Rooms are only created when they are looked up, as RoomViews which
+behave like a Room. The same view is returned every time, so rooms
+can still be compared with `is` and hold objects.
+
+>>> graph = RoomGraph.from_map(map)
+>>> game = Game(graph.to_map())
+"""
+from array import array
+import sys
+
+from constants import START_ROOM, EXIT_ROOM, TRANSPORTER_ROOM
+from map import Map
+from room import Room
+
+
+class RoomGraph:
+    """The exits of a dungeon with rooms numbered 1 to len(graph)"""
+
+    def __init__(self, offsets: array, targets: array, codes: array,
+                 directions: list, names: list = None) -> None:
+        """
+        Parameters
+        ----------
+        offsets: array
+            len(graph) + 2 positions in targets, indexed by room number
+        targets: array
+            The room numbers the exits lead to
+        codes: array
+            The direction index of every exit
+        directions: list
+            The direction names, e.g. ["north", "south"]
+        names: list
+            Descriptions of the rooms indexed by room number. Defaults
+            to "Room # <number>"
+        """
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__codes = codes
+        # Intern the directions so every exit shares the same string
+        self.__directions = [sys.intern(direction) for direction in directions]
+        self.__direction_codes = {
+            direction: code for code, direction in enumerate(self.__directions)
+        }
+        self.__names = names
+        self.__views = {}
+        self.start_room = START_ROOM
+        self.exit_room = EXIT_ROOM
+        self.transporter_room = TRANSPORTER_ROOM
+
+    @classmethod
+    def build(cls, rooms: int, exits, directions: list, names: list = None):
+        """Build a graph from the exits of every room.
+
+        Parameters
+        ----------
+        rooms: int
+            The number of rooms
+        exits: iterable
+            For every room number from 1 to `rooms`, an iterable of
+            (direction, room number) pairs
+        directions: list
+            All the direction names used by the exits
+        """
+        codes_of = {direction: code for code, direction in enumerate(directions)}
+        offsets = array("i", [0, 0])
+        targets = array("i")
+        codes = array("B")
+        for room_exits in exits:
+            for direction, number in room_exits:
+                targets.append(number)
+                codes.append(codes_of[direction])
+            offsets.append(len(targets))
+        if len(offsets) != rooms + 2:
+            raise ValueError(f"Expected the exits of {rooms} rooms")
+        return cls(offsets, targets, codes, directions, names)
+
+    @classmethod
+    def from_map(cls, map: Map):
+        """Copy the exits of a Map with rooms numbered 1 to len(map)"""
+        rooms = map.rooms
+        numbers = {room: number for number, room in rooms.items()}
+        directions = []
+        for room in rooms.values():
+            for direction in room.exits:
+                if direction not in directions:
+                    directions.append(direction)
+        names = [None] + [rooms[number].get_short_description() for number in range(1, len(rooms) + 1)]
+        graph = cls.build(
+            len(rooms),
+            (
+                [(direction, numbers[room]) for direction, room in rooms[number].exits.items()]
+                for number in range(1, len(rooms) + 1)
+            ),
+            directions,
+            names,
+        )
+        graph.start_room = map.start_room
+        graph.exit_room = map.exit_room
+        graph.transporter_room = map.transporter_room
+        return graph
+
+    def to_map(self) -> Map:
+        """Returns a Map whose rooms are views on this graph"""
+        return Map(self, self.start_room, self.exit_room, self.transporter_room)
+
+    def name(self, number: int) -> str:
+        """Returns the description of a room"""
+        if self.__names is None:
+            return f"Room # {number}"
+        return self.__names[number]
+
+    def neighbours(self, number: int):
+        """Returns the (direction, room number) pairs of the exits of a room"""
+        start, end = self.__offsets[number], self.__offsets[number + 1]
+        directions = self.__directions
+        return [
+            (directions[self.__codes[i]], self.__targets[i]) for i in range(start, end)
+        ]
+
+    def exit_number(self, number: int, direction: str):
+        """Returns the number of the room in `direction`, or None"""
+        code = self.__direction_codes.get(direction)
+        if code is None:
+            return None
+        codes = self.__codes
+        for i in range(self.__offsets[number], self.__offsets[number + 1]):
+            if codes[i] == code:
+                return self.__targets[i]
+        return None
+
+    def arrays(self):
+        """Returns the offsets, targets and codes arrays, the direction
+        names and the room names (None for the default names)"""
+        return self.__offsets, self.__targets, self.__codes, self.__directions, self.__names
+
+    @property
+    def created_rooms(self) -> int:
+        """The number of rooms looked up so far"""
+        return len(self.__views)
+
+    @property
+    def exit_count(self) -> int:
+        return len(self.__targets)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the exit arrays"""
+        return sum(
+            len(a) * a.itemsize for a in (self.__offsets, self.__targets, self.__codes)
+        )
+
+    """
+     * Mapping methods, so that a Map can use the graph as its rooms
+    """
+
+    def __getitem__(self, number: int) -> "RoomView":
+        view = self.__views.get(number)
+        if view is None:
+            if not 1 <= number < len(self.__offsets) - 1:
+                raise KeyError(number)
+            view = RoomView(self, number)
+            self.__views[number] = view
+        return view
+
+    def __iter__(self):
+        return iter(range(1, len(self) + 1))
+
+    def __len__(self) -> int:
+        return len(self.__offsets) - 2
+
+    def __contains__(self, number) -> bool:
+        return isinstance(number, int) and 1 <= number <= len(self)
+
+    def keys(self):
+        return range(1, len(self) + 1)
+
+    def values(self):
+        return (self[number] for number in self)
+
+    def items(self):
+        return ((number, self[number]) for number in self)
+
+
+class RoomView(Room):
+    """A Room whose exits are stored in a RoomGraph"""
+
+    __slots__ = ("__graph", "__number", "__exit_numbers")
+
+    def __init__(self, graph: RoomGraph, number: int):
+        super().__init__(graph.name(number))
+        self.__graph = graph
+        self.__number = number
+        # Direction -> room number, read from the graph on first use
+        self.__exit_numbers = None
+
+    @property
+    def number(self) -> int:
+        return self.__number
+
+    def __get_exit_numbers(self) -> dict:
+        if self.__exit_numbers is None:
+            self.__exit_numbers = dict(self.__graph.neighbours(self.__number))
+        return self.__exit_numbers
+
+    def set_exit(self, direction, neighbour):
+        raise TypeError("The exits of a RoomGraph can't be changed")
+
+    def get_exit(self, direction):
+        number = self.__get_exit_numbers().get(direction)
+        if number is None:
+            return None
+        return self.__graph[number]
+
+    def get_exit_string(self):
+        return self.cached("exits", lambda room: " ".join(["Exits:", *room.__get_exit_numbers()]))
+
+    @property
+    def exits(self):
+        graph = self.__graph
+        return {
+            direction: graph[number]
+            for direction, number in self.__get_exit_numbers().items()
+        }
@@ -0,0 +1,105 @@
+"""
+Shortest routes between the rooms of a Map.
+
+The Router runs a breadth first search from a room over the whole map
+and keeps the resulting tree, so any later route from the same room
+is read back from the tree in O(path length). The trees of the most
+recently used rooms are cached and all of them are dropped as soon as
+an exit of the map changes.
+"""
+from array import array
+from collections import OrderedDict
+
+from map import Map
+
+
+class Router:
+    """Finds shortest routes through the exits of a Map"""
+
+    def __init__(self, map: Map, avoid=(), max_trees: int = 16) -> None:
+        """
+        Parameters
+        ----------
+        map: Map
+            The map to route through
+        avoid: iterable of int
+            Numbers of rooms a route must not pass through or end in,
+            e.g. the magical transporter room
+        max_trees: int
+            How many search trees to keep
+        """
+        self.__map = map
+        self.__avoid = frozenset(avoid)
+        self.__max_trees = max_trees
+        self.__trees = OrderedDict()
+        self.__version = map.version
+
+    def route(self, source: int, target: int):
+        """Returns the list of directions leading from room number
+        `source` to room number `target`, or None if there is no route.
+        """
+        if target in self.__avoid:
+            return None
+        parents, directions, names = self.__tree(source)
+        if target == source:
+            return []
+        if not 0 < target < len(parents) or parents[target] == 0:
+            return None
+
+        route = []
+        room = target
+        while room != source:
+            route.append(names[directions[room]])
+            room = parents[room]
+        route.reverse()
+        return route
+
+    def __tree(self, source: int):
+        """Returns the search tree of a room, from the cache if possible"""
+        if self.__map.version != self.__version:
+            # The exits changed, every tree may be wrong
+            self.__trees.clear()
+            self.__version = self.__map.version
+
+        tree = self.__trees.get(source)
+        if tree is not None:
+            self.__trees.move_to_end(source)
+            return tree
+
+        tree = self.__search(source)
+        self.__trees[source] = tree
+        if len(self.__trees) > self.__max_trees:
+            self.__trees.popitem(last=False)
+        return tree
+
+    def __search(self, source: int):
+        """Breadth first search from a room.
+
+        Returns the parent room number of every room (0 if it can't be
+        reached), the index of the direction taken from the parent and
+        the list of direction names.
+        """
+        map = self.__map
+        avoid = self.__avoid
+        parents = array("i", bytes(4 * (len(map) + 1)))
+        directions = bytearray(len(map) + 1)
+        names = []
+        codes = {}
+
+        parents[source] = source
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for room in frontier:
+                for direction, next_room in map.neighbours(room):
+                    if parents[next_room] or next_room in avoid:
+                        continue
+                    code = codes.get(direction)
+                    if code is None:
+                        code = codes[direction] = len(names)
+                        names.append(direction)
+                    parents[next_room] = room
+                    directions[next_room] = code
+                    next_frontier.append(next_room)
+            frontier = next_frontier
+        return parents, directions, names
@@ -0,0 +1,204 @@
+"""
+World tick scheduler for the creatures of the dungeon.
+
+Every creature has the turn of its next move. The TimingWheel keeps
+them in buckets by turn, so a tick only looks at the creatures that
+are due. Creatures far from the player can't be seen, so they are
+simulated coarsely: they sleep for `sleep_factor` intervals and make a
+single move when they wake up.
+"""
+import random
+from heapq import heappop, heappush
+
+from map import Map
+from room import Room
+
+
+class TimingWheel:
+    """Schedules items for future turns. Scheduling, cancelling and
+    taking the due items cost O(1) per item, however many items are
+    waiting."""
+
+    def __init__(self, size: int = 256) -> None:
+        """
+        Parameters
+        ----------
+        size: int
+            Number of buckets. Items further in the future than that
+            wait in a heap until their turn comes within reach
+        """
+        self.__size = size
+        self.__buckets = [[] for _ in range(size)]
+        self.__later = []
+        self.__due = {}
+        self.__sequence = 0
+        self.now = 0
+
+    def schedule(self, item, due: int):
+        """Schedule an item for turn `due`, replacing any earlier schedule"""
+        due = max(due, self.now + 1)
+        self.__due[item] = due
+        if due - self.now < self.__size:
+            self.__buckets[due % self.__size].append((due, item))
+        else:
+            self.__sequence += 1
+            heappush(self.__later, (due, self.__sequence, item))
+
+    def cancel(self, item):
+        # The entry stays in its bucket and is skipped when it comes up
+        self.__due.pop(item, None)
+
+    def due(self, item):
+        """Returns the turn an item is scheduled for, or None"""
+        return self.__due.get(item)
+
+    def advance(self) -> list:
+        """Move on to the next turn and return the items due in it"""
+        self.now += 1
+        now, size, later = self.now, self.__size, self.__later
+        while later and later[0][0] - now < size:
+            due, _, item = heappop(later)
+            if self.__due.get(item) == due:
+                self.__buckets[due % size].append((due, item))
+
+        bucket = self.__buckets[now % size]
+        self.__buckets[now % size] = []
+        ready = []
+        for due, item in bucket:
+            # Skip entries that were cancelled or scheduled again
+            if self.__due.get(item) == due:
+                del self.__due[item]
+                ready.append(item)
+        return ready
+
+    def __len__(self) -> int:
+        return len(self.__due)
+
+    def __iter__(self):
+        """Yields the scheduled items in the order they will come up"""
+        due_of, now, size = self.__due, self.now, self.__size
+        for turn in range(now + 1, now + size):
+            for due, item in self.__buckets[turn % size]:
+                if due == turn and due_of.get(item) == due:
+                    yield item
+        for due, _, item in sorted(self.__later):
+            if due_of.get(item) == due:
+                yield item
+
+
+class CreatureScheduler:
+    """Moves the creatures of a map when they are due"""
+
+    def __init__(self, map: Map, interval: int, wake_distance: int = 3,
+                 sleep_factor: int = 10, avoid=(), rng=random) -> None:
+        """
+        Parameters
+        ----------
+        map: Map
+            The map the creatures live in
+        interval: int
+            Turns between two moves of a creature
+        wake_distance: int
+            Creatures further than this many rooms from the player sleep
+        sleep_factor: int
+            How many intervals a sleeping creature sleeps for
+        avoid: iterable of Room
+            Rooms the creatures never walk into
+        rng:
+            Random generator used for the moves
+        """
+        self.__map = map
+        self.__interval = interval
+        self.__wake_distance = wake_distance
+        self.__sleep_factor = sleep_factor
+        self.__avoid = frozenset(avoid)
+        self.__wheel = TimingWheel()
+        self.__sleeping = set()
+        self.__near = (None, None, None)
+        self.rng = rng
+
+    @property
+    def now(self) -> int:
+        return self.__wheel.now
+
+    @now.setter
+    def now(self, turn: int):
+        self.__wheel.now = turn
+
+    def add(self, creature, due: int = None, sleeping: bool = False):
+        """Schedule a creature. Without `due` its first move comes at a
+        random turn within one interval, so they don't all move together."""
+        if due is None:
+            due = self.now + self.rng.randint(1, self.__interval)
+        self.__wheel.schedule(creature, due)
+        if sleeping:
+            self.__sleeping.add(creature)
+
+    def remove(self, creature):
+        self.__wheel.cancel(creature)
+        self.__sleeping.discard(creature)
+
+    def state(self, creature):
+        """Returns the turn of a creature's next move and whether it is
+        sleeping, or None if it isn't scheduled"""
+        due = self.__wheel.due(creature)
+        if due is None:
+            return None
+        return due, creature in self.__sleeping
+
+    def __len__(self) -> int:
+        return len(self.__wheel)
+
+    def __iter__(self):
+        """Yields the scheduled creatures in the order they will move"""
+        return iter(self.__wheel)
+
+    def tick(self, player_room: Room) -> int:
+        """Advance one turn and move the creatures that are due.
+        Returns the number of creatures that were due."""
+        ready = self.__wheel.advance()
+        if not ready:
+            return 0
+        near = self.__near_rooms(player_room)
+        number_of = self.__map.number_of
+        interval = self.__interval
+        for creature in ready:
+            room = creature.get_room()
+            if room is None:
+                # Dead or gone
+                self.__sleeping.discard(creature)
+                continue
+            if creature in self.__sleeping:
+                self.__sleeping.discard(creature)
+                creature.move(self.rng, self.__avoid)
+                room = creature.get_room()
+            elif room is not player_room and number_of(room) in near:
+                creature.move(self.rng, self.__avoid)
+                room = creature.get_room()
+
+            if room is player_room or number_of(room) in near:
+                self.__wheel.schedule(creature, self.now + interval)
+            else:
+                self.__sleeping.add(creature)
+                self.__wheel.schedule(creature, self.now + interval * self.__sleep_factor)
+        return len(ready)
+
+    def __near_rooms(self, player_room: Room) -> set:
+        """Numbers of the rooms within wake_distance of the player"""
+        map = self.__map
+        key = (player_room, map.version)
+        if self.__near[:2] == key:
+            return self.__near[2]
+        start = map.number_of(player_room)
+        near = {start}
+        frontier = [start]
+        for _ in range(self.__wake_distance):
+            next_frontier = []
+            for number in frontier:
+                for _, next_number in map.neighbours(number):
+                    if next_number not in near:
+                        near.add(next_number)
+                        next_frontier.append(next_number)
+            frontier = next_frontier
+        self.__near = (player_room, map.version, near)
+        return near
@@ -0,0 +1,109 @@
+"""
+Asyncio server hosting many games in one process.
+
+Every connection plays its own Game. The protocol is plain lines of
+text, so any line based client works:
+
+    python server.py --port 4000
+    nc localhost 4000
+
+The server answers every command with the game's output followed by
+the "> " prompt. Commands are processed one at a time on the event
+loop, and a session only waits for its own client when writing, so a
+slow client never holds up the others.
+"""
+import argparse
+import asyncio
+import contextlib
+
+from command_parser import Parser
+from game import Game
+from output import SocketSink
+
+PROMPT = "> "
+
+
+class Session:
+    """A single player connected to the server"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.__reader = reader
+        self.__writer = writer
+        self.__parser = Parser()
+        # The game writes straight to the connection, once per command.
+        # Remote players can't save, load or export to the server's files
+        self.game = Game(output=SocketSink(writer), remote=True)
+
+    def run_command(self, line: str):
+        """Process a line, writing the game's output and the prompt"""
+        game = self.game
+        finished = game.process_command(self.__parser.parse(line))
+        if finished and game.outcome == "quit":
+            game.print("Thank you for playing.  Good bye.")
+        elif not finished:
+            game.print(PROMPT, end="")
+        game.output.flush()
+
+    async def play(self, idle_timeout: float = None):
+        """Play until the game ends or the client goes away"""
+        self.game.print_welcome()
+        self.game.print(PROMPT, end="")
+        self.game.output.flush()
+        # Only this session waits if its client is slow to read
+        await self.__writer.drain()
+        while self.game.outcome is None:
+            try:
+                line = await asyncio.wait_for(self.__reader.readline(), idle_timeout)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                # Client closed the connection
+                break
+            self.run_command(line.decode(errors="replace"))
+            await self.__writer.drain()
+
+
+class Server:
+    """Accepts connections and plays a Session for each of them"""
+
+    def __init__(self, idle_timeout: float = None):
+        self.__idle_timeout = idle_timeout
+        self.sessions = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(reader, writer)
+        self.sessions.add(session)
+        try:
+            await session.play(self.__idle_timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 4000, backlog: int = 1024):
+        """Start listening and return the asyncio server"""
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+
+async def serve(host: str, port: int, idle_timeout: float = None):
+    server = await Server(idle_timeout).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many games over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="close sessions idle for this many seconds")
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(args.host, args.port, args.idle_timeout))
+
+
+if __name__ == "__main__":
+    main()
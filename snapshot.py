@@ -0,0 +1,397 @@
+"""
+Save and load the whole state of a Game in a compact binary format.
+
+Nothing is pickled. Rooms and objects are numbered, and every reference
+between them (the room an object is in, the objects the player
+carries, the current room ...) is stored as one of those numbers. Most
+of the data is written as flat arrays, which makes loading a large
+world fast.
+
+Layout (all integers little endian):
+
+    header    magic b"ZUUL", version (u16),
+              map kind (u8: 0 Map, 1 RoomGraph, 2 RegionGraph)
+    map       rooms, start, exit and transporter room (4 x u32)
+              directions (strings), offsets (i32), targets (i32), codes (u8)
+              room names (u8 flag, then strings when the flag is 1)
+    regions   only for a RegionGraph: region size, max regions (2 x u32)
+              loaded regions, least recently used first (u32), their
+              numbers of rooms in memory (u32), those rooms (u32)
+              descriptions of the store (strings)
+              regions in the store (u32), their records (strings)
+    game      current room, last room (0 for none), key, outcome (i32 i32 u8 u8)
+              turn (u32)
+    player    hp, weight of items left (2 x i32)
+    objects   descriptions (strings), names (strings),
+              classes (u8), description indexes (u32), weights (i32), hps (i32)
+              kinds (strings), kind indexes (u32)
+    lists     items, weapons, monsters, inventory, player weapons (u32 each)
+              dwarf (i32, -1 for none)
+    creatures turn of the next move (i32, -1 when not scheduled) and
+              sleeping flag (u8) of every object
+              the scheduled objects in the order they move (u32)
+    rooms     room numbers (u32), object counts (u32), objects in room order (u32)
+
+Arrays and string tables are prefixed with their length (u32).
+A game on a map streamed by regions is written as it is, without
+loading the evicted regions: only the objects in memory are in the
+objects section, the others stay in the records of the store.
+"""
+import struct
+import sys
+from array import array
+
+from command_parser import Parser
+import game as game_module
+from map import Map
+from objects import Dwarf, Item, Monster, Player, Weapon
+from room import Room
+from room_graph import RoomGraph
+
+MAGIC = b"ZUUL"
+VERSION = 1
+
+# Class codes of the objects
+ITEM, WEAPON, MONSTER, DWARF = range(4)
+OUTCOMES = [None, "win", "death", "quit"]
+
+
+class SnapshotError(Exception):
+    """Raised when a file is not a snapshot this version can read"""
+    pass
+
+
+"""
+ * Writing
+"""
+
+
+def _write_struct(out, fmt, *values):
+    out.write(struct.pack("<" + fmt, *values))
+
+
+def _write_array(out, typecode, values):
+    values = values if isinstance(values, array) else array(typecode, values)
+    if values.typecode != typecode:
+        values = array(typecode, values)
+    if sys.byteorder == "big":
+        values = array(typecode, values)
+        values.byteswap()
+    _write_struct(out, "I", len(values))
+    out.write(values.tobytes())
+
+
+def _write_strings(out, strings):
+    encoded = [string.encode() for string in strings]
+    _write_array(out, "I", [len(string) for string in encoded])
+    out.write(b"".join(encoded))
+
+
+def _map_arrays(map: Map):
+    """Returns the exits of a map as CSR arrays, see room_graph"""
+    if isinstance(map.rooms, RoomGraph):
+        return map.rooms.arrays()
+    directions = []
+    codes_of = {}
+    offsets = array("i", [0, 0])
+    targets = array("i")
+    codes = array("B")
+    names = [None]
+    for number in range(1, len(map) + 1):
+        names.append(map[number].get_short_description())
+        for direction, next_number in map.neighbours(number):
+            code = codes_of.get(direction)
+            if code is None:
+                code = codes_of[direction] = len(directions)
+                directions.append(direction)
+            targets.append(next_number)
+            codes.append(code)
+        offsets.append(len(targets))
+    return offsets, targets, codes, directions, names
+
+
+def save(game: "Game", path: str):
+    """Write the state of the game to a file"""
+    with open(path, "wb") as out:
+        write(game, out)
+
+
+def write(game: "Game", out):
+    """Write the state of the game to a binary file object"""
+    map = game.map
+    player = game.player
+    number_of = map.number_of
+
+    # A map streamed by regions.RegionGraph, which is kept streamed
+    saved_state = getattr(map.rooms, "saved_state", None)
+    if saved_state is not None:
+        graph_kind = 2
+    else:
+        graph_kind = int(isinstance(map.rooms, RoomGraph))
+    _write_struct(out, "4sHB", MAGIC, VERSION, graph_kind)
+
+    # Map
+    offsets, targets, codes, directions, names = _map_arrays(map)
+    _write_struct(out, "IIII", len(map), map.start_room, map.exit_room, map.transporter_room)
+    _write_strings(out, directions)
+    _write_array(out, "i", offsets)
+    _write_array(out, "i", targets)
+    _write_array(out, "B", codes)
+    default_names = names is None or all(
+        names[number] == f"Room # {number}" for number in range(1, len(map) + 1)
+    )
+    _write_struct(out, "B", not default_names)
+    if not default_names:
+        _write_strings(out, names[1:])
+    if saved_state is not None:
+        regions, descriptions, records = saved_state()
+        _write_struct(out, "II", map.rooms.region_size, map.rooms.max_regions)
+        _write_array(out, "I", [region for region, _ in regions])
+        _write_array(out, "I", [len(numbers) for _, numbers in regions])
+        _write_array(out, "I", [number for _, numbers in regions for number in numbers])
+        _write_strings(out, descriptions)
+        _write_array(out, "I", [region for region, _ in records])
+        _write_strings(out, [bytes(data).decode() for _, data in records])
+
+    # Game and player
+    last_room = number_of(game.last_room) if game.last_room else 0
+    _write_struct(
+        out, "iiBB",
+        number_of(game.current_room), last_room, game.key, OUTCOMES.index(game.outcome),
+    )
+    _write_struct(out, "I", game.turn)
+    _write_struct(out, "ii", player.hp, player.weight_of_items_left)
+
+    # Objects, numbered in the order they are first seen
+    lists = [game.items, game.weapons, game.monsters, player.inventory, player.weapons]
+    objects = {}
+    for obj in (obj for objs in lists for obj in objs):
+        objects.setdefault(obj, len(objects))
+    if game.dwarf is not None:
+        objects.setdefault(game.dwarf, len(objects))
+
+    descriptions = {}
+    kinds = {}
+    classes, description_indexes, weights, hps, kind_indexes = (array(t) for t in "BIiiI")
+    for obj in objects:
+        if isinstance(obj, Weapon):
+            classes.append(WEAPON)
+        elif isinstance(obj, Item):
+            classes.append(ITEM)
+        elif isinstance(obj, Monster):
+            classes.append(MONSTER)
+        else:
+            classes.append(DWARF)
+        description_indexes.append(
+            descriptions.setdefault(obj.get_description(), len(descriptions))
+        )
+        weights.append(getattr(obj, "weight", 0))
+        hps.append(getattr(obj, "hp", 0))
+        kind_indexes.append(kinds.setdefault(obj.kind, len(kinds)))
+    _write_strings(out, descriptions)
+    _write_strings(out, [obj.get_name() for obj in objects])
+    _write_array(out, "B", classes)
+    _write_array(out, "I", description_indexes)
+    _write_array(out, "i", weights)
+    _write_array(out, "i", hps)
+    _write_strings(out, kinds)
+    _write_array(out, "I", kind_indexes)
+
+    for objs in lists:
+        _write_array(out, "I", [objects[obj] for obj in objs])
+    _write_struct(out, "i", objects[game.dwarf] if game.dwarf is not None else -1)
+
+    # Where the creatures are in the scheduler
+    due, sleeping = array("i"), array("B")
+    for obj in objects:
+        state = game.scheduler.state(obj)
+        due.append(state[0] if state else -1)
+        sleeping.append(state[1] if state else 0)
+    _write_array(out, "i", due)
+    _write_array(out, "B", sleeping)
+    # Creatures due in the same turn move in this order
+    _write_array(out, "I", [objects[obj] for obj in game.scheduler if obj in objects])
+
+    # The objects lying in each room, in the order of the room's index
+    rooms = {}
+    for obj in objects:
+        room = obj.get_room()
+        if room is not None:
+            rooms.setdefault(room, None)
+    _write_array(out, "I", [number_of(room) for room in rooms])
+    _write_array(out, "I", [len(room.objects) for room in rooms])
+    _write_array(out, "I", [objects[obj] for room in rooms for obj in room.objects])
+
+
+"""
+ * Reading
+"""
+
+
+def _read_struct(data, fmt):
+    fmt = "<" + fmt
+    values = struct.unpack_from(fmt, data.buffer, data.position)
+    data.position += struct.calcsize(fmt)
+    return values
+
+
+def _read_array(data, typecode):
+    (length,) = _read_struct(data, "I")
+    values = array(typecode)
+    end = data.position + length * values.itemsize
+    values.frombytes(data.buffer[data.position:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    data.position = end
+    return values
+
+
+def _read_strings(data):
+    lengths = _read_array(data, "I")
+    strings = []
+    position = data.position
+    buffer = data.buffer
+    for length in lengths:
+        strings.append(str(buffer[position:position + length], "utf-8"))
+        position += length
+    data.position = position
+    return strings
+
+
+class _Reader:
+    """A buffer and the position reached in it"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+
+def load(path: str, parser: Parser = None) -> "Game":
+    """Read a game saved with save"""
+    with open(path, "rb") as file:
+        return read(file.read(), parser)
+
+
+def read(buffer, parser: Parser = None) -> "Game":
+    """Create a game from the bytes written by write"""
+    data = _Reader(buffer)
+    try:
+        magic, version, graph_kind = _read_struct(data, "4sHB")
+    except struct.error:
+        raise SnapshotError("The file is too short to be a snapshot")
+    if magic != MAGIC:
+        raise SnapshotError("The file is not a snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    # Map
+    rooms, start_room, exit_room, transporter_room = _read_struct(data, "IIII")
+    directions = _read_strings(data)
+    offsets = _read_array(data, "i")
+    targets = _read_array(data, "i")
+    codes = _read_array(data, "B")
+    (has_names,) = _read_struct(data, "B")
+    names = [None] + _read_strings(data) if has_names else None
+
+    if graph_kind == 2:
+        # Imported here, regions imports this module
+        from regions import RegionGraph
+
+        region_size, max_regions = _read_struct(data, "II")
+        loaded = _read_array(data, "I")
+        counts = _read_array(data, "I")
+        in_memory = iter(_read_array(data, "I"))
+        regions = [(region, [next(in_memory) for _ in range(count)])
+                   for region, count in zip(loaded, counts)]
+        descriptions = _read_strings(data)
+        saved = _read_array(data, "I")
+        records = [record.encode() for record in _read_strings(data)]
+        graph = RegionGraph(
+            RoomGraph(offsets, targets, codes, directions, names), region_size, max_regions
+        )
+        graph.start_room, graph.exit_room, graph.transporter_room = (
+            start_room, exit_room, transporter_room
+        )
+        graph.restore_state(regions, descriptions, list(zip(saved, records)))
+        map = Map(graph, start_room, exit_room, transporter_room)
+    elif graph_kind:
+        graph = RoomGraph(offsets, targets, codes, directions, names)
+        map = Map(graph, start_room, exit_room, transporter_room)
+    else:
+        dungeon = {
+            number: Room(names[number] if names else f"Room # {number}")
+            for number in range(1, rooms + 1)
+        }
+        for number, room in dungeon.items():
+            for i in range(offsets[number], offsets[number + 1]):
+                room.set_exit(directions[codes[i]], dungeon[targets[i]])
+        map = Map(dungeon, start_room, exit_room, transporter_room)
+
+    # Game and player
+    current_room, last_room, key, outcome = _read_struct(data, "iiBB")
+    (turn,) = _read_struct(data, "I")
+    hp, weight_of_items_left = _read_struct(data, "ii")
+    game = game_module.Game(map, parser, populate=False)
+
+    # Objects, created outside of any room
+    descriptions = _read_strings(data)
+    object_names = _read_strings(data)
+    classes = _read_array(data, "B")
+    description_indexes = _read_array(data, "I")
+    weights = _read_array(data, "i")
+    hps = _read_array(data, "i")
+    kinds = _read_strings(data)
+    kind_indexes = _read_array(data, "I")
+    objects = []
+    for i, name in enumerate(object_names):
+        description = descriptions[description_indexes[i]]
+        kind = kinds[kind_indexes[i]]
+        object_class = classes[i]
+        if object_class == WEAPON:
+            obj = Weapon(name, description, None, weights[i], hps[i], kind)
+        elif object_class == ITEM:
+            obj = Item(name, description, None, weights[i], kind)
+        elif object_class == MONSTER:
+            obj = Monster(name, description, None, hps[i], kind)
+        else:
+            obj = Dwarf(name, description, None, kind)
+        objects.append(obj)
+
+    items, weapons, monsters, inventory, player_weapons = (
+        [objects[i] for i in _read_array(data, "I")] for _ in range(5)
+    )
+    (dwarf,) = _read_struct(data, "i")
+    due = _read_array(data, "i")
+    sleeping = _read_array(data, "B")
+    order = _read_array(data, "I")
+
+    room_numbers = _read_array(data, "I")
+    counts = _read_array(data, "I")
+    in_rooms = iter(_read_array(data, "I"))
+    for number, count in zip(room_numbers, counts):
+        room = map[number]
+        for _ in range(count):
+            objects[next(in_rooms)].change_room(room)
+
+    game.items.extend(items)
+    game.weapons.extend(weapons)
+    game.monsters.extend(monsters)
+    game.dwarf = objects[dwarf] if dwarf >= 0 else None
+    game.key = bool(key)
+    game.outcome = OUTCOMES[outcome]
+    game.last_room = map[last_room] if last_room else None
+
+    game.turn = game.scheduler.now = turn
+    for i in order:
+        game.scheduler.add(objects[i], due[i], bool(sleeping[i]))
+
+    # Picking the carried objects takes their weight off again
+    carried = sum(obj.weight for obj in inventory + player_weapons)
+    game.player = Player(hp, weight_of_items_left + carried)
+    game.current_room = map[current_room]
+    for item in inventory:
+        game.player.pick_item(item)
+    for weapon in player_weapons:
+        game.player.pick_weapon(weapon)
+    map.bind(game)
+    return game
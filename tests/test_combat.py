@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+import combat
+from constants import GOBLIN_HP, ORC_HP, WOLF_HP, SPEAR_HP, SWORD_HP
+from objects import Monster, Player, Weapon
+from utils import PlayerWeakerThanMonsterException
+
+SLOTS = 3
+
+
+def random_fights(count, rng):
+    weapons = [
+        [rng.choice([0, SWORD_HP, SPEAR_HP, rng.randint(1, 150)]) for _ in range(SLOTS)]
+        for _ in range(count)
+    ]
+    # Carried weapons come first
+    weapons = [sorted(row, key=lambda hp: hp == 0) for row in weapons]
+    monsters = [rng.choice([GOBLIN_HP, ORC_HP, WOLF_HP, rng.randint(1, 400)]) for _ in range(count)]
+    players = [rng.randint(1, 200) for _ in range(count)]
+    return weapons, monsters, players
+
+
+def fight(weapons, monster_hp, player_hp):
+    """One fight with the objects of the game"""
+    player = Player(player_hp)
+    carried = [Weapon("Weapon", "", None, 0, hp) for hp in weapons if hp > 0]
+    for weapon in carried:
+        player.pick_weapon(weapon)
+    monster = Monster("Monster", "", None, monster_hp)
+    try:
+        monster_died = player.fight(monster)
+        player_died = False
+    except PlayerWeakerThanMonsterException:
+        monster_died, player_died = False, True
+    weapons_after = [w.hp if w in player.weapons else 0 for w in carried]
+    weapons_after += [0] * (len(weapons) - len(weapons_after))
+    return monster_died, player_died, monster.hp, player.hp, weapons_after
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_resolve_matches_player_fight(with_numpy, monkeypatch):
+    if with_numpy and combat.numpy is None:
+        pytest.skip("NumPy is not installed")
+    if not with_numpy:
+        monkeypatch.setattr(combat, "numpy", None)
+    weapons, monsters, players = random_fights(5000, random.Random(0))
+    result = combat.resolve(weapons, monsters, players)
+    for i in range(len(monsters)):
+        got = (
+            bool(result.monster_died[i]), bool(result.player_died[i]),
+            int(result.monster_hp[i]), int(result.player_hp[i]),
+            [int(hp) for hp in result.weapon_hp[i]],
+        )
+        assert got == fight(weapons[i], monsters[i], players[i]), (weapons[i], monsters[i], players[i])
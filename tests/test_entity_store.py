@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+import entity_store
+from constants import GOBLIN_HP, GOBLIN_KIND, MONSTER_DESCRIPTION
+from entity_store import EntityStore, MONSTER
+from map import Map
+from map_generator import generate_graph
+from objects import Monster, ObjectType
+
+ROOMS = 400
+COUNT = 2000
+TICKS = 200
+
+
+def goblins(dungeon, rng):
+    """The same goblins as Monsters and in a store"""
+    goblin = ObjectType.get("Goblin", MONSTER_DESCRIPTION, GOBLIN_KIND)
+    starts = [rng.choice(range(2, ROOMS)) for _ in range(COUNT)]
+    monsters = [
+        Monster(f"Goblin # {i+1}", MONSTER_DESCRIPTION, dungeon[room], GOBLIN_HP, GOBLIN_KIND)
+        for i, room in enumerate(starts)
+    ]
+    store = EntityStore(dungeon)
+    for i, room in enumerate(starts):
+        store.add(MONSTER, goblin, i + 1, room, GOBLIN_HP)
+    return monsters, store
+
+
+def test_tick_moves_like_creature_move(monkeypatch):
+    monkeypatch.setattr(entity_store, "numpy", None)
+    dungeon = Map(generate_graph(ROOMS, seed=2))
+    monsters, store = goblins(dungeon, random.Random(2))
+    # The creatures stay out of these rooms in the game
+    avoid = [dungeon.transporter_room, dungeon.exit_room]
+    avoid_rooms = [dungeon[number] for number in avoid]
+    objects_rng, store_rng = random.Random(3), random.Random(3)
+    for _ in range(TICKS):
+        for monster in monsters:
+            monster.move(objects_rng, avoid_rooms)
+        store.tick(store_rng, avoid)
+        assert list(store.rooms) == [dungeon.number_of(monster.get_room()) for monster in monsters]
+
+
+def test_vectorised_tick_takes_every_allowed_exit_as_often():
+    if entity_store.numpy is None:
+        pytest.skip("NumPy is not installed")
+    dungeon = Map(generate_graph(ROOMS, seed=2))
+    rng = random.Random(2)
+    _, store = goblins(dungeon, rng)
+    avoid = [dungeon.transporter_room, dungeon.exit_room]
+    taken = {}
+    for _ in range(TICKS):
+        before = list(store.rooms)
+        store.tick(rng, avoid)
+        for here, there in zip(before, store.rooms):
+            destinations = taken.setdefault(here, {})
+            destinations[there] = destinations.get(there, 0) + 1
+    for here, destinations in taken.items():
+        allowed = [n for _, n in dungeon.neighbours(here) if n not in avoid] or [here]
+        assert set(destinations) <= set(allowed), f"Room # {here}"
+        total = sum(destinations.values())
+        if total >= 2000:
+            for number in allowed:
+                share = destinations.get(number, 0) / total
+                assert abs(share - 1 / len(allowed)) < 0.05, f"Room # {here}"
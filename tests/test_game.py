@@ -0,0 +1,18 @@
+from command_parser import Parser
+from game import Game
+from map_generator import generate_graph
+from output import NullSink
+
+
+def test_goto_takes_a_turn_for_every_room():
+    game = Game(generate_graph(400, seed=2).to_map(), output=NullSink(), rng=1, spawns=[])
+    start = game.map.number_of(game.current_room)
+    target = next(
+        number for number in range(400, 0, -1)
+        if number != game.map.transporter_room
+        and len(game.router.route(start, number) or ()) > 2
+    )
+    route = game.router.route(start, target)
+    game.process_command(Parser().parse(f"goto {target}"))
+    assert game.map.number_of(game.current_room) == target
+    assert game.turn == len(route)
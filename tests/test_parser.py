@@ -0,0 +1,12 @@
+from command_parser import Parser
+
+
+def test_parser_knows_the_command_words_without_the_game():
+    parser = Parser()
+    command = parser.parse("go east")
+    assert (command.get_command_word(), command.get_second_word()) == ("go", "east")
+    command = parser.parse("pi sw")
+    assert (command.get_command_word(), command.get_second_word()) == ("pick", "sword")
+    # Commands about the session are typed in full
+    assert parser.parse("st").get_command_word() == "status"
+    assert parser.parse("dance").get_command_word() is None
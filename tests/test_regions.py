@@ -0,0 +1,98 @@
+import io
+import json
+import random
+
+from command_parser import Parser
+from constants import FOOD_DESCRIPTION, GOBLIN_HP, MONSTER_DESCRIPTION
+from game import Game
+from journal import Journal
+from map_generator import generate_graph
+from output import NullSink
+from regions import streamed
+import snapshot
+import world_file
+from world_file import Spawn
+
+ROOMS = 20_000
+
+
+def spawns(rooms):
+    return world_file.default_spawns() + [
+        Spawn("item", "Bread", "food", FOOD_DESCRIPTION, rooms // 40),
+        Spawn("monster", "Ghoul", "goblin", MONSTER_DESCRIPTION, rooms // 40, GOBLIN_HP),
+    ]
+
+
+def streamed_game(store=None):
+    map = streamed(generate_graph(ROOMS, 1).to_map(), region_size=64, max_regions=4, store=store)
+    return Game(map, output=NullSink(), rng=1, spawns=spawns(ROOMS))
+
+
+def walk(game, moves, rng):
+    for _ in range(moves):
+        room = game.current_room
+        directions = [direction for direction, _ in game.map.neighbours(room.number)]
+        game.go_next_room(room.get_exit(rng.choice(directions)))
+        game.tick()
+
+
+def live_objects(game):
+    return game.items + game.weapons + game.monsters + ([game.dwarf] if game.dwarf else [])
+
+
+def test_every_object_is_in_memory_or_in_the_store_once():
+    store = {}
+    game = streamed_game(store)
+    regions = game.map.rooms
+    placed = len(live_objects(game)) + sum(len(json.loads(data)) for data in store.values())
+    rng = random.Random(2)
+    for _ in range(500):
+        walk(game, 1, rng)
+        # Over the budget only by the regions held during a tick
+        assert regions.loaded_regions <= regions.max_regions + 1
+        names = [obj.get_name() for obj in live_objects(game)]
+        names += [record[2] for data in store.values() for record in json.loads(data)]
+        assert len(names) == len(set(names)) == placed
+        for obj in live_objects(game):
+            room = obj.get_room()
+            # In a room of the graph, not one of an evicted region
+            assert room is not None and regions[room.number] is room
+
+
+def test_every_live_creature_keeps_its_schedule():
+    # Small regions and a crowd, so regions are evicted during ticks
+    store = {}
+    map = streamed(generate_graph(4000, 1).to_map(), region_size=16, max_regions=3, store=store)
+    goblins = [Spawn("monster", "Goblin", "goblin", MONSTER_DESCRIPTION, 3000, GOBLIN_HP)]
+    game = Game(map, output=NullSink(), rng=1, spawns=goblins)
+    walk(game, 400, random.Random(1))
+    assert map.rooms.evictions > 0
+    for monster in game.monsters:
+        assert game.scheduler.state(monster) is not None
+    for data in store.values():
+        for record in json.loads(data):
+            if record[1] == snapshot.MONSTER:
+                # The turns left until its move
+                assert record[7] >= 0
+
+
+def test_recovered_game_is_the_game_that_was_played(tmp_path):
+    game = streamed_game()
+    parser = Parser()
+    rng = random.Random(1)
+    path = str(tmp_path / "game.journal")
+    game.journal = Journal(path, game, checkpoint_every=100)
+    for _ in range(350):
+        if game.outcome is not None:
+            break
+        directions = [direction for direction, _ in game.map.neighbours(game.current_room.number)]
+        line = rng.choice(["go " + rng.choice(directions)] * 3 + ["pick food", "back"])
+        game.process_command(parser.parse(line))
+    game.journal.close()
+    recovered, journal = Journal.recover(path)
+    journal.close()
+
+    expected, got = io.BytesIO(), io.BytesIO()
+    snapshot.write(game, expected)
+    snapshot.write(recovered, got)
+    assert got.getvalue() == expected.getvalue()
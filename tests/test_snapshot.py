@@ -0,0 +1,67 @@
+import io
+
+from command_parser import Parser
+from constants import MONSTER_DESCRIPTION, WEAPON_DESCRIPTION
+from game import Game
+from map_generator import generate_graph
+from output import NullSink
+import snapshot
+import world_file
+from world_file import Spawn
+
+
+def state(game):
+    """What the snapshot must keep of the objects of a game"""
+    objects = game.items + game.weapons + game.monsters + ([game.dwarf] if game.dwarf else [])
+    return [
+        (type(obj).__name__, obj.get_name(), obj.kind, obj.get_description(),
+         game.map.number_of(obj.get_room()) if obj.get_room() else None,
+         getattr(obj, "hp", 0), getattr(obj, "weight", 0))
+        for obj in objects
+    ] + [(obj.get_name(), obj.kind) for obj in [*game.player.inventory, *game.player.weapons]]
+
+
+def round_trip(game, parser=None):
+    buffer = io.BytesIO()
+    snapshot.write(game, buffer)
+    return snapshot.read(buffer.getvalue(), parser)
+
+
+def test_round_trip_keeps_the_kinds_of_a_world_file():
+    spawns = world_file.default_spawns() + [
+        Spawn("weapon", "Blade", "sword", WEAPON_DESCRIPTION, 2, 120, at=[1]),
+        Spawn("monster", "Ghoul", "goblin", MONSTER_DESCRIPTION, 3, 60),
+        Spawn("item", "Bread", "food", "Bread can also be given to the Dwarf.", 2),
+    ]
+    text = io.StringIO()
+    world_file.write(text, generate_graph(100, seed=1).to_map(), spawns)
+    map, spawns = world_file.read(io.StringIO(text.getvalue()), compact=True)
+    game = Game(map, output=NullSink(), rng=1, spawns=spawns)
+    parser = Parser()
+    for _ in range(3):
+        game.process_command(parser.parse("pick sword"))
+
+    copy = round_trip(game, parser)
+    assert state(copy) == state(game)
+    blades = [obj for obj in [*copy.weapons, *copy.player.weapons] if obj.get_name().startswith("Blade")]
+    assert blades
+    assert all(blade.kind == "sword" for blade in blades)
+
+
+def test_round_trip_writes_the_same_bytes():
+    for map in (None, generate_graph(200, seed=3).to_map()):
+        game = Game(map, output=NullSink(), rng=4)
+        expected, got = io.BytesIO(), io.BytesIO()
+        snapshot.write(game, expected)
+        snapshot.write(round_trip(game), got)
+        assert got.getvalue() == expected.getvalue()
+
+
+def test_damaged_monsters_share_their_type():
+    game = Game(generate_graph(200, seed=3).to_map(), output=NullSink(), rng=4)
+    game.monsters[0].deplete_hp(7)
+    copy = round_trip(game)
+    assert copy.monsters[0].hp != copy.monsters[1].hp
+    assert len({monster.object_type for monster in copy.monsters}) == len(
+        {monster.object_type for monster in game.monsters}
+    )
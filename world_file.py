@@ -0,0 +1,383 @@
+"""
+Worlds defined in data files: the rooms, their exits, the special rooms
+and what is spawned where.
+
+A world file is JSON lines, one record per line. The header comes
+first, then the spawn tables and the rooms, in room number order:
+
+    {"type": "world", "rooms": 15, "start": 1, "exit": 15, "transporter": 3}
+    {"type": "spawn", "class": "weapon", "title": "Sword", "kind": "sword",
+     "description": "...", "count": 2, "hp": 100,
+     "weights": [20, 30, 40], "at": [1]}
+    {"type": "room", "number": 1, "exits": {"east": 2, "south": 4}}
+
+A room may have a "name"; it is "Room # <number>" otherwise. The class
+of a spawn is "item", "weapon", "monster" or "dwarf". The objects go to
+random rooms, except the first ones which go to the rooms of "at".
+They are named "<title> # 1", "<title> # 2" ... unless "numbered" is
+false. The game has a single dwarf, so a world has at most one dwarf
+spawn and its count is 1.
+
+The file is read one line at a time and checked as it goes, so an
+error is reported with its line number before anything else is built.
+The exits go straight into the arrays of a RoomGraph; the raw records
+are never kept. With `compact=False` the Rooms are created from those
+arrays once the whole file has been checked.
+
+    map, spawns = world_file.load("worlds/default.jsonl")
+    game = Game(map, spawns=spawns)
+
+Example:
+    python world_file.py generate --rooms 1000000 --seed 1 big.jsonl
+    python world_file.py load big.jsonl --compact
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from array import array
+
+import constants
+from instrumentation import print_peak_memory
+from map import Map
+from room import Room
+from room_graph import RoomGraph
+
+FORMAT = 1
+SPAWN_CLASSES = ("item", "weapon", "monster", "dwarf")
+# The weights items and weapons are given at random by default
+WEIGHTS = list(range(20, 110, 10))
+
+
+class WorldFileError(Exception):
+    """Raised when a world file is not valid"""
+
+    def __init__(self, message: str, line: int = None) -> None:
+        if line is not None:
+            message = f"line {line}: {message}"
+        super().__init__(message)
+        self.line = line
+
+
+class Spawn:
+    """Objects of one kind to place in the dungeon"""
+
+    def __init__(
+        self,
+        object_class: str,
+        title: str,
+        kind: str,
+        description: str,
+        count: int = 1,
+        hp: int = 0,
+        weights: list = None,
+        at: list = None,
+        numbered: bool = True,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        object_class: str
+            "item", "weapon", "monster" or "dwarf"
+        title: str
+            The name of the objects, without their number
+        kind: str
+            The kind of the objects, e.g. "sword"
+        description: str
+            The description shared by all the objects
+        count: int
+            How many objects to place
+        hp: int
+            Hit points of weapons and monsters
+        weights: list
+            The weights of items and weapons are chosen from these
+        at: list
+            Room numbers of the first objects, the others go to
+            random rooms
+        numbered: bool
+            Add " # <number>" to the names of the objects
+        """
+        self.object_class = object_class
+        self.title = title
+        self.kind = kind
+        self.description = description
+        self.count = count
+        self.hp = hp
+        self.weights = weights or WEIGHTS
+        self.at = at or []
+        self.numbered = numbered
+
+    def name(self, index: int) -> str:
+        """Returns the name of the object number `index`, from 0"""
+        return f"{self.title} # {index + 1}" if self.numbered else self.title
+
+    def record(self) -> dict:
+        """Returns the spawn as a record of a world file"""
+        record = {
+            "type": "spawn", "class": self.object_class, "title": self.title,
+            "kind": self.kind, "description": self.description, "count": self.count,
+        }
+        if self.object_class in ("weapon", "monster"):
+            record["hp"] = self.hp
+        if self.object_class in ("item", "weapon") and self.weights != WEIGHTS:
+            record["weights"] = self.weights
+        if self.at:
+            record["at"] = self.at
+        if not self.numbered:
+            record["numbered"] = False
+        return record
+
+
+def default_spawns() -> list:
+    """The objects of the default game, from the constants"""
+    c = constants
+    return [
+        Spawn("item", "Food", c.FOOD_KIND, c.FOOD_DESCRIPTION, c.FOOD_ITEMS),
+        Spawn("item", "Herb", c.HERB_KIND, c.HERBS_DESCRIPTION, c.NUM_OF_HERBS),
+        Spawn("weapon", "Sword", c.SWORD_KIND, c.WEAPON_DESCRIPTION, c.SWORD,
+              c.SWORD_HP, at=[c.START_ROOM]),
+        Spawn("weapon", "Spear", c.SPEAR_KIND, c.WEAPON_DESCRIPTION, c.SPEAR, c.SPEAR_HP),
+        Spawn("monster", "Goblin", c.GOBLIN_KIND, c.MONSTER_DESCRIPTION, c.GOBLINS, c.GOBLIN_HP),
+        Spawn("monster", "Orc", c.ORC_KIND, c.MONSTER_DESCRIPTION, c.ORCS, c.ORC_HP),
+        Spawn("monster", "Wolf", c.WOLF_KIND, c.MONSTER_DESCRIPTION, c.WOLVES, c.WOLF_HP),
+        Spawn("dwarf", "Dwarf", c.DWARF_KIND, c.DWARF_DESCRIPTION, numbered=False),
+    ]
+
+
+"""
+ * Writing
+"""
+
+
+def save(path: str, map: Map, spawns: list = None):
+    """Write a world file of a map and its spawns (the default ones
+    when not given)"""
+    with open(path, "w") as out:
+        write(out, map, spawns)
+
+
+def write(out, map: Map, spawns: list = None):
+    """Write a world file to a text file object"""
+    if spawns is None:
+        spawns = default_spawns()
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    out.write(dumps({
+        "type": "world", "format": FORMAT, "rooms": len(map), "start": map.start_room,
+        "exit": map.exit_room, "transporter": map.transporter_room,
+    }) + "\n")
+    for spawn in spawns:
+        out.write(dumps(spawn.record()) + "\n")
+
+    rooms = map.rooms
+    for number in range(1, len(map) + 1):
+        if isinstance(rooms, RoomGraph):
+            name = rooms.name(number)
+            exits = dict(rooms.neighbours(number))
+        else:
+            room = rooms[number]
+            name = room.get_short_description()
+            exits = {direction: map.number_of(next_room) for direction, next_room in room.exits.items()}
+        record = {"type": "room", "number": number, "exits": exits}
+        if name != f"Room # {number}":
+            record["name"] = name
+        out.write(dumps(record) + "\n")
+
+
+"""
+ * Reading
+"""
+
+
+def load(path: str, compact: bool = False):
+    """Read a world file. Returns the Map and the list of Spawns.
+
+    Parameters
+    ----------
+    compact: bool
+        Keep the exits in a RoomGraph rather than in a Room each
+    """
+    with open(path) as lines:
+        return read(lines, compact)
+
+
+def _integer(record: dict, key: str, line: int, low: int = None, high: int = None) -> int:
+    value = record.get(key)
+    # bool is an int too, but never a number here
+    if type(value) is not int:
+        raise WorldFileError(f'"{key}" must be an integer', line)
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise WorldFileError(f'"{key}" is out of range: {value}', line)
+    return value
+
+
+def spawn_of(record: dict, rooms: int, line: int = None) -> Spawn:
+    """Returns the Spawn of a spawn record of a world file with
+    `rooms` rooms, or raises WorldFileError"""
+    object_class = record.get("class")
+    if object_class not in SPAWN_CLASSES:
+        raise WorldFileError(f"Unknown spawn class {object_class!r}", line)
+    for key in ("title", "kind", "description"):
+        if not isinstance(record.get(key), str):
+            raise WorldFileError(f'"{key}" must be a string', line)
+    count = _integer(record, "count", line, low=0)
+    if object_class == "dwarf" and count != 1:
+        raise WorldFileError('The "count" of a dwarf must be 1', line)
+    hp = _integer(record, "hp", line, low=1) if object_class in ("weapon", "monster") else 0
+    weights = record.get("weights", WEIGHTS)
+    if not isinstance(weights, list) or not weights or not all(
+        type(weight) is int and weight >= 0 for weight in weights
+    ):
+        raise WorldFileError('"weights" must be a non-empty list of non-negative integers', line)
+    at = record.get("at", [])
+    if not isinstance(at, list) or not all(
+        type(number) is int and 1 <= number <= rooms for number in at
+    ):
+        raise WorldFileError('"at" must be a list of room numbers', line)
+    return Spawn(
+        object_class, record["title"], record["kind"], record["description"],
+        count, hp, list(weights), list(at), record.get("numbered", True) is not False,
+    )
+
+
+def read(lines, compact: bool = False):
+    """Read a world file from an iterable of lines, see load"""
+    header = None
+    spawns = []
+    directions = []
+    codes_of = {}
+    offsets = array("i", [0, 0])
+    targets = array("i")
+    codes = array("B")
+    # Only created when a room has a name of its own
+    names = None
+    rooms = number = 0
+
+    for line, text in enumerate(lines, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as error:
+            raise WorldFileError(f"Not a JSON record: {error}", line) from None
+        if not isinstance(record, dict):
+            raise WorldFileError("A record must be a JSON object", line)
+        kind = record.get("type")
+
+        if header is None:
+            if kind != "world":
+                raise WorldFileError('The file must start with a "world" record', line)
+            if record.get("format", FORMAT) != FORMAT:
+                raise WorldFileError(f"Unsupported format {record['format']!r}", line)
+            rooms = _integer(record, "rooms", line, low=1)
+            for key in ("start", "exit", "transporter"):
+                _integer(record, key, line, 1, rooms)
+            header = record
+
+        elif kind == "room":
+            number += 1
+            if _integer(record, "number", line) != number:
+                raise WorldFileError(f"Expected room number {number}", line)
+            if number > rooms:
+                raise WorldFileError(f"More rooms than the {rooms} of the header", line)
+            exits = record.get("exits", {})
+            if not isinstance(exits, dict):
+                raise WorldFileError('"exits" must be an object', line)
+            for direction, target in exits.items():
+                if type(target) is not int or not 1 <= target <= rooms:
+                    raise WorldFileError(f"The {direction} exit leads to no room: {target!r}", line)
+                code = codes_of.get(direction)
+                if code is None:
+                    if len(directions) == 256:
+                        raise WorldFileError("Too many directions", line)
+                    code = codes_of[direction] = len(directions)
+                    directions.append(direction)
+                targets.append(target)
+                codes.append(code)
+            offsets.append(len(targets))
+            name = record.get("name")
+            if name is not None:
+                if not isinstance(name, str):
+                    raise WorldFileError('"name" must be a string', line)
+                if names is None:
+                    names = [None] + [f"Room # {n}" for n in range(1, number)]
+                names.append(name)
+            elif names is not None:
+                names.append(f"Room # {number}")
+
+        elif kind == "spawn":
+            spawn = spawn_of(record, rooms, line)
+            if spawn.object_class == "dwarf" and any(
+                other.object_class == "dwarf" for other in spawns
+            ):
+                raise WorldFileError("A world has a single dwarf", line)
+            spawns.append(spawn)
+
+        else:
+            raise WorldFileError(f"Unknown record type {kind!r}", line)
+
+    if header is None:
+        raise WorldFileError("The file is empty")
+    if number != rooms:
+        raise WorldFileError(f"Expected {rooms} rooms, found {number}")
+    special_rooms = {header["start"], header["exit"], header["transporter"]}
+    # Every object draws a random room, even the ones placed with "at"
+    if rooms == len(special_rooms) and any(spawn.count for spawn in spawns):
+        raise WorldFileError("There is no room to place the objects in")
+
+    start, exit, transporter = header["start"], header["exit"], header["transporter"]
+    if compact:
+        graph = RoomGraph(offsets, targets, codes, directions, names)
+        return Map(graph, start, exit, transporter), spawns
+
+    dungeon = {
+        n: Room(names[n] if names else f"Room # {n}") for n in range(1, rooms + 1)
+    }
+    for n, room in dungeon.items():
+        for i in range(offsets[n], offsets[n + 1]):
+            room.set_exit(directions[codes[i]], dungeon[targets[i]])
+    return Map(dungeon, start, exit, transporter), spawns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write or load a world file and report its cost")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write the world file of a generated dungeon")
+    generate.add_argument("path")
+    generate.add_argument("--rooms", type=int, default=0,
+                          help="number of rooms, the default dungeon when not given")
+    generate.add_argument("--seed", type=int, default=None)
+    generate.add_argument("--exit-density", type=float, default=0.1)
+    read_file = commands.add_parser("load", help="load a world file")
+    read_file.add_argument("path")
+    read_file.add_argument("--compact", action="store_true",
+                           help="store the dungeon in a compact RoomGraph")
+    read_file.add_argument("--trace-memory", action="store_true",
+                           help="measure the peak with tracemalloc (exact, but much slower)")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        if args.rooms:
+            from map_generator import generate_graph
+            map = generate_graph(args.rooms, args.seed, args.exit_density).to_map()
+        else:
+            map = Map()
+            map.link_exits()
+        start = time.perf_counter()
+        save(args.path, map)
+        print(f"rooms: {len(map)}  write time: {time.perf_counter() - start:.2f}s")
+        return
+
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    map, spawns = load(args.path, args.compact)
+    elapsed = time.perf_counter() - start
+
+    print(f"rooms: {len(map)}  spawns: {sum(spawn.count for spawn in spawns)}  "
+          f"transporter: Room # {map.transporter_room}")
+    print(f"load time: {elapsed:.2f}s")
+    print_peak_memory()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,69 @@
+import argparse
+import sys
+
+from command_parser import Parser, read_lines
 from game import Game
+from map import Map
+from instrumentation import Stats
+from output import NullSink, StreamSink
+import mapped_world
+import regions
+import world_file
 
 #
 # This is the main program that needs to be run
 # It simply creates a Game object and then starts the game
 #
-game = Game()
-game.play()
+# A recorded session can be played back with
+#     python zuul-main.py --script session.txt
+# where the file has one command per line ('-' reads standard input)
+#
+# Another dungeon can be played with
+#     python zuul-main.py --world worlds/default.jsonl
+# see world_file.py, or a memory-mapped .zmap world, see mapped_world.py.
+# Add --max-regions 16 to keep only 16 regions of it in memory, see
+# regions.py
+#
+arguments = argparse.ArgumentParser(description="Play the World of Zuul")
+arguments.add_argument("--script", help="read the commands from this file")
+arguments.add_argument("--quiet", action="store_true", help="don't print the game's output")
+arguments.add_argument("--output", help="write the game's output to this file")
+arguments.add_argument("--seed", type=int, help="seed of the game, to play the same game again")
+arguments.add_argument("--world", help="play the dungeon of this world file")
+arguments.add_argument("--max-regions", type=int,
+                       help="stream the world in and out of memory, keeping this many regions")
+arguments.add_argument("--stats", help="collect statistics and append them to this JSON lines file")
+args = arguments.parse_args()
+
+
+def play(output=None):
+    if args.script is None:
+        parser = Parser()
+    else:
+        lines = sys.stdin if args.script == "-" else read_lines(args.script)
+        parser = Parser(lines, echo=True, output=output)
+    map = spawns = None
+    if args.world:
+        load = mapped_world.open_world if args.world.endswith(".zmap") else world_file.load
+        map, spawns = load(args.world)
+    if args.max_regions:
+        if map is None:
+            map = Map()
+            map.link_exits()
+        map = regions.streamed(map, max_regions=args.max_regions)
+    game = Game(map, parser=parser, output=output, rng=args.seed, spawns=spawns)
+    if args.stats:
+        game.stats = Stats()
+    game.play()
+    if args.stats:
+        with open(args.stats, "a") as file:
+            game.stats.export(file, turn=game.turn, outcome=game.outcome)
+
+
+if args.quiet:
+    play(NullSink())
+elif args.output:
+    with open(args.output, "w") as file:
+        play(StreamSink(file))
+else:
+    play()